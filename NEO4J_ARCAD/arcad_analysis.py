@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Analyses du graphe d'appels hors ligne - Patrimoine IBMi ARCAD
+Cycles d'appels (composantes fortement connexes), programmes non atteignables
+depuis les points d'entrée et tables inutilisées, calculés une fois à la
+préparation en temps linéaire et écrits en CSV chargeables (propriétés des
+nœuds Programme / Table) au lieu de requêtes Neo4j sur tout le graphe
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import fnmatch
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from arcad_graph import PROGRAMME, TABLE, build_graph
+from arcad_reachability import strongly_connected_components
+from excel_github_to_csv import (CSV_COMPRESSION_SUFFIXES, OUTPUT_DIR, csv_output_path, resolve_csv_compression,
+                                 write_csv)
+from neo4j_loader import read_prepared_csvs
+
+# CSV produits, dans le répertoire des CSV préparés
+PROGRAMMES_ANALYSIS_CSV = "IBMi_Programmes_Analyse.csv"
+TABLES_ANALYSIS_CSV = "IBMi_Tables_Analyse.csv"
+CYCLES_CSV = "IBMi_Cycles.csv"
+
+# Programmes listés par cycle dans IBMi_Cycles.csv (séparés par '|')
+CYCLE_MEMBERS_SEPARATOR = "|"
+
+def load_entry_points(path):
+    """Motifs de points d'entrée d'un fichier texte (un par ligne, '#' pour commenter)"""
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+def match_entry_points(graph, patterns):
+    """Programmes désignés par des motifs NOM ou BIBLIOTHEQUE/NOM (jokers fnmatch: * ?)"""
+    programmes = np.flatnonzero(graph.labels == PROGRAMME)
+    names = np.array(graph.names, dtype=object)[programmes]
+    keys = np.array([f"{library}/{name}" for library, name in
+                     zip(np.array(graph.libraries, dtype=object)[programmes], names)], dtype=object)
+    selected = np.zeros(len(programmes), dtype=bool)
+    for pattern in patterns:
+        pattern = pattern.strip().upper()
+        candidates = keys if '/' in pattern else names
+        selected |= np.array([fnmatch.fnmatchcase(str(value).upper(), pattern) for value in candidates],
+                             dtype=bool)
+    return programmes[selected]
+
+def sources_of(adjacency):
+    """Source de chaque relation d'une adjacence CSR (aligné sur indices)"""
+    return np.repeat(np.arange(len(adjacency.indptr) - 1), np.diff(adjacency.indptr))
+
+def analyze_graph(graph, entry_patterns=None):
+    """Cycles, atteignabilité et tables inutilisées d'un ArcadGraph
+
+    Points d'entrée: programmes correspondant à entry_patterns, à défaut les
+    programmes sans appelant (racines du graphe d'appels). Un programme est
+    atteignable s'il est un point d'entrée ou appelé (CALLS*) depuis l'un
+    d'eux; une table l'est si un programme atteignable l'utilise. Tarjan et
+    le parcours en largeur sont linéaires en nœuds + relations.
+    Retourne (programmes, tables, cycles) en DataFrames.
+    """
+    programmes = np.flatnonzero(graph.labels == PROGRAMME)
+    tables = np.flatnonzero(graph.labels == TABLE)
+    fan_out = np.diff(graph.calls.indptr)
+    fan_in = np.diff(graph.called_by.indptr)
+    tables_used = np.diff(graph.uses.indptr)
+    users = np.diff(graph.used_by.indptr)
+
+    # Cycles: composante de plus d'un programme ou appel récursif direct
+    component, count = strongly_connected_components(graph.calls, programmes)
+    sizes = np.bincount(component[programmes], minlength=count)
+    sources = sources_of(graph.calls)
+    cyclic = sizes > 1
+    cyclic[component[sources[sources == graph.calls.indices]]] = True
+
+    # Atteignabilité depuis les points d'entrée
+    entries = programmes[fan_in[programmes] == 0] if not entry_patterns \
+        else match_entry_points(graph, entry_patterns)
+    reachable = np.zeros(len(graph), dtype=bool)
+    reachable[entries] = True
+    if entries.size:
+        reachable[graph.callees_within(entries, None)] = True
+    entry = np.zeros(len(graph), dtype=bool)
+    entry[entries] = True
+    reached_by_users = np.zeros(len(graph), dtype=bool)
+    reached_by_users[graph.uses.indices[reachable[sources_of(graph.uses)]]] = True
+
+    names = np.array(graph.names, dtype=object)
+    libraries = np.array(graph.libraries, dtype=object)
+    df_programmes = pd.DataFrame({
+        'PGM_NAME': names[programmes],
+        'PGM_LIB': libraries[programmes],
+        'SCC_ID': component[programmes],
+        'SCC_SIZE': sizes[component[programmes]],
+        'IN_CYCLE': cyclic[component[programmes]],
+        'ENTRY_POINT': entry[programmes],
+        'REACHABLE': reachable[programmes],
+        'ISOLATED': (fan_in + fan_out + tables_used)[programmes] == 0,
+        'FAN_IN': fan_in[programmes],
+        'FAN_OUT': fan_out[programmes],
+        'TABLES_USED': tables_used[programmes],
+    })
+    df_tables = pd.DataFrame({
+        'TBL_NAME': names[tables],
+        'TBL_LIB': libraries[tables],
+        'USERS': users[tables],
+        'UNUSED': users[tables] == 0,
+        'REACHABLE': reached_by_users[tables],
+    })
+
+    cycle_programmes = df_programmes[df_programmes['IN_CYCLE']].sort_values(['SCC_ID', 'PGM_LIB', 'PGM_NAME'])
+    df_cycles = (cycle_programmes.assign(KEY=cycle_programmes['PGM_LIB'] + '/' + cycle_programmes['PGM_NAME'])
+                 .groupby('SCC_ID', sort=False)
+                 .agg(SCC_SIZE=('KEY', 'size'), REACHABLE=('REACHABLE', 'any'),
+                      PROGRAMMES=('KEY', CYCLE_MEMBERS_SEPARATOR.join))
+                 .reset_index()
+                 .sort_values(['SCC_SIZE', 'SCC_ID'], ascending=[False, True], ignore_index=True))
+    return df_programmes, df_tables, df_cycles
+
+def export_graph_analysis(frames, output_dir, entry_patterns=None, compression=None, metrics=None):
+    """Analyse le graphe des DataFrames préparés et écrit les trois CSV
+
+    frames: dict programmes / tables / xref (comme build_graph). Retourne
+    (programmes, tables, cycles).
+    """
+    start = time.perf_counter()
+    graph = build_graph(frames)
+    df_programmes, df_tables, df_cycles = analyze_graph(graph, entry_patterns)
+    outputs = []
+    for filename, df in [(PROGRAMMES_ANALYSIS_CSV, df_programmes), (TABLES_ANALYSIS_CSV, df_tables),
+                         (CYCLES_CSV, df_cycles)]:
+        path = csv_output_path(output_dir, filename, compression)
+        write_csv(df, path)
+        outputs.append(path)
+
+    print(f"✓ Analyse du graphe d'appels en {time.perf_counter() - start:.2f} s "
+          f"({len(graph.calls.indices):,} CALLS, {len(graph.uses.indices):,} USES)")
+    print(f"  Points d'entrée: {int(df_programmes['ENTRY_POINT'].sum()):,}"
+          f"{'' if entry_patterns else ' (programmes sans appelant)'}")
+    print(f"  Cycles d'appels: {len(df_cycles):,} "
+          f"({int(df_programmes['IN_CYCLE'].sum()):,} programmes, "
+          f"le plus grand: {int(df_cycles['SCC_SIZE'].max()) if len(df_cycles) else 0})")
+    print(f"  Programmes non atteignables: {int((~df_programmes['REACHABLE']).sum()):,} / {len(df_programmes):,}"
+          f", isolés: {int(df_programmes['ISOLATED'].sum()):,}")
+    print(f"  Tables inutilisées: {int(df_tables['UNUSED'].sum()):,} / {len(df_tables):,}"
+          f", non atteignables: {int((~df_tables['REACHABLE']).sum()):,}")
+    print(f"✓ Analyses sauvegardées: {', '.join(os.path.basename(path) for path in outputs)}")
+    if metrics is not None:
+        metrics.update({'rows_in': len(graph.calls.indices) + len(graph.uses.indices),
+                        'rows_out': len(df_programmes) + len(df_tables) + len(df_cycles), 'outputs': outputs})
+    return df_programmes, df_tables, df_cycles
+
+def main(argv=None):
+    """Fonction principale: analyses hors ligne sur les CSV de csv_neo4j"""
+    parser = argparse.ArgumentParser(description="Cycles d'appels, code mort et tables inutilisées des CSV ARCAD")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--entry-point", action="append", default=[],
+                        help="Point d'entrée NOM ou BIBLIOTHEQUE/NOM, jokers * ? acceptés (répétable; "
+                             "défaut: programmes sans appelant)")
+    parser.add_argument("--entry-points-file", help="Fichier de points d'entrée (un motif par ligne)")
+    parser.add_argument("--compress", choices=sorted(CSV_COMPRESSION_SUFFIXES), help="CSV compressés")
+    args = parser.parse_args(argv)
+
+    frames = read_prepared_csvs(args.csv_dir)
+    if frames['programmes'] is None or frames['xref'] is None:
+        print("✗ CSV Programmes/XREF manquants - lancez d'abord excel_github_to_csv.py")
+        return 1
+    patterns = args.entry_point + (load_entry_points(args.entry_points_file) if args.entry_points_file else [])
+    export_graph_analysis(frames, args.csv_dir, patterns, resolve_csv_compression(args.compress))
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
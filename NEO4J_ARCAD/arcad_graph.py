@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Graphe d'appels en mémoire - Patrimoine IBMi ARCAD
+Relations CALLS / USES en tableaux CSR NumPy pour les analyses d'impact
+et de dépendances (rapport §4.4) sans serveur Neo4j
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import OUTPUT_DIR
+from neo4j_loader import object_rows, read_prepared_csvs, xref_rows
+
+# Libellés des nœuds (valeurs du tableau ArcadGraph.labels)
+PROGRAMME = 0
+TABLE = 1
+LABEL_NAMES = {PROGRAMME: 'Programme', TABLE: 'Table'}
+
+# Profondeur par défaut des analyses d'impact ([:CALLS*1..2] du rapport)
+DEFAULT_HOPS = 2
+
+# Adjacence CSR: les voisins du nœud i sont indices[indptr[i]:indptr[i + 1]]
+# (triés), weights porte le nombre d'occurrences XREF de chaque relation
+Adjacency = namedtuple('Adjacency', ['indptr', 'indices', 'weights'])
+
+EMPTY_IDS = np.empty(0, dtype=np.int32)
+
+def build_adjacency(sources, targets, weights, size):
+    """Construit une adjacence CSR à partir de listes d'arêtes (identifiants entiers)"""
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=size), out=indptr[1:])
+    return Adjacency(indptr, targets[order].astype(np.int32), weights[order].astype(np.int64))
+
+def gather(adjacency, nodes):
+    """Concatène les voisins de plusieurs nœuds sans boucle Python"""
+    starts = adjacency.indptr[nodes]
+    counts = adjacency.indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return EMPTY_IDS
+    offsets = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(total)
+    return adjacency.indices[offsets]
+
+class NodeIndex:
+    """Correspondance identifiant entier <-> (libellé, bibliothèque, nom)"""
+
+    def __init__(self, labels, libraries, names):
+        self.labels = labels
+        self.libraries = libraries
+        self.names = names
+        self.ids = {(int(label), library, name): node
+                    for node, (label, library, name) in enumerate(zip(labels, libraries, names))}
+        by_name = {}
+        for node, (label, name) in enumerate(zip(labels, names)):
+            by_name.setdefault((int(label), name), []).append(node)
+        self.by_name = {key: np.array(nodes, dtype=np.int32) for key, nodes in by_name.items()}
+
+    def __len__(self):
+        return len(self.labels)
+
+    def find(self, name, library=None, label=PROGRAMME):
+        """Identifiants des nœuds d'un nom (toutes bibliothèques si library est None)"""
+        if library is not None:
+            node = self.ids.get((label, library, name))
+            return EMPTY_IDS if node is None else np.array([node], dtype=np.int32)
+        return self.by_name.get((label, name), EMPTY_IDS)
+
+    def key(self, node):
+        """(libellé, bibliothèque, nom) d'un identifiant"""
+        return LABEL_NAMES[int(self.labels[node])], self.libraries[node], self.names[node]
+
+    def describe(self, node):
+        """Représentation BIBLIOTHEQUE/NOM d'un identifiant"""
+        return f"{self.libraries[node]}/{self.names[node]}"
+
+class ArcadGraph(NodeIndex):
+    """Graphe Programme / Table interné en identifiants entiers
+
+    Chaque nœud (libellé, bibliothèque, nom) reçoit un identifiant; les
+    relations sont stockées en CSR dans les deux sens (calls / called_by,
+    uses / used_by). Les requêtes retournent des tableaux d'identifiants,
+    convertibles en clés par key() ou describe().
+    """
+
+    def __init__(self, labels, libraries, names, calls, uses):
+        super().__init__(labels, libraries, names)
+        size = len(labels)
+        self.calls = build_adjacency(*calls, size)
+        self.called_by = build_adjacency(calls[1], calls[0], calls[2], size)
+        self.uses = build_adjacency(*uses, size)
+        self.used_by = build_adjacency(uses[1], uses[0], uses[2], size)
+
+    # =========== Voisinage direct ===========
+
+    @staticmethod
+    def neighbors(adjacency, node):
+        """Voisins directs d'un nœud (vue sur le tableau CSR, sans copie)"""
+        return adjacency.indices[adjacency.indptr[node]:adjacency.indptr[node + 1]]
+
+    def callees(self, node):
+        """Programmes appelés directement par node"""
+        return self.neighbors(self.calls, node)
+
+    def callers(self, node):
+        """Programmes appelant directement node"""
+        return self.neighbors(self.called_by, node)
+
+    def tables_used(self, node):
+        """Tables utilisées directement par le programme node"""
+        return self.neighbors(self.uses, node)
+
+    def table_users(self, node):
+        """Programmes utilisant directement la table node"""
+        return self.neighbors(self.used_by, node)
+
+    # =========== Parcours ===========
+
+    def within(self, adjacency, nodes, hops):
+        """Nœuds atteints en 1 à hops sauts depuis nodes (équivalent de *1..hops)
+
+        Un nœud de départ n'est retourné que s'il est atteint par un cycle.
+        hops=None parcourt jusqu'à la fermeture transitive.
+        """
+        visited = np.zeros(len(self), dtype=bool)
+        frontier = np.atleast_1d(np.asarray(nodes, dtype=np.int64))
+        depth = 0
+        while frontier.size and (hops is None or depth < hops):
+            reached = gather(adjacency, frontier)
+            frontier = np.unique(reached[~visited[reached]])
+            visited[frontier] = True
+            depth += 1
+        return np.flatnonzero(visited).astype(np.int32)
+
+    def callers_within(self, nodes, hops=DEFAULT_HOPS):
+        """Appelants directs et indirects jusqu'à hops niveaux"""
+        return self.within(self.called_by, nodes, hops)
+
+    def callees_within(self, nodes, hops=DEFAULT_HOPS):
+        """Programmes appelés directement et indirectement jusqu'à hops niveaux"""
+        return self.within(self.calls, nodes, hops)
+
+    def table_impact(self, table_nodes, hops=DEFAULT_HOPS):
+        """Impact d'une table: {programme utilisateur: appelants sur hops niveaux}"""
+        users = np.unique(gather(self.used_by, np.atleast_1d(table_nodes)))
+        return {int(user): self.callers_within(user, hops) for user in users}
+
+    def call_path(self, start, end):
+        """Plus court chemin d'appels de start vers end (liste d'identifiants, None si aucun)"""
+        parents = np.full(len(self), -1, dtype=np.int64)
+        parents[start] = start
+        frontier = np.array([start], dtype=np.int64)
+        while frontier.size and parents[end] < 0:
+            counts = self.calls.indptr[frontier + 1] - self.calls.indptr[frontier]
+            reached = gather(self.calls, frontier)
+            origins = np.repeat(frontier, counts)
+            new = parents[reached] < 0
+            reached, origins = reached[new], origins[new]
+            # Premier parent rencontré pour chaque nœud (ordre BFS)
+            reached, first = np.unique(reached, return_index=True)
+            parents[reached] = origins[first]
+            frontier = reached.astype(np.int64)
+        if parents[end] < 0:
+            return None
+        path = [int(end)]
+        while path[-1] != start:
+            path.append(int(parents[path[-1]]))
+        return path[::-1]
+
+def edge_arrays(rows, callers, targets):
+    """Arêtes (source, cible, occurrences) d'une liste de lignes xref_rows
+
+    Mêmes règles que la phase 10 du chargement: appelant par (bibliothèque,
+    nom), cible par nom seul (par bibliothèque et nom sur des XREF résolues),
+    une relation par couple (dernière ligne gagnante).
+    """
+    edges = pd.DataFrame(rows, columns=['fromObj', 'fromLib', 'toObj', 'toLib', 'occurrences'])
+    edges = edges.merge(callers, left_on=['fromLib', 'fromObj'], right_on=['library', 'name'])
+    target_keys = ['toLib', 'toObj'] if edges['toLib'].notna().any() else ['toObj']
+    edges = edges[['id', 'toObj', 'toLib', 'occurrences']].merge(
+        targets, left_on=target_keys, right_on=['library', 'name'][-len(target_keys):],
+        suffixes=('_start', '_end'))
+    edges = edges.drop_duplicates(subset=['id_start', 'id_end'], keep='last')
+    return (edges['id_start'].to_numpy(np.int64), edges['id_end'].to_numpy(np.int64),
+            edges['occurrences'].to_numpy(np.int64))
+
+def build_graph(frames):
+    """Construit un ArcadGraph à partir des DataFrames préparés
+
+    frames: dict avec les clés programmes, tables, xref (DataFrames issus de
+    excel_github_to_csv ou de read_prepared_csvs, None si indisponible).
+    """
+    nodes = []
+    for label, rows in [(PROGRAMME, object_rows(frames.get('programmes'), '*PGM')),
+                        (TABLE, object_rows(frames.get('tables'), '*FILE', ['PF', 'TABLE']))]:
+        df = pd.DataFrame(rows, columns=['name', 'library'])
+        nodes.append(df.assign(label=label))
+    nodes = pd.concat(nodes, ignore_index=True)
+    nodes['id'] = np.arange(len(nodes))
+
+    programmes = nodes[nodes['label'] == PROGRAMME]
+    tables = nodes[nodes['label'] == TABLE]
+    calls = edge_arrays(xref_rows(frames.get('xref'), '*PGM'), programmes, programmes)
+    uses = edge_arrays(xref_rows(frames.get('xref'), '*FILE'), programmes, tables)
+
+    return ArcadGraph(nodes['label'].to_numpy(np.int8), nodes['library'].tolist(),
+                      nodes['name'].tolist(), calls, uses)
+
+def print_table_impact(graph, name, hops):
+    """Analyse d'impact d'une table (rapport §4.4, première requête)"""
+    tables = graph.find(name, label=TABLE)
+    if not tables.size:
+        print(f"✗ Table {name} introuvable")
+        return False
+    start = time.perf_counter()
+    impact = graph.table_impact(tables, hops)
+    duration = time.perf_counter() - start
+    print(f"\n=== IMPACT DE LA TABLE {name} ({len(impact)} programmes, {duration * 1e6:,.0f} µs) ===")
+    for user, callers in sorted(impact.items(), key=lambda item: -len(item[1])):
+        print(f"  {graph.describe(user)}: {len(callers)} appelants indirects")
+        for caller in callers:
+            print(f"    <- {graph.describe(caller)}")
+    return True
+
+def print_program_dependencies(graph, name, hops):
+    """Dépendances d'un programme (rapport §4.4, deuxième requête)"""
+    programmes = graph.find(name)
+    if not programmes.size:
+        print(f"✗ Programme {name} introuvable")
+        return False
+    for programme in programmes:
+        start = time.perf_counter()
+        callees = graph.callees_within(programme, hops)
+        callers = graph.callers_within(programme, hops)
+        duration = time.perf_counter() - start
+        print(f"\n=== DÉPENDANCES DE {graph.describe(programme)} ({duration * 1e6:,.0f} µs) ===")
+        print(f"Programmes appelés (1..{hops}): {len(callees)}")
+        for callee in callees:
+            print(f"  -> {graph.describe(callee)}")
+        print(f"Programmes appelants (1..{hops}): {len(callers)}")
+        for caller in callers:
+            print(f"  <- {graph.describe(caller)}")
+        tables = graph.tables_used(programme)
+        print(f"Tables utilisées: {len(tables)}")
+        for table in tables:
+            print(f"  - {graph.describe(table)}")
+    return True
+
+def print_call_path(graph, source, target):
+    """Plus court chemin d'appels entre deux programmes (rapport §4.4, dernière requête)"""
+    for start in graph.find(source):
+        for end in graph.find(target):
+            path = graph.call_path(int(start), int(end))
+            if path:
+                print(" -> ".join(graph.describe(node) for node in path))
+                return True
+    print(f"✗ Aucun chemin d'appels de {source} vers {target}")
+    return False
+
+def main(argv=None):
+    """Fonction principale: analyses d'impact sur les CSV de csv_neo4j"""
+    parser = argparse.ArgumentParser(description="Analyses d'impact ARCAD sur graphe en mémoire")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--hops", type=int, default=DEFAULT_HOPS,
+                        help=f"Profondeur des appels indirects (défaut: {DEFAULT_HOPS})")
+    parser.add_argument("--table", action="append", default=[],
+                        help="Analyse d'impact d'une table (répétable)")
+    parser.add_argument("--program", action="append", default=[],
+                        help="Dépendances d'un programme (répétable)")
+    parser.add_argument("--path", nargs=2, metavar=("PROGRAMME_A", "PROGRAMME_B"),
+                        help="Plus court chemin d'appels de A vers B")
+    args = parser.parse_args(argv)
+
+    frames = read_prepared_csvs(args.csv_dir)
+    if frames['programmes'] is None or frames['xref'] is None:
+        print("✗ CSV Programmes/XREF manquants - lancez d'abord excel_github_to_csv.py")
+        return 1
+
+    start = time.perf_counter()
+    graph = build_graph(frames)
+    print(f"✓ Graphe construit en {time.perf_counter() - start:.2f} s: {len(graph):,} nœuds, "
+          f"{len(graph.calls.indices):,} CALLS, {len(graph.uses.indices):,} USES")
+
+    ok = True
+    for name in args.table:
+        ok &= print_table_impact(graph, name, args.hops)
+    for name in args.program:
+        ok &= print_program_dependencies(graph, name, args.hops)
+    if args.path:
+        ok &= print_call_path(graph, *args.path)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Contrôle d'intégrité référentielle - Patrimoine IBMi ARCAD
+Anti-jointures vectorisées (clés hachées) entre XREF, objets et sources avant
+le chargement: les XREF CALLS/USES dont une extrémité n'est pas un objet
+préparé sont écartées dans un CSV *_rejects avec un code motif, les sources
+sans objet généré y sont signalées
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import (CSV_COMPRESSION_SUFFIXES, CSV_DATETIME_FORMAT, OUTPUT_DIR, csv_output_path,
+                                 find_csv_file, write_csv)
+from neo4j_loader import SOURCE_TYPES, text_values, xref_resolved
+
+# CSV contrôlés et CSV des rejets
+XREF_CSV = 'IBMi_RefArcaddesXREF.csv'
+XREF_REJECTS_CSV = 'IBMi_RefArcaddesXREF_rejects.csv'
+SOURCES_REJECTS_CSV = 'IBMi_RefArcaddesSources_rejects.csv'
+
+# Colonne du code motif dans les CSV de rejets
+REJECT_REASON_COLUMN = 'REJECT_REASON'
+
+# Codes motifs: extrémité non résolue (--resolve-libraries), programme appelant
+# absent des Programmes, cible absente des Programmes / Tables, source sans
+# objet généré (GENERATES: même nom et type de source = attribut de l'objet)
+REJECT_UNRESOLVED = 'UNRESOLVED'
+REJECT_MISSING_FROM = 'MISSING_FROM'
+REJECT_MISSING_TO = 'MISSING_TO'
+REJECT_NO_OBJECT = 'NO_OBJECT'
+REJECT_REASONS = [REJECT_UNRESOLVED, REJECT_MISSING_FROM, REJECT_MISSING_TO, REJECT_NO_OBJECT]
+
+# Relations contrôlées: type de la cible OXR_TO_TYPE -> (type, attributs) des objets cibles
+XREF_TARGETS = {
+    '*PGM': ('*PGM', None),
+    '*FILE': ('*FILE', ['PF', 'TABLE']),
+}
+
+def hash_keys(*columns):
+    """Clé hachée (uint64) de colonnes texte alignées"""
+    return pd.util.hash_pandas_object(pd.DataFrame({i: column.to_numpy() for i, column in enumerate(columns)}),
+                                      index=False).to_numpy()
+
+def contains(keys, known):
+    """Anti-jointure: vrai pour les clés présentes dans known (table de hachage)"""
+    return pd.Series(keys).isin(known).to_numpy()
+
+def object_mask(df, object_type, attributes=None):
+    """Objets chargés comme nœuds (phases 5 et 6), mêmes règles que object_rows"""
+    mask = ((text_values(df, 'LST_CELTTY') == 'O')
+            & (text_values(df, 'LST_CTYPE') == object_type)
+            & (text_values(df, 'LST_JOBJ') != '')
+            & (text_values(df, 'LST_JLIB') != ''))
+    if attributes:
+        mask &= text_values(df, 'LST_CATR').isin(attributes)
+    return mask
+
+def object_keys(df, object_type, attributes=None):
+    """Clés hachées (bibliothèque, nom) et (nom) des objets d'un type"""
+    if df is None or df.empty:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.uint64)
+    df = df[object_mask(df, object_type, attributes)]
+    names, libraries = text_values(df, 'LST_JOBJ'), text_values(df, 'LST_JLIB')
+    return np.unique(hash_keys(libraries, names)), np.unique(hash_keys(names))
+
+def xref_reasons(df_xref, df_programmes, df_tables):
+    """Code motif de rejet de chaque ligne XREF ('' si la ligne est chargeable)
+
+    Seules les lignes des phases 10.1 / 10.2 (*PGM -> *PGM ou *FILE) sont
+    contrôlées, avec les clés de correspondance du chargement: appelant par
+    (bibliothèque, nom), cible par nom seul, ou par (bibliothèque résolue,
+    nom) sur des XREF résolues.
+    """
+    resolved = xref_resolved(df_xref)
+    from_lib = text_values(df_xref, 'OXR_FROM_RLIB' if resolved else 'OXR_FROM_LIB')
+    from_obj, to_obj = text_values(df_xref, 'OXR_FROM_OBJ'), text_values(df_xref, 'OXR_TO_OBJ')
+    from_type, to_type = text_values(df_xref, 'OXR_FROM_TYPE'), text_values(df_xref, 'OXR_TO_TYPE')
+    to_lib = text_values(df_xref, 'OXR_TO_RLIB') if resolved else None
+
+    programmes_by_key, _ = object_keys(df_programmes, '*PGM')
+    checked = (from_type == '*PGM').to_numpy() & to_type.isin(list(XREF_TARGETS)).to_numpy()
+    checked &= (from_obj != '').to_numpy() & (to_obj != '').to_numpy()
+    unresolved = np.zeros(len(df_xref), dtype=bool)
+    if resolved:
+        unresolved = checked & ((from_lib == '').to_numpy() | (to_lib == '').to_numpy())
+    missing_from = checked & ~contains(hash_keys(from_lib, from_obj), programmes_by_key)
+
+    missing_to = np.zeros(len(df_xref), dtype=bool)
+    for target_type, (object_type, attributes) in XREF_TARGETS.items():
+        frame = df_programmes if object_type == '*PGM' else df_tables
+        by_key, by_name = object_keys(frame, object_type, attributes)
+        rows = checked & (to_type == target_type).to_numpy()
+        keys = hash_keys(to_lib, to_obj) if resolved else hash_keys(to_obj)
+        missing_to |= rows & ~contains(keys, by_key if resolved else by_name)
+
+    return np.select([unresolved, missing_from, missing_to],
+                     [REJECT_UNRESOLVED, REJECT_MISSING_FROM, REJECT_MISSING_TO], '').astype(object)
+
+def source_reasons(df_sources, df_programmes, df_tables):
+    """Code motif des sources chargées (phase 4) sans objet généré (phase 8)"""
+    loaded = ((text_values(df_sources, 'LST_CELTTY') == 'M')
+              & text_values(df_sources, 'LST_CTYPE').isin(SOURCE_TYPES)
+              & (text_values(df_sources, 'LST_JOBJ') != '')
+              & (text_values(df_sources, 'LST_JLIB') != '')).to_numpy()
+    generated = []
+    for frame, object_type, attributes in [(df_programmes, '*PGM', None), (df_tables, '*FILE', ['PF', 'TABLE'])]:
+        if frame is not None and not frame.empty:
+            frame = frame[object_mask(frame, object_type, attributes)]
+            generated.append(hash_keys(text_values(frame, 'LST_JOBJ'), text_values(frame, 'LST_CATR')))
+    known = np.unique(np.concatenate(generated)) if generated else np.empty(0, dtype=np.uint64)
+    keys = hash_keys(text_values(df_sources, 'LST_JOBJ'), text_values(df_sources, 'LST_CTYPE'))
+    return np.where(loaded & ~contains(keys, known), REJECT_NO_OBJECT, '').astype(object)
+
+def describe_rejects(reasons):
+    """Résumé 'MOTIF: n, ...' des codes motifs non vides"""
+    counts = pd.Series(reasons[reasons != '']).value_counts()
+    return ', '.join(f"{reason}: {count:,}" for reason, count in counts.items()) or 'aucun'
+
+def validate_references(df_xref, df_sources, df_programmes, df_tables, output_dir=None, compression=None,
+                        metrics=None):
+    """Contrôle les XREF et les sources; retourne les XREF sans lignes rejetées
+
+    Avec output_dir, réécrit le CSV des XREF sans les lignes rejetées et écrit
+    XREF_REJECTS_CSV et SOURCES_REJECTS_CSV (colonne REJECT_REASON). Les
+    sources restent dans leur CSV (nœuds Source chargés); leur CSV de rejets
+    liste celles pour lesquelles GENERATES ne trouvera aucun objet.
+    metrics (dict) reçoit rows_in, rows_out, rejects et outputs.
+    """
+    if df_xref is None:
+        return None
+    xref = xref_reasons(df_xref, df_programmes, df_tables)
+    rejected = xref != ''
+    df_valid = df_xref[~rejected]
+    df_rejects = df_xref[rejected].assign(**{REJECT_REASON_COLUMN: xref[rejected]})
+    print(f"✓ Intégrité XREF: {len(df_valid):,} lignes conservées, {int(rejected.sum()):,} rejetées "
+          f"({describe_rejects(xref)})")
+
+    df_source_rejects = None
+    if df_sources is not None:
+        sources = source_reasons(df_sources, df_programmes, df_tables)
+        df_source_rejects = df_sources[sources != ''].assign(**{REJECT_REASON_COLUMN: sources[sources != '']})
+        print(f"✓ Intégrité sources: {len(df_source_rejects):,} sources sans objet généré "
+              f"({describe_rejects(sources)})")
+
+    outputs = []
+    if output_dir:
+        for filename, df in ((XREF_CSV, df_valid), (XREF_REJECTS_CSV, df_rejects),
+                             (SOURCES_REJECTS_CSV, df_source_rejects)):
+            if df is None:
+                continue
+            output_file = csv_output_path(output_dir, filename, compression)
+            write_csv(df, output_file, date_format=CSV_DATETIME_FORMAT)
+            outputs.append(output_file)
+            print(f"✓ {filename} sauvegardé: {len(df)} lignes -> {output_file}")
+    if metrics is not None:
+        rejects = {'xref': pd.Series(xref[rejected]).value_counts().to_dict()}
+        if df_source_rejects is not None:
+            rejects['sources'] = df_source_rejects[REJECT_REASON_COLUMN].value_counts().to_dict()
+        metrics.update({'rows_in': len(df_xref), 'rows_out': len(df_valid), 'rejects': rejects,
+                        'outputs': outputs})
+    return df_valid
+
+def main(argv=None):
+    """Fonction principale: contrôle l'intégrité des CSV préparés"""
+    parser = argparse.ArgumentParser(description="Contrôle d'intégrité XREF / objets / sources des CSV ARCAD")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    args = parser.parse_args(argv)
+
+    from neo4j_loader import read_prepared_csvs
+    frames = read_prepared_csvs(args.csv_dir)
+    if frames['xref'] is None or frames['programmes'] is None:
+        print("✗ CSV Programmes/XREF manquants - lancez d'abord excel_github_to_csv.py")
+        return 1
+    # Réécriture au format (compressé ou non) du CSV des XREF existant
+    path = find_csv_file(args.csv_dir, XREF_CSV)
+    compression = next((name for name, suffix in CSV_COMPRESSION_SUFFIXES.items() if path.endswith(suffix)), None)
+    start = time.perf_counter()
+    validate_references(frames['xref'], frames['sources'], frames['programmes'], frames['tables'], args.csv_dir,
+                        compression)
+    print(f"✓ Contrôle terminé en {time.perf_counter() - start:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,631 @@
+#!/usr/bin/env python3
+"""
+Pipeline incrémental - Patrimoine IBMi ARCAD
+Exprime la génération des CSV comme un graphe d'étapes (récupération,
+nettoyage, filtrage, partition, métadonnées, rapport, export): chaque étape
+déclare ses entrées et son empreinte (entrées + configuration); les étapes
+à jour sont ignorées et les étapes indépendantes s'exécutent en parallèle
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from excel_github_to_csv import (CACHE_DIR, COLUMN_SCHEMA, CSV_COMPRESSION_SUFFIXES, CSV_DATETIME_FORMAT,
+                                 EXCEL_FILES, EXTRACTS_DIR, FICHIERS_SOURCES_TABLES, GITHUB_BASE_URL,
+                                 METADATA_COLUMNS, OBJETS_CSV, OBJETS_SPLITS, OUTPUT_DIR, PARQUET_AVAILABLE,
+                                 PARSED_CACHE_VERSION, PROFILE_COLUMNS, PROGRAMMES_CSV, REPORT_FILE,
+                                 REPORT_JSON_FILE, REPORT_TOP_APPLICATIONS, REPORT_TOP_ATTRIBUTES,
+                                 REPORT_TOP_DEGREES, STREAMING_CHUNK_SIZE, TABLES_CSV, TYPES_PROGRAMMES,
+                                 XREF_EXTRACT_FILES, XREF_RELATION_COLUMNS, PartitionedCsvWriter,
+                                 aggregate_xref, concat_frames, create_metadata_csvs, csv_output_path,
+                                 fetch_excel_bytes, filter_objets, filter_sources, filter_xref,
+                                 find_csv_file, generate_statistics_report, iter_clean_chunks, profile_columns,
+                                 load_clean_dataframe, load_xref_nbrelation, measure_phase,
+                                 resolve_csv_compression, split_objets, write_csv, write_run_metrics)
+from arcad_integrity import REJECT_REASONS, validate_references
+from arcad_resolution import LIBRARY_LIST_MARKERS, load_library_map, resolve_xref
+from ibmi_extracts import (DEAD_PROGRAM_DAYS, EXTRACT_SPECS, EXTRACTS_ENCODING, IO_HOT_QUANTILE,
+                           LIBRARY_ALIASES, USAGE_EXTRACTS, export_extracts, extract_path, load_usage_index)
+
+# Version du pipeline: à incrémenter si le code d'une étape change son résultat
+# (les empreintes ne couvrent que les entrées et la configuration déclarée)
+PIPELINE_VERSION = 1
+
+# État des étapes (empreintes, artefacts, fichiers produits), dans le répertoire des CSV
+PIPELINE_STATE_FILE = "pipeline_state.json"
+
+# Artefacts Parquet des étapes, dans le répertoire du cache
+STAGES_CACHE_SUBDIR = "stages"
+
+# Étape du graphe: inputs nomme les étapes amont, function(context, record, *valeurs)
+# retourne la valeur de l'étape (None, DataFrame ou dict de DataFrames) et
+# renseigne record['outputs'] avec les fichiers écrits. Une étape volatile
+# (récupération des classeurs) s'exécute toujours: son empreinte est celle
+# de sa valeur.
+Stage = namedtuple('Stage', ['name', 'inputs', 'function', 'config', 'volatile'])
+
+def fingerprint(data):
+    """Empreinte SHA-256 d'une structure JSON (clés triées)"""
+    text = json.dumps(data, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def file_sha256(path):
+    """Empreinte SHA-256 d'un fichier (None s'il est absent)"""
+    if not path or not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def stage_fingerprint(stage, input_fingerprints):
+    """Empreinte d'une étape: nom, configuration, empreintes des entrées et version"""
+    return fingerprint({
+        'stage': stage.name,
+        'version': PIPELINE_VERSION,
+        'config': stage.config,
+        'inputs': input_fingerprints,
+    })
+
+def file_signature(path):
+    """Signature d'un fichier produit: [taille, mtime en ns] (None s'il est absent)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+# =========== État et artefacts ===========
+
+def load_pipeline_state(output_dir):
+    """Charge l'état des étapes de l'exécution précédente ({} si absent ou illisible)"""
+    state_file = os.path.join(output_dir, PIPELINE_STATE_FILE)
+    if not os.path.exists(state_file):
+        return {}
+    try:
+        with open(state_file, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        print("⚠️ État du pipeline illisible - toutes les étapes seront exécutées")
+        return {}
+    if state.get('version') != PIPELINE_VERSION:
+        return {}
+    return state.get('stages', {})
+
+def save_pipeline_state(output_dir, stages):
+    """Enregistre l'état des étapes (écriture atomique)"""
+    state_file = os.path.join(output_dir, PIPELINE_STATE_FILE)
+    tmp_file = state_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump({'version': PIPELINE_VERSION, 'saved_at': datetime.now().isoformat(timespec='seconds'),
+                   'stages': stages}, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, state_file)
+
+def save_artifacts(stages_dir, name, stage_fp, value):
+    """Écrit la valeur d'une étape en Parquet; retourne {clé: fichier} ('' = DataFrame seul)
+
+    Les artefacts des empreintes précédentes de l'étape sont supprimés.
+    """
+    frames = {'': value} if isinstance(value, pd.DataFrame) else (value or {})
+    files = {}
+    for key, df in frames.items():
+        suffix = f"-{key}" if key else ""
+        path = os.path.join(stages_dir, f"{name}-{stage_fp[:16]}{suffix}.parquet")
+        tmp_file = f"{path}.tmp-{os.getpid()}"
+        df.to_parquet(tmp_file, index=False)
+        os.replace(tmp_file, path)
+        files[key] = path
+
+    kept = set(files.values())
+    for filename in os.listdir(stages_dir):
+        path = os.path.join(stages_dir, filename)
+        if filename.startswith(f"{name}-") and filename.endswith('.parquet') and path not in kept:
+            os.remove(path)
+    return files
+
+def load_artifacts(files):
+    """Relit la valeur d'une étape écrite par save_artifacts"""
+    if not files:
+        return None
+    if '' in files:
+        return pd.read_parquet(files[''])
+    return {key: pd.read_parquet(path) for key, path in files.items()}
+
+class StageResult:
+    """Résultat d'une étape: empreinte et valeur, relue depuis Parquet à la demande
+
+    Une étape ignorée ne charge sa valeur que si une étape aval doit
+    s'exécuter (ou si l'appelant demande les DataFrames).
+    """
+
+    def __init__(self, stage_fp, value=None, artifacts=None, failed=False):
+        self.fingerprint = stage_fp
+        self.value = value
+        self.artifacts = artifacts
+        self.failed = failed
+        self.lock = threading.Lock()
+
+    def get(self):
+        with self.lock:
+            if self.artifacts is not None:
+                self.value = load_artifacts(self.artifacts)
+                self.artifacts = None
+            return self.value
+
+# =========== Étapes ===========
+
+def clean_workbook(content, chunk_size=None, schema=None):
+    """Analyse et nettoie un classeur (processus de travail: étape CPU)
+
+    L'analyse et le nettoyage forment une seule étape: les DataFrames bruts
+    de pd.read_excel mêlent les types dans une colonne et ne passent pas en
+    Parquet. En streaming, les blocs nettoyés sont concaténés.
+    """
+    excel_data = pd.ExcelFile(io.BytesIO(content))
+    if chunk_size:
+        return concat_frames(list(iter_clean_chunks(excel_data, chunk_size, schema=schema)), ignore_index=True)
+    return load_clean_dataframe(excel_data, schema=schema)
+
+def run_fetch(context, record, kind):
+    """Récupère un classeur (None s'il est inaccessible)"""
+    filename = EXCEL_FILES[kind]
+    try:
+        content, sha256, origin = fetch_excel_bytes(filename, **context['fetch_options'])
+    except Exception as e:
+        print(f"✗ Erreur lors de la récupération de {filename}: {str(e)}")
+        return None
+    print(f"✓ {filename} récupéré ({len(content)} bytes, {origin}, sha256 {sha256[:12]})")
+    record['bytes_read'] = len(content)
+    return content
+
+def run_clean(context, record, kind, content):
+    """Nettoie un classeur dans le pool de processus"""
+    if content is None:
+        return None
+    schema = context['schemas'][kind]
+    df = context['cpu_pool'].submit(clean_workbook, content, context['chunk_size'], schema).result()
+    print(f"✓ Classeur {kind} nettoyé: {len(df)} lignes")
+    record['rows_in'] = record['rows_out'] = len(df)
+    return df
+
+def run_filter(context, record, kind, df):
+    """Filtre un classeur nettoyé (XREF: regroupées ensuite en relations pondérées)"""
+    if df is None:
+        return None
+    record['rows_in'] = len(df)
+    if kind == 'sources':
+        if 'LST_CELTTY' not in df.columns:
+            print("⚠️ Colonne LST_CELTTY non trouvée - conservation de toutes les lignes")
+        df = filter_sources(df)
+    elif kind == 'objets':
+        if 'LST_CELTTY' not in df.columns:
+            print("⚠️ Colonne LST_CELTTY non trouvée - conservation de toutes les lignes")
+        df = filter_objets(df)
+    else:
+        if not all(col in df.columns for col in ['OXR_FROM_TYPE', 'OXR_TO_TYPE']):
+            print("⚠️ Colonnes OXR_FROM_TYPE ou OXR_TO_TYPE non trouvées - conservation de toutes les lignes")
+        filtered = filter_xref(df)
+        df = aggregate_xref(filtered, load_xref_nbrelation(context['extracts_dir']))
+        duplicates = len(filtered) - len(df)
+        print(f"XREF regroupées: {len(df)} relations ({duplicates} doublons)")
+    print(f"✓ {kind.capitalize()} filtrés: {len(df)} lignes")
+    record['rows_out'] = len(df)
+    return df
+
+def run_enrich(context, record, df_objets):
+    """Enrichit les objets filtrés des statistiques d'utilisation IBMi"""
+    if df_objets is None:
+        return None
+    usage = load_usage_index(context['extracts_dir'], context['extracts_encoding'])
+    record['rows_in'] = record['rows_out'] = len(df_objets)
+    if usage is None:
+        return df_objets
+    df_objets = usage.enrich(df_objets)
+    print(f"✓ Enrichissement: {usage.describe(df_objets)}")
+    return df_objets
+
+def run_split(context, record, df_objets):
+    """Sépare les programmes et les tables des objets filtrés"""
+    if df_objets is None:
+        return None
+    df_programmes, df_tables = split_objets(df_objets)
+    record['rows_in'] = len(df_objets)
+    record['rows_out'] = len(df_programmes) + len(df_tables)
+    print(f"✓ Partitions: {len(df_programmes)} programmes, {len(df_tables)} tables")
+    return {'programmes': df_programmes, 'tables': df_tables}
+
+def run_export(context, record, filename, df):
+    """Écrit le CSV d'un DataFrame filtré"""
+    if df is None:
+        return None
+    output_file = csv_output_path(context['output_dir'], filename, context['compression'])
+    write_csv(df, output_file, date_format=CSV_DATETIME_FORMAT)
+    print(f"✓ {filename} sauvegardé: {len(df)} lignes -> {output_file}")
+    record['rows_out'] = len(df)
+    record['outputs'] = [output_file]
+    return None
+
+def run_export_objets(context, record, df_objets, partitions):
+    """Écrit le CSV des objets et de leurs partitions (programmes, tables)"""
+    if df_objets is None:
+        return None
+    frames = {OBJETS_CSV: df_objets, PROGRAMMES_CSV: partitions['programmes'], TABLES_CSV: partitions['tables']}
+    outputs = []
+    with PartitionedCsvWriter() as writer:
+        for filename, df in frames.items():
+            if filename != OBJETS_CSV and df.empty and not len(df.columns):
+                # Partition impossible (colonnes de critère absentes)
+                continue
+            output_file = csv_output_path(context['output_dir'], filename, context['compression'])
+            writer.write(df, {output_file: None})
+            outputs.append(output_file)
+            print(f"✓ {filename} sauvegardé: {len(df)} lignes -> {output_file}")
+    record['rows_out'] = len(df_objets)
+    record['outputs'] = outputs
+    return None
+
+def run_profile(context, record, df_objets):
+    """Profils (valeur, effectif) des colonnes de métadonnées, partagés par les métadonnées et le rapport"""
+    if df_objets is None:
+        return None
+    record['rows_in'] = len(df_objets)
+    return profile_columns(df_objets, PROFILE_COLUMNS)
+
+def run_metadata(context, record, df_objets, profiles):
+    """Écrit les CSV de métadonnées des objets"""
+    if df_objets is None:
+        return None
+    record['rows_in'] = len(df_objets)
+    create_metadata_csvs(context['output_dir'], df_objets, context['compression'], profiles)
+    record['outputs'] = [path for path in (find_csv_file(context['output_dir'], filename)
+                                           for filename in METADATA_COLUMNS) if path]
+    return None
+
+def run_report(context, record, df_sources, df_objets, df_xref, profiles):
+    """Écrit le rapport de statistiques (texte et JSON)"""
+    if df_sources is None and df_objets is None and df_xref is None:
+        return None
+    record['rows_in'] = sum(len(df) for df in (df_sources, df_objets, df_xref) if df is not None)
+    generate_statistics_report(df_sources, df_objets, df_xref, context['output_dir'],
+                               profiles=profiles, **context['report_options'])
+    record['outputs'] = [os.path.join(context['output_dir'], REPORT_FILE),
+                         os.path.join(context['output_dir'], REPORT_JSON_FILE)]
+    return None
+
+def run_resolve(context, record, df_xref, partitions, write_xref=True):
+    """Résout les bibliothèques des XREF; écrit le CSV des XREF (sauf write_xref=False) et celui des non résolues"""
+    if df_xref is None:
+        return None
+    partitions = partitions or {}
+    return resolve_xref(df_xref, partitions.get('programmes'), partitions.get('tables'),
+                        context['output_dir'], context['compression'], context['library_map'], record, write_xref)
+
+def run_validate(context, record, df_xref, partitions, df_sources):
+    """Contrôle l'intégrité référentielle; écrit le CSV des XREF conservées et les CSV de rejets"""
+    if df_xref is None:
+        return None
+    partitions = partitions or {}
+    return validate_references(df_xref, df_sources, partitions.get('programmes'), partitions.get('tables'),
+                               context['output_dir'], context['compression'], record)
+
+def run_export_extracts(context, record):
+    """Prépare les extraits IBMi délimités par '#' en CSV UTF-8"""
+    export_extracts(context['extracts_dir'], context['output_dir'], encoding=context['extracts_encoding'],
+                    compression=context['compression'], metrics=record)
+    return None
+
+def build_stages(chunk_size=None, schemas=None, compression=None, extracts_dir=EXTRACTS_DIR,
+                 report_options=None, extracts=False, extracts_encoding=EXTRACTS_ENCODING, enrich=False,
+                 resolve=False, library_map=None, validate=False):
+    """Construit le graphe des étapes, dans un ordre topologique
+
+    La configuration de chaque étape entre dans son empreinte: modifier une
+    option ne réexécute que les étapes qui en dépendent (et leur aval).
+    Avec extracts, l'étape export_extracts prépare les extraits IBMi; avec
+    enrich, l'étape enrich_objets s'intercale entre le filtrage des objets
+    et leurs consommateurs; avec resolve, l'étape resolve_xref remplace
+    export_xref (XREF résolues et non résolues); avec validate, l'étape
+    validate_xref écrit le CSV des XREF sans les lignes rejetées.
+    """
+    schemas = schemas or {kind: None for kind in EXCEL_FILES}
+    xref_extract_hashes = {filename: file_sha256(os.path.join(extracts_dir, filename) if extracts_dir else None)
+                           for filename in XREF_EXTRACT_FILES}
+    stages = []
+    for kind in EXCEL_FILES:
+        stages.append(Stage(f"fetch_{kind}", [], lambda context, record, kind=kind: run_fetch(context, record, kind),
+                            {}, True))
+        stages.append(Stage(f"clean_{kind}", [f"fetch_{kind}"],
+                            lambda context, record, content, kind=kind: run_clean(context, record, kind, content),
+                            {'parsed_cache_version': PARSED_CACHE_VERSION, 'chunk_size': chunk_size,
+                             'schema': schemas[kind]}, False))
+    filter_config = {
+        'sources': {'types_programmes': TYPES_PROGRAMMES, 'fichiers_sources_tables': FICHIERS_SOURCES_TABLES},
+        'objets': {},
+        'xref': {'relation_columns': XREF_RELATION_COLUMNS, 'extracts': xref_extract_hashes},
+    }
+    for kind in EXCEL_FILES:
+        stages.append(Stage(f"filter_{kind}", [f"clean_{kind}"],
+                            lambda context, record, df, kind=kind: run_filter(context, record, kind, df),
+                            filter_config[kind], False))
+    objets = 'filter_objets'
+    if enrich:
+        objets = 'enrich_objets'
+        stages.append(Stage(objets, ['filter_objets'], run_enrich, {
+            'extracts': {EXTRACT_SPECS[kind]['file']: file_sha256(extract_path(kind, extracts_dir))
+                         for kind in USAGE_EXTRACTS},
+            'encoding': extracts_encoding, 'aliases': LIBRARY_ALIASES,
+            'io_hot_quantile': IO_HOT_QUANTILE, 'dead_program_days': DEAD_PROGRAM_DAYS,
+        }, False))
+    stages.extend([
+        Stage('split_objets', [objets], run_split, {'splits': OBJETS_SPLITS}, False),
+        Stage('profile_objets', [objets], run_profile, {'columns': PROFILE_COLUMNS}, False),
+        Stage('metadata', [objets, 'profile_objets'], run_metadata,
+              {'columns': METADATA_COLUMNS, 'compression': compression}, False),
+        Stage('export_sources', ['filter_sources'],
+              lambda context, record, df: run_export(context, record, 'IBMi_RefArcaddesSources.csv', df),
+              {'compression': compression}, False),
+        Stage('export_objets', [objets, 'split_objets'], run_export_objets,
+              {'compression': compression}, False),
+    ])
+    if resolve:
+        aliases, library_list = load_library_map(library_map)
+        stages.append(Stage('resolve_xref', ['filter_xref', 'split_objets'],
+                            lambda context, record, df, partitions: run_resolve(context, record, df, partitions,
+                                                                                not validate),
+                            {'aliases': aliases, 'library_list': library_list, 'markers': LIBRARY_LIST_MARKERS,
+                             'compression': compression, 'write_xref': not validate}, False))
+    if validate:
+        stages.append(Stage('validate_xref', ['resolve_xref' if resolve else 'filter_xref', 'split_objets',
+                                              'filter_sources'], run_validate,
+                            {'reasons': REJECT_REASONS, 'compression': compression}, False))
+    elif not resolve:
+        stages.append(Stage('export_xref', ['filter_xref'],
+                            lambda context, record, df: run_export(context, record,
+                                                                   'IBMi_RefArcaddesXREF.csv', df),
+                            {'compression': compression}, False))
+    # Rapport sur les XREF chargées (sans les lignes rejetées avec validate)
+    stages.append(Stage('report', ['filter_sources', objets, 'validate_xref' if validate else 'filter_xref',
+                                   'profile_objets'], run_report, dict(report_options or {}), False))
+    if extracts:
+        stages.append(Stage('export_extracts', [], run_export_extracts,
+                            {'extracts': {spec['file']: file_sha256(extract_path(kind, extracts_dir))
+                                          for kind, spec in EXTRACT_SPECS.items()},
+                             'encoding': extracts_encoding, 'compression': compression}, False))
+    return stages
+
+# =========== Ordonnancement ===========
+
+def is_up_to_date(entry, stage_fp):
+    """Vrai si l'état enregistré correspond à l'empreinte et que artefacts et fichiers sont intacts"""
+    if not entry or entry.get('fingerprint') != stage_fp:
+        return False
+    if not all(os.path.exists(path) for path in entry.get('artifacts', {}).values()):
+        return False
+    return all(file_signature(path) == signature for path, signature in entry.get('outputs', {}).items())
+
+def execute_stage(stage, results, context, state, memoize):
+    """Exécute une étape dans une phase mesurée; retourne son StageResult"""
+    inputs = [results[name].get() for name in stage.inputs]
+    with measure_phase(context['run_metrics'], stage.name, context['profile_dir']) as record:
+        value = stage.function(context, record, *inputs)
+        outputs = list(record.get('outputs', []))
+        if stage.volatile:
+            stage_fp = 'absent' if value is None else hashlib.sha256(value).hexdigest()
+        else:
+            stage_fp = stage_fingerprint(stage, [results[name].fingerprint for name in stage.inputs])
+        record['fingerprint'] = stage_fp
+        if memoize and not stage.volatile:
+            artifacts = save_artifacts(context['stages_dir'], stage.name, stage_fp, value)
+            state[stage.name] = {
+                'fingerprint': stage_fp,
+                'artifacts': artifacts,
+                'outputs': {path: file_signature(path) for path in outputs},
+            }
+    return StageResult(stage_fp, value)
+
+def run_stages(stages, context, state, memoize, workers=None):
+    """Exécute le graphe: chaque étape prête (entrées disponibles) est ignorée
+    si elle est à jour, sinon soumise au pool; retourne {étape: StageResult}
+
+    Une étape en échec (exception) invalide son aval, qui n'est pas exécuté.
+    """
+    results = {}
+    pending = list(stages)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=workers or len(EXCEL_FILES) + 1,
+                            thread_name_prefix="arcad-stage") as pool:
+        while pending or running:
+            for stage in list(pending):
+                if not all(name in results for name in stage.inputs):
+                    continue
+                pending.remove(stage)
+                if any(results[name].failed for name in stage.inputs):
+                    print(f"⚠️ Étape {stage.name} non exécutée - entrée en échec")
+                    results[stage.name] = StageResult(None, failed=True)
+                    state.pop(stage.name, None)
+                    continue
+                if not stage.volatile:
+                    stage_fp = stage_fingerprint(stage, [results[name].fingerprint for name in stage.inputs])
+                    entry = state.get(stage.name)
+                    if memoize and is_up_to_date(entry, stage_fp):
+                        print(f"✓ Étape {stage.name} à jour - ignorée ({stage_fp[:12]})")
+                        context['run_metrics'].append({'phase': stage.name, 'skipped': True,
+                                                       'fingerprint': stage_fp})
+                        results[stage.name] = StageResult(stage_fp, artifacts=entry['artifacts'])
+                        continue
+                running[pool.submit(execute_stage, stage, results, context, state, memoize)] = stage
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    results[stage.name] = future.result()
+                except Exception as e:
+                    print(f"✗ Erreur lors de l'étape {stage.name}: {str(e)}")
+                    import traceback
+                    traceback.print_exc()
+                    results[stage.name] = StageResult(None, failed=True)
+                    state.pop(stage.name, None)
+    return results
+
+def run_incremental(output_dir, fetch_options, run_metrics=None, chunk_size=None, compression=None,
+                    project=False, extracts_dir=EXTRACTS_DIR, report_options=None, workers=None,
+                    profile_dir=None, load_frames=False, extracts=False, extracts_encoding=None, enrich=False,
+                    resolve=False, library_map=None, validate=False):
+    """Exécute le pipeline incrémental; retourne (succès, frames)
+
+    Les artefacts des étapes sont conservés dans <cache_dir>/stages et l'état
+    dans output_dir/pipeline_state.json; sans cache (ou sans pyarrow) toutes
+    les étapes sont exécutées. Avec load_frames, frames contient les
+    DataFrames sources/objets/programmes/tables/xref (relus si besoin),
+    sinon des None. Avec extracts, les extraits IBMi sont aussi préparés;
+    avec enrich, les objets reçoivent leurs statistiques d'utilisation IBMi;
+    avec resolve, les XREF reçoivent leurs bibliothèques résolues (library_map:
+    configuration JSON de arcad_resolution); avec validate, les XREF sans
+    objet préparé à une extrémité sont écartées (arcad_integrity). Le succès est faux si les objets n'ont pas pu être produits.
+    """
+    run_metrics = [] if run_metrics is None else run_metrics
+    cache_dir = fetch_options.get('cache_dir')
+    memoize = bool(cache_dir) and PARQUET_AVAILABLE
+    if cache_dir and not PARQUET_AVAILABLE:
+        print("⚠️ pyarrow non installé - étapes non mémorisées, toutes exécutées")
+    stages_dir = os.path.join(cache_dir, STAGES_CACHE_SUBDIR) if memoize else None
+    if stages_dir:
+        Path(stages_dir).mkdir(parents=True, exist_ok=True)
+
+    context = {
+        'output_dir': output_dir,
+        'fetch_options': fetch_options,
+        'chunk_size': chunk_size,
+        'compression': compression,
+        'schemas': {kind: COLUMN_SCHEMA[kind] if project else None for kind in EXCEL_FILES},
+        'extracts_dir': extracts_dir,
+        'extracts_encoding': extracts_encoding or EXTRACTS_ENCODING,
+        'report_options': dict(report_options or {}),
+        'run_metrics': run_metrics,
+        'profile_dir': profile_dir,
+        'stages_dir': stages_dir,
+        'library_map': library_map,
+    }
+    stages = build_stages(chunk_size, context['schemas'], compression, extracts_dir, context['report_options'],
+                          extracts, context['extracts_encoding'], enrich, resolve, library_map, validate)
+    state = load_pipeline_state(output_dir) if memoize else {}
+
+    with ProcessPoolExecutor(max_workers=workers or min(len(EXCEL_FILES), os.cpu_count() or 1)) as cpu_pool:
+        context['cpu_pool'] = cpu_pool
+        results = run_stages(stages, context, state, memoize)
+
+    if memoize:
+        save_pipeline_state(output_dir, {name: entry for name, entry in state.items()
+                                         if name in results and not results[name].failed})
+    skipped = sum(1 for record in run_metrics if record.get('skipped'))
+    print(f"✓ Pipeline incrémental: {len(stages)} étapes, {skipped} à jour")
+
+    for kind, label in (('sources', "Fichier des sources"), ('xref', "Fichier XREF")):
+        if results[f"fetch_{kind}"].get() is None:
+            print(f"⚠️ {label} non accessible - continuons avec les autres fichiers")
+    objets = results['enrich_objets' if enrich else 'filter_objets']
+    if objets.failed or results['fetch_objets'].get() is None:
+        print("✗ Impossible de continuer sans le fichier des objets")
+        return False, {}
+
+    frames = {name: None for name in ('sources', 'objets', 'programmes', 'tables', 'xref')}
+    if load_frames:
+        partitions = results['split_objets'].get() or {}
+        frames.update({
+            'sources': results['filter_sources'].get(),
+            'objets': objets.get(),
+            'programmes': partitions.get('programmes'),
+            'tables': partitions.get('tables'),
+            'xref': results['validate_xref' if validate else 'resolve_xref' if resolve else 'filter_xref'].get(),
+        })
+    return True, frames
+
+def main(argv=None):
+    """Fonction principale: exécute le pipeline incrémental seul"""
+    parser = argparse.ArgumentParser(description="Pipeline incrémental des CSV ARCAD pour Neo4j")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV et de l'état du pipeline (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--base-url", default=GITHUB_BASE_URL, help="URL de base des Excel ARCAD")
+    parser.add_argument("--source-dir", help="Lire les Excel depuis ce répertoire local")
+    parser.add_argument("--cache-dir", default=CACHE_DIR,
+                        help=f"Cache des Excel et des artefacts d'étapes (défaut: {CACHE_DIR})")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Désactive le cache: toutes les étapes sont exécutées")
+    parser.add_argument("--offline", action="store_true", help="Utilise uniquement le cache local")
+    parser.add_argument("--extracts-dir", default=EXTRACTS_DIR,
+                        help="Répertoire des extraits IBMi_XREF_* (NBRELATION)")
+    parser.add_argument("--streaming", action="store_true",
+                        help="Lecture des Excel par blocs (pas à mémoire constante: les lignes filtrées "
+                             "restent en mémoire)")
+    parser.add_argument("--chunk-size", type=int, default=STREAMING_CHUNK_SIZE,
+                        help=f"Lignes par bloc en mode streaming (défaut: {STREAMING_CHUNK_SIZE})")
+    parser.add_argument("--project", action="store_true", help="Projection des colonnes (COLUMN_SCHEMA)")
+    parser.add_argument("--compress", choices=sorted(CSV_COMPRESSION_SUFFIXES), help="CSV compressés")
+    parser.add_argument("--report-top-applications", type=int, default=REPORT_TOP_APPLICATIONS,
+                        help=f"Applications détaillées dans le rapport (défaut: {REPORT_TOP_APPLICATIONS})")
+    parser.add_argument("--report-top-attributes", type=int, default=REPORT_TOP_ATTRIBUTES,
+                        help=f"Attributs détaillés dans le rapport (défaut: {REPORT_TOP_ATTRIBUTES})")
+    parser.add_argument("--report-top-degrees", type=int, default=REPORT_TOP_DEGREES,
+                        help=f"Programmes et tables de plus fort degré XREF dans le rapport "
+                             f"(défaut: {REPORT_TOP_DEGREES})")
+    parser.add_argument("--extracts", action="store_true", help="Prépare aussi les extraits IBMi_*.csv")
+    parser.add_argument("--enrich", action="store_true",
+                        help="Enrichit les objets des statistiques d'utilisation IBMi")
+    parser.add_argument("--extracts-encoding", default=EXTRACTS_ENCODING,
+                        help=f"Page de code des extraits IBMi (défaut: {EXTRACTS_ENCODING})")
+    parser.add_argument("--resolve-libraries", action="store_true",
+                        help="Résout les bibliothèques des XREF (*LIBL, alias)")
+    parser.add_argument("--library-map", metavar="JSON",
+                        help="Alias et liste de bibliothèques de --resolve-libraries")
+    parser.add_argument("--validate-references", action="store_true",
+                        help="Écarte les XREF sans objet préparé (IBMi_RefArcaddesXREF_rejects.csv)")
+    parser.add_argument("--workers", type=int,
+                        help=f"Processus d'analyse Excel (défaut: un par classeur, min({len(EXCEL_FILES)}, "
+                             f"nombre de CPU))")
+    parser.add_argument("--profile", metavar="DIR", help="Profile chaque étape avec cProfile")
+    args = parser.parse_args(argv)
+
+    started_at = datetime.now()
+    run_metrics = []
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    fetch_options = {
+        'base_url': args.base_url,
+        'source_dir': args.source_dir,
+        'cache_dir': None if args.no_cache else args.cache_dir,
+        'offline': args.offline,
+    }
+    try:
+        ok, _ = run_incremental(args.output_dir, fetch_options, run_metrics,
+                                args.chunk_size if args.streaming else None,
+                                resolve_csv_compression(args.compress), args.project, args.extracts_dir,
+                                {'top_applications': args.report_top_applications,
+                                 'top_attributes': args.report_top_attributes,
+                                 'top_degrees': args.report_top_degrees},
+                                args.workers, args.profile, extracts=args.extracts,
+                                extracts_encoding=args.extracts_encoding, enrich=args.enrich,
+                                resolve=args.resolve_libraries, library_map=args.library_map,
+                                validate=args.validate_references)
+        return 0 if ok else 1
+    finally:
+        write_run_metrics(args.output_dir, run_metrics, started_at, vars(args))
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Index d'atteignabilité - Patrimoine IBMi ARCAD
+Précalcule, pour chaque programme et chaque table, l'ensemble des programmes
+qui l'atteignent par CALLS* (puis USES pour une table): graphe des appels
+condensé en composantes fortement connexes, fermeture en bitsets compressés
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from arcad_graph import (PROGRAMME, TABLE, Adjacency, NodeIndex, build_adjacency,
+                         build_graph, gather)
+from excel_github_to_csv import OUTPUT_DIR
+from neo4j_loader import read_prepared_csvs
+
+# Fichier de l'index, écrit dans le répertoire des CSV
+REACHABILITY_FILE = "reachability.npz"
+
+# Version du format: à incrémenter si la structure de l'index change
+REACHABILITY_VERSION = 1
+
+def strongly_connected_components(adjacency, nodes):
+    """Composantes fortement connexes (Tarjan itératif)
+
+    Retourne (component, count): component[i] vaut -1 pour les nœuds hors de
+    nodes. Les composantes sont numérotées en ordre topologique inverse:
+    une composante reçoit un numéro après toutes celles qu'elle atteint.
+    """
+    indptr = adjacency.indptr.tolist()
+    indices = adjacency.indices.tolist()
+    size = len(indptr) - 1
+    index = [-1] * size
+    low = [0] * size
+    on_stack = [False] * size
+    component = np.full(size, -1, dtype=np.int32)
+    stack = []
+    counter = 0
+    count = 0
+
+    for root in nodes:
+        if index[root] >= 0:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [[root, indptr[root]]]
+        while work:
+            frame = work[-1]
+            node, position = frame
+            if position < indptr[node + 1]:
+                frame[1] += 1
+                successor = indices[position]
+                if index[successor] < 0:
+                    index[successor] = low[successor] = counter
+                    counter += 1
+                    stack.append(successor)
+                    on_stack[successor] = True
+                    work.append([successor, indptr[successor]])
+                elif on_stack[successor]:
+                    low[node] = min(low[node], index[successor])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component[member] = count
+                    if member == node:
+                        break
+                count += 1
+
+    return component, count
+
+def set_bit(rows, row, bit):
+    """Positionne un bit dans une matrice de bitsets (ordre de np.packbits)"""
+    rows[row, bit >> 3] |= np.uint8(0x80 >> (bit & 7))
+
+class ReachabilityIndex(NodeIndex):
+    """Programmes atteignant chaque nœud, sans parcours à l'interrogation
+
+    closure[c] est le bitset (sur les composantes) des composantes dont les
+    programmes atteignent la composante c par CALLS*, c comprise.
+    table_bits[table_row[t]] est l'union des fermetures des utilisateurs de
+    la table t. members_* liste les programmes de chaque composante et
+    cyclic signale les composantes contenant un cycle d'appels (boucle comprise).
+    """
+
+    ARRAYS = ['labels', 'libraries', 'names', 'component', 'closure', 'cyclic',
+              'table_row', 'table_bits', 'members_indptr', 'members']
+
+    def __init__(self, labels, libraries, names, component, closure, cyclic,
+                 table_row, table_bits, members_indptr, members):
+        super().__init__(labels, libraries, names)
+        self.component = component
+        self.closure = closure
+        self.cyclic = cyclic
+        self.table_row = table_row
+        self.table_bits = table_bits
+        self.members_indptr = members_indptr
+        self.members = members
+
+    @property
+    def component_count(self):
+        return len(self.closure)
+
+    @classmethod
+    def from_graph(cls, graph):
+        """Calcule l'index à partir d'un ArcadGraph"""
+        programmes = np.flatnonzero(graph.labels == PROGRAMME)
+        component, count = strongly_connected_components(graph.calls, programmes)
+
+        # Graphe condensé: prédécesseurs de chaque composante; une arête
+        # interne à une composante signale un cycle (appel récursif compris)
+        sources = np.repeat(np.arange(len(graph)), np.diff(graph.calls.indptr))
+        edges = np.unique(np.column_stack((component[graph.calls.indices], component[sources])), axis=0)
+        internal = edges[:, 0] == edges[:, 1]
+        cyclic = np.zeros(count, dtype=bool)
+        cyclic[edges[internal, 0]] = True
+        edges = edges[~internal]
+        predecessors = build_adjacency(edges[:, 0], edges[:, 1], np.ones(len(edges)), count)
+
+        # Fermeture: les prédécesseurs d'une composante ont un numéro plus grand
+        closure = np.zeros((count, (count + 7) // 8), dtype=np.uint8)
+        for comp in range(count - 1, -1, -1):
+            preds = predecessors.indices[predecessors.indptr[comp]:predecessors.indptr[comp + 1]]
+            if preds.size:
+                np.bitwise_or.reduce(closure[preds], axis=0, out=closure[comp])
+            set_bit(closure, comp, comp)
+
+        tables = np.flatnonzero(graph.labels == TABLE)
+        table_row = np.full(len(graph), -1, dtype=np.int32)
+        table_row[tables] = np.arange(len(tables))
+        table_bits = np.zeros((len(tables), closure.shape[1]), dtype=np.uint8)
+        for row, table in enumerate(tables):
+            users = component[graph.table_users(table)]
+            if users.size:
+                np.bitwise_or.reduce(closure[users], axis=0, out=table_bits[row])
+
+        members = programmes[np.argsort(component[programmes], kind='stable')].astype(np.int32)
+        members_indptr = np.zeros(count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(component[programmes], minlength=count), out=members_indptr[1:])
+
+        return cls(graph.labels, np.array(graph.libraries), np.array(graph.names), component,
+                   closure, cyclic, table_row, table_bits, members_indptr, members)
+
+    # =========== Persistance ===========
+
+    def save(self, path):
+        """Écrit l'index au format .npz compressé"""
+        np.savez_compressed(path, version=REACHABILITY_VERSION,
+                            **{name: getattr(self, name) for name in self.ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        """Relit un index écrit par save (ValueError si la version diffère)"""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data['version']) != REACHABILITY_VERSION:
+                raise ValueError(f"Version d'index {int(data['version'])} non supportée "
+                                 f"(attendue: {REACHABILITY_VERSION})")
+            return cls(*(data[name] for name in cls.ARRAYS))
+
+    # =========== Interrogation ===========
+
+    def programs_in(self, bits):
+        """Identifiants des programmes d'un bitset de composantes"""
+        components = np.flatnonzero(np.unpackbits(bits, count=self.component_count))
+        return np.sort(gather(Adjacency(self.members_indptr, self.members, None), components))
+
+    def reaching(self, node):
+        """Programmes qui atteignent node: appelants transitifs d'un programme,
+        utilisateurs directs ou indirects (CALLS* puis USES) d'une table
+
+        Un programme n'est retourné comme son propre appelant que s'il est
+        dans un cycle d'appels.
+        """
+        if self.labels[node] == TABLE:
+            return self.programs_in(self.table_bits[self.table_row[node]])
+        comp = self.component[node]
+        reached = self.programs_in(self.closure[comp])
+        return reached if self.cyclic[comp] else reached[reached != node]
+
+def build_reachability_index(frames, output_dir):
+    """Construit l'index à partir des DataFrames préparés et l'écrit dans output_dir"""
+    start = time.perf_counter()
+    index = ReachabilityIndex.from_graph(build_graph(frames))
+    path = os.path.join(output_dir, REACHABILITY_FILE)
+    index.save(path)
+    sizes = np.diff(index.members_indptr)
+    print(f"✓ Index d'atteignabilité: {path} ({os.path.getsize(path):,} bytes, "
+          f"{time.perf_counter() - start:.2f} s)")
+    print(f"  {len(sizes):,} composantes pour {int(sizes.sum()):,} programmes, "
+          f"{int(index.cyclic.sum())} cycles d'appels "
+          f"(le plus grand: {int(sizes.max()) if sizes.size else 0} programmes)")
+    return index
+
+def print_reaching(index, name, label):
+    """Affiche les programmes atteignant un programme ou une table"""
+    nodes = index.find(name, label=label)
+    if not nodes.size:
+        print(f"✗ {'Table' if label == TABLE else 'Programme'} {name} introuvable")
+        return False
+    for node in nodes:
+        start = time.perf_counter()
+        reached = index.reaching(node)
+        duration = time.perf_counter() - start
+        print(f"\n=== PROGRAMMES IMPACTÉS PAR {index.describe(node)}: "
+              f"{len(reached)} ({duration * 1e6:,.0f} µs) ===")
+        for programme in reached:
+            print(f"  <- {index.describe(programme)}")
+    return True
+
+def main(argv=None):
+    """Fonction principale: construit ou interroge l'index d'atteignabilité"""
+    parser = argparse.ArgumentParser(description="Index d'atteignabilité CALLS*/USES des CSV ARCAD")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés et de l'index (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--build", action="store_true",
+                        help=f"Reconstruit {REACHABILITY_FILE} à partir des CSV")
+    parser.add_argument("--table", action="append", default=[],
+                        help="Programmes atteignant une table (répétable)")
+    parser.add_argument("--program", action="append", default=[],
+                        help="Appelants transitifs d'un programme (répétable)")
+    args = parser.parse_args(argv)
+
+    path = os.path.join(args.csv_dir, REACHABILITY_FILE)
+    if args.build or not os.path.exists(path):
+        frames = read_prepared_csvs(args.csv_dir)
+        if frames['programmes'] is None or frames['xref'] is None:
+            print("✗ CSV Programmes/XREF manquants - lancez d'abord excel_github_to_csv.py")
+            return 1
+        index = build_reachability_index(frames, args.csv_dir)
+    else:
+        index = ReachabilityIndex.load(path)
+        print(f"✓ Index chargé: {path}")
+
+    ok = True
+    for name in args.table:
+        ok &= print_reaching(index, name, TABLE)
+    for name in args.program:
+        ok &= print_reaching(index, name, PROGRAMME)
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Résolution des bibliothèques XREF - Patrimoine IBMi ARCAD
+Ramène chaque extrémité des références croisées (*LIBL, alias de
+bibliothèques, variables CL) à une clé (bibliothèque, nom) d'objet connu:
+index nom -> bibliothèques candidates construit depuis les objets, liste de
+bibliothèques et alias configurables, résolution vectorisée en une passe
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import (CSV_COMPRESSION_SUFFIXES, CSV_DATETIME_FORMAT, OUTPUT_DIR, csv_output_path,
+                                 find_csv_file, write_csv)
+from ibmi_extracts import LIBRARY_ALIASES
+
+# CSV des XREF (réécrit avec les colonnes résolues) et des extrémités non résolues
+XREF_CSV = 'IBMi_RefArcaddesXREF.csv'
+XREF_UNRESOLVED_CSV = 'IBMi_RefArcaddesXREF_Unresolved.csv'
+
+# Liste de bibliothèques (*LIBL) par défaut, par ordre de recherche
+LIBRARY_LIST = ['SPRLIBREF', 'SPFLIBREF', 'SPSRCREF']
+
+# Bibliothèques qui ne désignent pas un emplacement: recherche dans la liste.
+# Les variables CL (&LIB) sont reconnues par LIBRARY_VARIABLE_PREFIX.
+LIBRARY_LIST_MARKERS = ['', '*LIBL', '*CURLIB', '*VARIABLE', 'QTEMP']
+LIBRARY_VARIABLE_PREFIX = '&'
+
+# Extrémités résolues par type d'objet: (colonne type, colonne bibliothèque,
+# colonne nom, colonne bibliothèque résolue, colonne statut)
+XREF_ENDPOINTS = {
+    'from': ('OXR_FROM_TYPE', 'OXR_FROM_LIB', 'OXR_FROM_OBJ', 'OXR_FROM_RLIB', 'OXR_FROM_RESOLUTION'),
+    'to': ('OXR_TO_TYPE', 'OXR_TO_LIB', 'OXR_TO_OBJ', 'OXR_TO_RLIB', 'OXR_TO_RESOLUTION'),
+}
+
+# Statuts de résolution d'une extrémité:
+#   exact      bibliothèque de l'XREF contenant l'objet
+#   alias      idem après application des alias (SPRLIB -> SPRLIBREF)
+#   libl       bibliothèque trouvée par la liste de bibliothèques ou candidate unique
+#   ambiguous  plusieurs candidates hors de la liste: non résolue
+#   unresolved aucun objet de ce nom: non résolue
+#   (vide)     type d'objet non catalogué (ni *PGM ni *FILE)
+RESOLVED_STATUSES = ['exact', 'alias', 'libl']
+UNRESOLVED_STATUSES = ['ambiguous', 'unresolved']
+
+# Candidates listées dans le CSV des non résolues
+CANDIDATES_SEPARATOR = '|'
+
+class LibraryResolver:
+    """Index (type, bibliothèque, nom) des objets et (type, nom) -> candidates
+
+    Construit à partir des partitions programmes (*PGM) et tables (*FILE PF /
+    TABLE), c'est-à-dire des nœuds Programme et Table chargés dans Neo4j. Pour
+    chaque (type, nom), les candidates sont ordonnées par rang dans la liste
+    de bibliothèques (hors liste en dernier): la première est retenue si elle
+    est dans la liste ou si elle est la seule.
+    """
+
+    def __init__(self, objects, candidates, aliases, library_list):
+        self.objects = objects
+        self.candidates = candidates
+        self.aliases = aliases
+        self.library_list = library_list
+
+    @classmethod
+    def from_frames(cls, df_programmes, df_tables, aliases=None, library_list=None):
+        """Construit l'index à partir des partitions (None ou vides acceptées)"""
+        aliases = LIBRARY_ALIASES if aliases is None else aliases
+        library_list = LIBRARY_LIST if library_list is None else library_list
+        frames = []
+        for df in (df_programmes, df_tables):
+            if df is None or not all(col in df.columns for col in ['LST_CTYPE', 'LST_JLIB', 'LST_JOBJ']):
+                continue
+            frames.append(pd.DataFrame({
+                'TYPE': df['LST_CTYPE'].astype(object).fillna(''),
+                'LIBRARY': df['LST_JLIB'].astype(object).fillna(''),
+                'NAME': df['LST_JOBJ'].astype(object).fillna(''),
+            }))
+        catalogue = pd.concat(frames, ignore_index=True) if frames \
+            else pd.DataFrame(columns=['TYPE', 'LIBRARY', 'NAME'], dtype=object)
+        catalogue = catalogue[(catalogue['LIBRARY'] != '') & (catalogue['NAME'] != '')]
+        catalogue = catalogue.drop_duplicates(ignore_index=True)
+
+        ranks = {library: rank for rank, library in enumerate(library_list)}
+        catalogue['RANK'] = catalogue['LIBRARY'].map(ranks).fillna(len(library_list)).astype('int64')
+        catalogue = catalogue.sort_values(['TYPE', 'NAME', 'RANK', 'LIBRARY'], ignore_index=True)
+        candidates = catalogue.groupby(['TYPE', 'NAME'], sort=False).agg(
+            LIBRARY=('LIBRARY', 'first'), RANK=('RANK', 'first'), COUNT=('LIBRARY', 'size'),
+            LIBRARIES=('LIBRARY', CANDIDATES_SEPARATOR.join))
+        candidates['SELECTED'] = (candidates['RANK'] < len(library_list)) | (candidates['COUNT'] == 1)
+        objects = pd.MultiIndex.from_frame(catalogue[['TYPE', 'LIBRARY', 'NAME']])
+        return cls(objects, candidates, dict(aliases), list(library_list))
+
+    @property
+    def object_types(self):
+        return self.candidates.index.get_level_values('TYPE').unique()
+
+    def resolve_endpoint(self, types, libraries, names):
+        """Résout des extrémités (tableaux alignés); retourne (bibliothèques, statuts)
+
+        Une bibliothèque explicite qui ne contient pas l'objet est traitée
+        comme *LIBL (l'objet a pu être déplacé ou copié depuis l'extraction).
+        """
+        types = pd.Series(types, dtype=object).fillna('').to_numpy()
+        names = pd.Series(names, dtype=object).fillna('').to_numpy()
+        requested = pd.Series(libraries, dtype=object).fillna('')
+        aliased = requested.replace(self.aliases).to_numpy()
+        requested = requested.to_numpy()
+
+        if self.candidates.empty:
+            # Aucun objet catalogué: aucune extrémité n'est concernée
+            return np.full(len(types), None, dtype=object), np.full(len(types), '', dtype=object)
+        exact = self.objects.get_indexer(pd.MultiIndex.from_arrays([types, aliased, names])) >= 0
+        positions = self.candidates.index.get_indexer(pd.MultiIndex.from_arrays([types, names]))
+        found = positions >= 0
+        selected = found & self.candidates['SELECTED'].to_numpy().take(positions)
+        best = self.candidates['LIBRARY'].to_numpy(object).take(positions)
+
+        resolved = np.where(exact, aliased, np.where(selected, best, None))
+        status = np.select([exact & (aliased == requested), exact, selected, found],
+                           ['exact', 'alias', 'libl', 'ambiguous'], 'unresolved').astype(object)
+        status[~pd.Index(types).isin(self.object_types)] = ''
+        return resolved, status
+
+    def resolve(self, df_xref):
+        """Ajoute à df_xref les bibliothèques résolues et les statuts des deux extrémités"""
+        columns = {}
+        for type_col, library_col, name_col, resolved_col, status_col in XREF_ENDPOINTS.values():
+            if not all(col in df_xref.columns for col in (type_col, library_col, name_col)):
+                continue
+            resolved, status = self.resolve_endpoint(
+                df_xref[type_col].astype(object), df_xref[library_col].astype(object),
+                df_xref[name_col].astype(object))
+            columns[resolved_col] = resolved
+            columns[status_col] = status
+        return df_xref.assign(**columns)
+
+    def unresolved(self, df_resolved):
+        """Lignes dont une extrémité est ambiguë ou introuvable, avec les candidates"""
+        mask = np.zeros(len(df_resolved), dtype=bool)
+        for *_, status_col in XREF_ENDPOINTS.values():
+            if status_col in df_resolved.columns:
+                mask |= df_resolved[status_col].isin(UNRESOLVED_STATUSES).to_numpy()
+        df = df_resolved[mask]
+        columns = {}
+        for endpoint, (type_col, _, name_col, _, status_col) in XREF_ENDPOINTS.items():
+            if status_col not in df.columns:
+                continue
+            positions = self.candidates.index.get_indexer(pd.MultiIndex.from_arrays(
+                [df[type_col].astype(object).fillna(''), df[name_col].astype(object).fillna('')]))
+            libraries = self.candidates['LIBRARIES'].to_numpy(object).take(positions)
+            columns[f"OXR_{endpoint.upper()}_CANDIDATES"] = np.where(
+                df[status_col].to_numpy() == 'ambiguous', libraries, '')
+        return df.assign(**columns)
+
+    @staticmethod
+    def describe(df_resolved):
+        """Résumé des statuts par extrémité"""
+        parts = []
+        for endpoint, (*_, status_col) in XREF_ENDPOINTS.items():
+            if status_col not in df_resolved.columns:
+                continue
+            counts = df_resolved[status_col].value_counts()
+            details = ", ".join(f"{status} {int(counts.get(status, 0))}"
+                                for status in RESOLVED_STATUSES + UNRESOLVED_STATUSES)
+            parts.append(f"{endpoint}: {details}")
+        return "; ".join(parts)
+
+def load_library_map(path):
+    """Lit une configuration JSON {"aliases": {...}, "library_list": [...]}
+
+    Les alias fournis complètent LIBRARY_ALIASES; la liste fournie remplace
+    LIBRARY_LIST. Sans fichier, retourne la configuration par défaut.
+    """
+    aliases, library_list = dict(LIBRARY_ALIASES), list(LIBRARY_LIST)
+    if path:
+        with open(path, encoding='utf-8') as f:
+            config = json.load(f)
+        aliases.update(config.get('aliases', {}))
+        library_list = list(config.get('library_list', library_list))
+    return aliases, library_list
+
+def library_list_markers(libraries):
+    """Masque des bibliothèques à chercher dans la liste (*LIBL, variables CL...)"""
+    libraries = pd.Series(libraries, dtype=object).fillna('')
+    return (libraries.isin(LIBRARY_LIST_MARKERS)
+            | libraries.str.startswith(LIBRARY_VARIABLE_PREFIX)).to_numpy()
+
+def resolve_xref(df_xref, df_programmes, df_tables, output_dir=None, compression=None,
+                 library_map=None, metrics=None, write_xref=True):
+    """Résout les extrémités des XREF; retourne le DataFrame enrichi
+
+    Avec output_dir, réécrit le CSV des XREF (colonnes *_RLIB et *_RESOLUTION
+    ajoutées, toutes les lignes conservées) et écrit les lignes non résolues
+    dans XREF_UNRESOLVED_CSV; write_xref=False laisse le CSV des XREF à une
+    étape suivante (arcad_integrity). metrics (dict) reçoit rows_in, rows_out et outputs.
+    """
+    if df_xref is None:
+        return None
+    aliases, library_list = load_library_map(library_map)
+    resolver = LibraryResolver.from_frames(df_programmes, df_tables, aliases, library_list)
+    df_resolved = resolver.resolve(df_xref)
+    unresolved = resolver.unresolved(df_resolved)
+    markers = int(library_list_markers(df_xref['OXR_TO_LIB'].astype(object)).sum()) \
+        if 'OXR_TO_LIB' in df_xref.columns else 0
+    print(f"✓ Résolution des bibliothèques: {len(resolver.candidates):,} objets indexés, "
+          f"{markers} cibles *LIBL ou variables")
+    print(f"  {resolver.describe(df_resolved)}")
+
+    outputs = []
+    if output_dir:
+        for filename, df in ((XREF_CSV, df_resolved), (XREF_UNRESOLVED_CSV, unresolved)):
+            if filename == XREF_CSV and not write_xref:
+                continue
+            output_file = csv_output_path(output_dir, filename, compression)
+            write_csv(df, output_file, date_format=CSV_DATETIME_FORMAT)
+            outputs.append(output_file)
+            print(f"✓ {filename} sauvegardé: {len(df)} lignes -> {output_file}")
+    if metrics is not None:
+        metrics.update({'rows_in': len(df_xref), 'rows_out': len(df_resolved) - len(unresolved),
+                        'outputs': outputs})
+    return df_resolved
+
+def main(argv=None):
+    """Fonction principale: résout les bibliothèques des XREF préparées"""
+    parser = argparse.ArgumentParser(description="Résolution *LIBL / alias des bibliothèques XREF ARCAD")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--library-map", metavar="JSON",
+                        help="Alias et liste de bibliothèques ({\"aliases\": {...}, \"library_list\": [...]})")
+    args = parser.parse_args(argv)
+
+    from neo4j_loader import read_prepared_csvs
+    frames = read_prepared_csvs(args.csv_dir)
+    if frames['xref'] is None or frames['programmes'] is None:
+        print("✗ CSV Programmes/XREF manquants - lancez d'abord excel_github_to_csv.py")
+        return 1
+    # Réécriture au format (compressé ou non) du CSV des XREF existant
+    path = find_csv_file(args.csv_dir, XREF_CSV)
+    compression = next((name for name, suffix in CSV_COMPRESSION_SUFFIXES.items() if path.endswith(suffix)), None)
+    start = time.perf_counter()
+    resolve_xref(frames['xref'], frames['programmes'], frames['tables'], args.csv_dir, compression,
+                 args.library_map)
+    print(f"✓ Résolution terminée en {time.perf_counter() - start:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
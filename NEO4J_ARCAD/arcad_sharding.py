@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Partition des XREF pour un chargement parallèle - Patrimoine IBMi ARCAD
+Répartit les relations CALLS et USES en shards par seaux d'extrémités: deux
+shards d'une même vague ne partagent aucun nœud, ils peuvent donc être
+chargés en parallèle (sessions concurrentes) sans verrous croisés ni interblocages
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import (CSV_COMPRESSION_SUFFIXES, OUTPUT_DIR, PartitionedCsvWriter, csv_output_path,
+                                 find_csv_file, resolve_csv_compression)
+
+# Répertoire des shards (sous csv_neo4j) et fichier de planification
+XREF_SHARDS_DIR = "xref_shards"
+SHARD_SCHEDULE_FILE = "schedule.json"
+
+# Sessions parallèles visées par défaut (shards par vague)
+SHARD_WORKERS = 4
+
+# Relations partitionnées: type de la cible OXR_TO_TYPE et cible de même label
+# que la source (CALLS: Programme -> Programme)
+XREF_SHARD_TYPES = {
+    'CALLS': ('*PGM', True),
+    'USES': ('*FILE', False),
+}
+
+def balanced_buckets(keys, buckets):
+    """Seau de chaque clé de nœud, équilibré sur le nombre d'arêtes
+
+    Les nœuds sont triés par degré décroissant puis distribués en serpentin
+    (0..n-1, n-1..0, ...): les nœuds pivots (programmes très appelés, tables
+    partagées) tombent dans des seaux différents. Retourne (codes, seaux):
+    codes[i] est le numéro de nœud de keys[i], seaux[code] son seau.
+    """
+    codes, uniques = pd.factorize(pd.Series(keys, dtype=object), sort=True)
+    degrees = np.bincount(codes, minlength=len(uniques))
+    order = np.argsort(-degrees, kind='stable')
+    snake = np.arange(len(order)) % (2 * buckets)
+    snake = np.where(snake < buckets, snake, 2 * buckets - 1 - snake)
+    assignment = np.empty(len(order), dtype=np.int64)
+    assignment[order] = snake
+    return codes, assignment
+
+def bipartite_rounds(buckets):
+    """Vagues d'un graphe biparti (sources et cibles disjointes): carré latin
+
+    La vague r contient les cellules (a, (a + r) mod n): chaque seau source et
+    chaque seau cible y apparaît une seule fois.
+    """
+    return [[(a, (a + r) % buckets) for a in range(buckets)] for r in range(buckets)]
+
+def pair_rounds(buckets):
+    """Vagues d'un graphe sur un seul ensemble de nœuds (méthode du cercle)
+
+    Une cellule {a, b} regroupe les arêtes a -> b et b -> a; une vague est un
+    couplage des seaux (aucun seau dans deux cellules), les cellules {a, a}
+    forment une dernière vague.
+    """
+    players = list(range(buckets)) + ([None] if buckets % 2 else [])
+    count = len(players)
+    rounds = []
+    for r in range(count - 1):
+        rotated = [players[-1]] + [players[(r + i) % (count - 1)] for i in range(count - 1)]
+        cells = [(rotated[i], rotated[count - 1 - i]) for i in range(count // 2)]
+        rounds.append([tuple(sorted(cell)) for cell in cells if None not in cell])
+    rounds.append([(a, a) for a in range(buckets)])
+    return rounds
+
+def shard_edges(from_keys, to_keys, workers=SHARD_WORKERS, same_label=False):
+    """Partitionne des arêtes; retourne (shard de chaque arête, vagues de shards)
+
+    Les clés identifient les nœuds verrouillés par le MERGE de la relation.
+    Une vague est une liste de numéros de shards deux à deux sans nœud commun;
+    les shards vides sont omis. Avec same_label (CALLS), sources et cibles
+    partagent les mêmes seaux: 2 * workers seaux donnent workers cellules
+    par vague.
+    """
+    from_keys = pd.Series(from_keys, dtype=object).to_numpy()
+    to_keys = pd.Series(to_keys, dtype=object).to_numpy()
+    if same_label:
+        buckets = max(2, 2 * workers)
+        codes, assignment = balanced_buckets(np.concatenate([from_keys, to_keys]), buckets)
+        source, target = assignment[codes[:len(from_keys)]], assignment[codes[len(from_keys):]]
+        rounds = pair_rounds(buckets)
+        source, target = np.minimum(source, target), np.maximum(source, target)
+    else:
+        buckets = max(1, workers)
+        source_codes, source_buckets = balanced_buckets(from_keys, buckets)
+        target_codes, target_buckets = balanced_buckets(to_keys, buckets)
+        source, target = source_buckets[source_codes], target_buckets[target_codes]
+        rounds = bipartite_rounds(buckets)
+
+    cells = [cell for cells in rounds for cell in cells]
+    cell_ids = np.full((buckets, buckets), -1, dtype=np.int64)
+    for shard, (a, b) in enumerate(cells):
+        cell_ids[a, b] = shard
+    shards = cell_ids[source, target]
+    counts = np.bincount(shards, minlength=len(cells))
+    schedule = []
+    position = 0
+    for cells_in_round in rounds:
+        wave = [shard for shard in range(position, position + len(cells_in_round)) if counts[shard]]
+        position += len(cells_in_round)
+        if wave:
+            schedule.append(wave)
+    return shards, schedule
+
+def schedule_conflicts(from_keys, to_keys, shards, schedule, same_label=False):
+    """Nombre de nœuds partagés par plusieurs shards d'une même vague (0 attendu)
+
+    Sans same_label, sources et cibles sont des nœuds de labels différents
+    (une clé commune ne désigne pas le même nœud).
+    """
+    from_keys = pd.Series(from_keys, dtype=object).astype(str).to_numpy()
+    to_keys = pd.Series(to_keys, dtype=object).astype(str).to_numpy()
+    if not same_label:
+        from_keys = 'from:' + from_keys.astype(object)
+        to_keys = 'to:' + to_keys.astype(object)
+    edges = pd.DataFrame({'shard': shards, 'from': from_keys, 'to': to_keys})
+    conflicts = 0
+    for wave in schedule:
+        wave_edges = edges[edges['shard'].isin(wave)]
+        nodes = pd.concat([wave_edges[['shard', 'from']].set_axis(['shard', 'node'], axis=1),
+                           wave_edges[['shard', 'to']].set_axis(['shard', 'node'], axis=1)])
+        conflicts += int((nodes.drop_duplicates().groupby('node').size() > 1).sum())
+    return conflicts
+
+def describe_schedule(shards, schedule):
+    """Résumé d'une planification: vagues, shards et lignes du plus gros shard par vague"""
+    counts = np.bincount(shards) if len(shards) else np.zeros(0, dtype=np.int64)
+    critical = sum(int(counts[wave].max()) for wave in schedule)
+    return (f"{len(schedule)} vagues, {sum(len(wave) for wave in schedule)} shards, "
+            f"chemin critique {critical:,}/{len(shards):,} lignes")
+
+def xref_endpoint_keys(df, resolved):
+    """Clés des nœuds verrouillés par arête: nom seul (cible par nom sur des XREF
+    non résolues), (bibliothèque, nom) sur des XREF résolues"""
+    def text(column):
+        return df[column].astype(object).where(df[column].notna(), '').astype(str).str.strip()
+    if resolved:
+        return text('OXR_FROM_RLIB') + '/' + text('OXR_FROM_OBJ'), text('OXR_TO_RLIB') + '/' + text('OXR_TO_OBJ')
+    return text('OXR_FROM_OBJ'), text('OXR_TO_OBJ')
+
+def export_xref_shards(df_xref, output_dir, workers=SHARD_WORKERS, compression=None, metrics=None):
+    """Écrit les shards CALLS/USES des XREF et leur planification
+
+    Chaque shard est un CSV aux colonnes des XREF (chargeable par les requêtes
+    de la phase 10 en changeant le nom de fichier). schedule.json liste, par
+    relation, les vagues de fichiers à charger en parallèle; les vagues
+    s'exécutent l'une après l'autre. Retourne la planification.
+    """
+    if df_xref is None:
+        return None
+    shards_dir = os.path.join(output_dir, XREF_SHARDS_DIR)
+    Path(shards_dir).mkdir(parents=True, exist_ok=True)
+    for name in os.listdir(shards_dir):
+        os.remove(os.path.join(shards_dir, name))
+
+    resolved = 'OXR_TO_RLIB' in df_xref.columns
+    from_types = df_xref['OXR_FROM_TYPE'].astype(object)
+    to_types = df_xref['OXR_TO_TYPE'].astype(object)
+    plan = {'workers': workers, 'resolved': resolved, 'relationships': {}}
+    outputs = []
+    with PartitionedCsvWriter() as writer:
+        for rel_type, (to_type, same_label) in XREF_SHARD_TYPES.items():
+            mask = (from_types == '*PGM') & (to_types == to_type)
+            if resolved:
+                # Lignes non résolues: ignorées par la phase 10, inutile de les répartir
+                mask &= df_xref['OXR_FROM_RLIB'].notna() & (df_xref['OXR_FROM_RLIB'] != '')
+                mask &= df_xref['OXR_TO_RLIB'].notna() & (df_xref['OXR_TO_RLIB'] != '')
+            positions = np.flatnonzero(mask.to_numpy())
+            subset = df_xref.take(positions)
+            from_keys, to_keys = xref_endpoint_keys(subset, resolved)
+            shards, schedule = shard_edges(from_keys, to_keys, workers, same_label)
+            order = np.argsort(shards, kind='stable')
+            bounds = np.searchsorted(shards[order], np.arange(shards.max() + 2 if len(shards) else 1))
+            targets = {}
+            waves = []
+            for wave in schedule:
+                files = []
+                for shard in wave:
+                    filename = os.path.basename(csv_output_path(shards_dir, f"{rel_type}-{shard:03d}.csv",
+                                                                compression))
+                    targets[os.path.join(shards_dir, filename)] = positions[order[bounds[shard]:bounds[shard + 1]]]
+                    files.append(filename)
+                waves.append(files)
+            writer.write(df_xref, targets)
+            outputs.extend(targets)
+            plan['relationships'][rel_type] = {'rows': len(subset), 'waves': waves}
+            print(f"✓ {rel_type}: {describe_schedule(shards, schedule)}")
+
+    schedule_file = os.path.join(shards_dir, SHARD_SCHEDULE_FILE)
+    with open(schedule_file, 'w', encoding='utf-8') as f:
+        json.dump(plan, f, indent=2, ensure_ascii=False)
+    print(f"✓ Shards XREF sauvegardés: {shards_dir} ({len(outputs)} fichiers, {schedule_file})")
+    if metrics is not None:
+        metrics.update({'rows_in': len(df_xref), 'rows_out': sum(
+            entry['rows'] for entry in plan['relationships'].values()), 'outputs': [shards_dir]})
+    return plan
+
+def main(argv=None):
+    """Fonction principale: partitionne les XREF préparées pour un chargement parallèle"""
+    parser = argparse.ArgumentParser(description="Shards XREF sans nœud partagé pour le chargement parallèle")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--workers", type=int, default=SHARD_WORKERS,
+                        help=f"Shards chargés en parallèle par vague (défaut: {SHARD_WORKERS})")
+    parser.add_argument("--compress", choices=sorted(CSV_COMPRESSION_SUFFIXES), help="Shards compressés")
+    args = parser.parse_args(argv)
+
+    path = find_csv_file(args.csv_dir, 'IBMi_RefArcaddesXREF.csv')
+    if path is None:
+        print("✗ CSV XREF manquant - lancez d'abord excel_github_to_csv.py")
+        return 1
+    start = time.perf_counter()
+    df_xref = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8')
+    export_xref_shards(df_xref, args.csv_dir, args.workers, resolve_csv_compression(args.compress))
+    print(f"✓ Partition terminée en {time.perf_counter() - start:.2f} s")
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
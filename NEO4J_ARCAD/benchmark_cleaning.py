@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Nettoyage des données ARCAD
+Compare le nettoyage cellule par cellule (clean_string / convert_date_arcad
+via Series.apply) au nettoyage vectorisé de clean_dataframe
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import clean_dataframe, clean_string, convert_date_arcad, encode_categoricals
+
+# Nombre de lignes du DataFrame de test
+DEFAULT_ROWS = 1_000_000
+
+def build_arcad_frame(rows, seed=42):
+    """Construit un DataFrame synthétique au format des exports ARCAD
+
+    Chaînes complétées par des espaces (comme dans les Excel), dates
+    AAAAMMJJ/AAMMJJ/0 mêlées à des blancs, heures HHMMSS flottantes.
+    """
+    rng = np.random.default_rng(seed)
+
+    def padded(values, width):
+        return np.array([v.ljust(width) for v in values], dtype=object)
+
+    names = padded([f"PGM{i:05d}" for i in range(rows // 20 + 1)], 10)
+    libraries = padded(['SPRLIBREF', 'SPFLIBREF', 'SPSRCREF', 'SPPPBDPGM'], 10)
+    types = padded(['*PGM', '*FILE', '*CMD', '*DTAARA'], 10)
+    attributes = padded(['RPG', 'RPGLE', 'CLP', 'PF', 'LF', 'DSPF', 'PRTF'], 10)
+    texts = padded([f"Description objet {i}" for i in range(500)], 50)
+
+    days = pd.Timestamp('1990-01-01') + pd.to_timedelta(rng.integers(0, 12000, rows), unit='D')
+    dates = days.strftime('%Y%m%d').astype(int).to_numpy().astype(object)
+    special = rng.random(rows)
+    dates[special < 0.05] = 0
+    dates[(special >= 0.05) & (special < 0.08)] = '        '
+    dates[(special >= 0.08) & (special < 0.10)] = 990315
+
+    times = (rng.integers(0, 24, rows) * 10000 + rng.integers(0, 60, rows) * 100
+             + rng.integers(0, 60, rows)).astype('float64')
+    times[rng.random(rows) < 0.02] = np.nan
+
+    optional = rng.choice(np.array(['QRPGSRC   ', None], dtype=object), rows)
+
+    return pd.DataFrame({
+        'LST_CELTTY': rng.choice(np.array(['O', 'M'], dtype=object), rows),
+        'LST_JOBJ': rng.choice(names, rows),
+        'LST_JLIB': rng.choice(libraries, rows),
+        'LST_CTYPE': rng.choice(types, rows),
+        'LST_CATR': rng.choice(attributes, rows),
+        'LST_JSRCF': optional,
+        'LST_CTXT': rng.choice(texts, rows),
+        'LST_TDATE': dates,
+        'LST_TTIME': times,
+        'LST_CAPP': np.full(rows, 'GRAMMEO   ', dtype=object),
+        'LST_JUPDUS': np.full(rows, 'ARCAD_PGMR', dtype=object),
+    })
+
+def clean_per_cell(df):
+    """Nettoyage historique: une fonction Python appelée par cellule"""
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].apply(clean_string)
+
+    if 'LST_TDATE' in df.columns:
+        df['LST_TDATE'] = df['LST_TDATE'].apply(convert_date_arcad)
+
+    return df
+
+def timed(function, df):
+    """Exécute function sur une copie de df et retourne (résultat, durée)"""
+    df = df.copy()
+    start = time.perf_counter()
+    result = function(df)
+    return result, time.perf_counter() - start
+
+def main(argv=None):
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark du nettoyage ARCAD")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS,
+                        help=f"Nombre de lignes du DataFrame de test (défaut: {DEFAULT_ROWS:,})")
+    args = parser.parse_args(argv)
+
+    print(f"Construction d'un DataFrame ARCAD synthétique de {args.rows:,} lignes...")
+    df = build_arcad_frame(args.rows)
+
+    df_per_cell, duration_per_cell = timed(clean_per_cell, df)
+    print(f"Nettoyage cellule par cellule: {duration_per_cell:.2f} s")
+
+    df_vectorized, duration_vectorized = timed(clean_dataframe, df)
+    print(f"Nettoyage vectorisé:           {duration_vectorized:.2f} s")
+
+    # Contrôle de non-régression: mêmes valeurs sur les colonnes communes
+    # (clean_dataframe encode CATEGORICAL_COLUMNS en category)
+    df_per_cell = encode_categoricals(df_per_cell)
+    for col in df_per_cell.columns:
+        if not df_per_cell[col].equals(df_vectorized[col]):
+            print(f"✗ Résultats différents sur la colonne {col}")
+            return 1
+    print("✓ Résultats identiques sur toutes les colonnes")
+    print(f"Accélération: x{duration_per_cell / duration_vectorized:.1f}")
+
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Benchmark - Montée en charge du pipeline Excel ARCAD -> CSV
+Génère des classeurs ARCAD synthétiques (schémas LST_* / OXR_* réels) à
+10x, 100x, 1000x les fichiers d'exemple et chronomètre chaque phase du
+traitement (lecture, nettoyage, filtrage, écriture, métadonnées, rapport)
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import (CSV_DATETIME_FORMAT, EXCEL_FILES, OBJETS_CSV, PartitionedCsvWriter,
+                                 aggregate_xref, clean_dataframe, create_metadata_csvs, filter_objets,
+                                 filter_sources, filter_xref, generate_statistics_report, peak_rss_mb,
+                                 reset_peak_rss, route_partitions)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Facteurs d'échelle par défaut (multiples des classeurs d'exemple)
+DEFAULT_SCALES = [10, 100, 1000]
+
+# Lignes de données maximales d'une feuille Excel (1 048 576 avec l'en-tête):
+# au-delà, les classeurs sont plafonnés et le résultat marqué "capped"
+EXCEL_MAX_ROWS = 1_048_575
+
+# Répertoire des classeurs générés et des résultats
+BENCH_DIR = ".bench_arcad"
+BENCH_RESULTS_FILE = "results.jsonl"
+
+# Asymétrie (loi de Zipf) des programmes par bibliothèque et des cibles XREF:
+# quelques bibliothèques concentrent les objets, quelques tables "hub" la
+# majorité des USES
+LIBRARY_SKEW = 1.1
+HUB_SKEW = 1.3
+
+# Ralentissement signalé par --compare (1.2 = +20 %)
+REGRESSION_THRESHOLD = 1.2
+
+# Phases chronométrées, dans l'ordre d'exécution
+PHASES = ['parse', 'clean', 'filter', 'write', 'metadata', 'report']
+
+# Parties fixes d'un classeur Excel minimal (une feuille, chaînes partagées)
+XLSX_NAMESPACE = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+XLSX_RELATIONSHIPS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '<Override PartName="/xl/styles.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{XLSX_RELATIONSHIPS}/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<workbook xmlns="{XLSX_NAMESPACE}" xmlns:r="{XLSX_RELATIONSHIPS}">'
+        '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets></workbook>'),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        f'<Relationship Id="rId1" Type="{XLSX_RELATIONSHIPS}/worksheet" Target="worksheets/sheet1.xml"/>'
+        f'<Relationship Id="rId2" Type="{XLSX_RELATIONSHIPS}/sharedStrings" Target="sharedStrings.xml"/>'
+        f'<Relationship Id="rId3" Type="{XLSX_RELATIONSHIPS}/styles" Target="styles.xml"/>'
+        '</Relationships>'),
+    'xl/styles.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<styleSheet xmlns="{XLSX_NAMESPACE}">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'),
+}
+
+# =========== Génération des classeurs synthétiques ===========
+
+def zipf_choice(rng, count, size, skew):
+    """Tire size indices dans [0, count) selon une loi de Zipf (rangs aléatoires)"""
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    ranks = rng.choice(count, size, p=weights / weights.sum())
+    return rng.permutation(count)[ranks]
+
+def base36_suffixes(count, width=5):
+    """Suffixes uniques A-Z0-9 de longueur fixe (noms d'objets IBMi <= 10 caractères)"""
+    alphabet = np.array(list("0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+    digits = np.arange(count)[:, None] // 36 ** np.arange(width - 1, -1, -1) % 36
+    return pd.Series(alphabet[digits].view(f'<U{width}').ravel())
+
+def read_templates():
+    """Lit les classeurs d'exemple du dépôt (données brutes, non nettoyées)"""
+    templates = {}
+    for kind, filename in EXCEL_FILES.items():
+        with pd.ExcelFile(os.path.join(SCRIPT_DIR, filename)) as workbook:
+            templates[kind] = (workbook.sheet_names[0], workbook.parse(workbook.sheet_names[0]))
+    return templates
+
+def synthetic_libraries(template, scale):
+    """Bibliothèques dérivées des bibliothèques réelles, plus nombreuses à grande échelle"""
+    real = sorted(template['LST_JLIB'].str.strip().unique())
+    variants = max(1, int(np.ceil(np.sqrt(scale))))
+    return np.array([f"{library[:7]}{variant:02d}" if variants > 1 else library
+                     for library in real for variant in range(variants)])
+
+def synthesize_objets(template, rows, scale, rng):
+    """Objets: lignes réelles rééchantillonnées, noms uniques, bibliothèques asymétriques"""
+    df = template.iloc[rng.integers(0, len(template), rows)].reset_index(drop=True)
+    names = df['LST_JOBJ'].str.strip().str[:5] + base36_suffixes(rows)
+    libraries = synthetic_libraries(template, scale)
+    library = pd.Series(libraries[zipf_choice(rng, len(libraries), rows, LIBRARY_SKEW)])
+    df['LST_JOBJ'] = names.str.ljust(10)
+    df['LST_JLIB'] = library.str.ljust(10)
+    df['LST_CIOBJX'] = df['LST_CIOBJU'] = names
+    df['LST_CIDIRX'] = df['LST_CIDIRU'] = library
+    return df
+
+def synthesize_sources(template, rows, objets, rng):
+    """Sources: membres nommés d'après les objets générés"""
+    df = template.iloc[rng.integers(0, len(template), rows)].reset_index(drop=True)
+    names = objets['LST_CIOBJX'].to_numpy()[rng.integers(0, len(objets), rows)]
+    df['LST_JOBJ'] = pd.Series(names).str.ljust(10)
+    df['LST_CIOBJX'] = df['LST_CIOBJU'] = names
+    return df
+
+def synthesize_xref(template, rows, objets, rng):
+    """XREF: appelants et cibles tirés parmi les objets générés, tables "hub" favorisées"""
+    df = template.iloc[rng.integers(0, len(template), rows)].reset_index(drop=True)
+    kind = objets['LST_CTYPE'].str.strip()
+    programmes = objets[(objets['LST_CELTTY'] == 'O') & (kind == '*PGM')]
+    files = objets[(objets['LST_CELTTY'] == 'O') & (kind == '*FILE')]
+
+    callers = programmes.iloc[zipf_choice(rng, len(programmes), rows, LIBRARY_SKEW)]
+    df['OXR_FROM_OBJ'] = callers['LST_CIOBJX'].to_numpy()
+    df['OXR_FROM_LIB'] = callers['LST_CIDIRX'].to_numpy()
+
+    for to_type, targets in [('*PGM', programmes), ('*FILE', files)]:
+        mask = (df['OXR_TO_TYPE'] == to_type).to_numpy()
+        if mask.any() and len(targets):
+            chosen = zipf_choice(rng, len(targets), int(mask.sum()), HUB_SKEW)
+            df.loc[mask, 'OXR_TO_OBJ'] = targets['LST_CIOBJX'].to_numpy()[chosen]
+    return df
+
+def column_letter(index):
+    """Lettre de colonne Excel d'un indice (0 -> A, 26 -> AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+def cell_suffixes(values, strings):
+    """Fin des cellules XML d'une colonne (après la référence), '' pour les vides
+
+    Les chaînes sont ajoutées à la table partagée strings {texte: indice},
+    comme dans les exports Excel réels.
+    """
+    cells = np.full(len(values), '', dtype=object)
+    is_string = np.fromiter((isinstance(value, str) for value in values), bool, len(values))
+    if is_string.any():
+        codes = [strings.setdefault(value, len(strings)) for value in values[is_string]]
+        cells[is_string] = ['" t="s"><v>' + str(code) + '</v></c>' for code in codes]
+    is_number = ~is_string & pd.notna(values)
+    if is_number.any():
+        numbers = pd.to_numeric(pd.Series(values[is_number]), errors='coerce').to_numpy(dtype=float)
+        integral = np.isfinite(numbers) & (numbers == np.round(numbers))
+        text = np.where(integral, np.where(integral, numbers, 0).astype(np.int64).astype(str),
+                        numbers.astype(str)).astype(object)
+        cells[is_number] = '"><v>' + text + '</v></c>'
+    return cells
+
+def write_workbook(df, path, sheet_name, chunk_size=50_000):
+    """Écrit un DataFrame en classeur Excel, en flux et avec table de chaînes partagées
+
+    openpyxl en écriture seule stocke les chaînes en ligne, ce qui ralentit
+    la relecture par rapport aux exports ARCAD: les mesures de lecture ne
+    seraient pas représentatives.
+    """
+    # Colonnes sans en-tête des exports réels (lues "Unnamed: n" par pandas)
+    header = pd.DataFrame([[None if str(col).startswith('Unnamed:') else col for col in df.columns]],
+                          columns=df.columns)
+    letters = [column_letter(index) for index in range(len(df.columns))]
+    strings = {}
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content.format(sheet_name=escape(sheet_name, {'"': '&quot;'})))
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write((f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                         f'<worksheet xmlns="{XLSX_NAMESPACE}">'
+                         f'<dimension ref="A1:{letters[-1]}{len(df) + 1}"/><sheetData>').encode('utf-8'))
+            chunks = [(1, header)] + [(first + 2, df.iloc[first:first + chunk_size])
+                                      for first in range(0, len(df), chunk_size)]
+            for start, chunk in chunks:
+                rows = np.arange(start, start + len(chunk)).astype(str).astype(object)
+                xml = '<row r="' + rows + '">'
+                for letter, column in zip(letters, chunk.columns):
+                    suffixes = cell_suffixes(chunk[column].to_numpy(dtype=object), strings)
+                    xml = xml + np.where(suffixes != '', '<c r="' + letter + rows + suffixes, '')
+                sheet.write(''.join(xml + '</row>').encode('utf-8'))
+            sheet.write(b'</sheetData></worksheet>')
+        with archive.open('xl/sharedStrings.xml', 'w', force_zip64=True) as shared:
+            shared.write((f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                          f'<sst xmlns="{XLSX_NAMESPACE}" count="{len(strings)}" '
+                          f'uniqueCount="{len(strings)}">').encode('utf-8'))
+            shared.write(''.join(f'<si><t xml:space="preserve">{escape(text)}</t></si>'
+                                 for text in strings).encode('utf-8'))
+            shared.write(b'</sst>')
+
+def generate_workbooks(workbook_dir, scale, seed):
+    """Génère (ou réutilise) les trois classeurs synthétiques d'une échelle
+
+    Retourne {type: nombre de lignes} et l'indicateur de plafonnement Excel.
+    """
+    manifest_path = os.path.join(workbook_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        print(f"✓ Classeurs x{scale} réutilisés: {workbook_dir}")
+        return manifest['rows'], manifest['capped']
+
+    start = time.perf_counter()
+    rng = np.random.default_rng(seed)
+    templates = read_templates()
+    rows = {kind: min(len(df) * scale, EXCEL_MAX_ROWS) for kind, (_, df) in templates.items()}
+    capped = any(len(df) * scale > EXCEL_MAX_ROWS for _, df in templates.values())
+
+    objets = synthesize_objets(templates['objets'][1], rows['objets'], scale, rng)
+    frames = {
+        'objets': objets,
+        'sources': synthesize_sources(templates['sources'][1], rows['sources'], objets, rng),
+        'xref': synthesize_xref(templates['xref'][1], rows['xref'], objets, rng),
+    }
+
+    tmp_dir = workbook_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    for kind, df in frames.items():
+        write_workbook(df, os.path.join(tmp_dir, EXCEL_FILES[kind]), templates[kind][0])
+    with open(os.path.join(tmp_dir, "manifest.json"), 'w', encoding='utf-8') as f:
+        json.dump({'scale': scale, 'seed': seed, 'rows': rows, 'capped': capped}, f, indent=2)
+    os.replace(tmp_dir, workbook_dir)
+
+    print(f"✓ Classeurs x{scale} générés en {time.perf_counter() - start:.1f} s: "
+          + ", ".join(f"{kind} {count:,} lignes" for kind, count in rows.items())
+          + (" (plafonnés à la limite Excel)" if capped else ""))
+    return rows, capped
+
+# =========== Mesure des phases ===========
+
+@contextlib.contextmanager
+def measured(phases, name):
+    """Chronomètre une phase (sorties console masquées) et relève son pic mémoire"""
+    reset_peak_rss()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+    phases[name] = {'seconds': round(time.perf_counter() - start, 3),
+                    'peak_rss_mb': round(peak_rss_mb(), 1)}
+
+def run_pipeline(workbook_dir, output_dir):
+    """Exécute les phases du traitement en mémoire sur les classeurs d'un répertoire
+
+    Mêmes fonctions que process_*_excel, découpées par phase; les NBRELATION
+    des extraits IBMi sont ignorées (noms synthétiques).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    phases = {}
+
+    with measured(phases, 'parse'):
+        raw = {kind: pd.read_excel(os.path.join(workbook_dir, filename), sheet_name=0)
+               for kind, filename in EXCEL_FILES.items()}
+
+    with measured(phases, 'clean'):
+        clean = {kind: clean_dataframe(df) for kind, df in raw.items()}
+        del raw
+
+    with measured(phases, 'filter'):
+        df_sources = filter_sources(clean['sources'])
+        df_objets = filter_objets(clean['objets'])
+        partitions = route_partitions(df_objets)
+        df_xref = aggregate_xref(filter_xref(clean['xref']))
+        del clean
+
+    with measured(phases, 'write'):
+        for df, filename in [(df_sources, 'IBMi_RefArcaddesSources.csv'),
+                             (df_xref, 'IBMi_RefArcaddesXREF.csv')]:
+            df.to_csv(os.path.join(output_dir, filename), index=False, encoding='utf-8',
+                      date_format=CSV_DATETIME_FORMAT)
+        partitions = {os.path.join(output_dir, filename): positions for filename, positions in partitions.items()}
+        with PartitionedCsvWriter() as writer:
+            writer.write(df_objets, {os.path.join(output_dir, OBJETS_CSV): None, **partitions})
+
+    with measured(phases, 'metadata'):
+        create_metadata_csvs(output_dir, df_objets)
+
+    with measured(phases, 'report'):
+        generate_statistics_report(df_sources, df_objets, df_xref, output_dir)
+
+    return phases
+
+def benchmark_scale(bench_dir, scale, seed, keep_output=False):
+    """Génère les classeurs d'une échelle et mesure le pipeline (processus dédié)"""
+    workbook_dir = os.path.join(bench_dir, f"x{scale}-seed{seed}")
+    rows, capped = generate_workbooks(workbook_dir, scale, seed)
+    output_dir = os.path.join(bench_dir, f"csv_x{scale}")
+    try:
+        phases = run_pipeline(workbook_dir, output_dir)
+    finally:
+        if not keep_output:
+            shutil.rmtree(output_dir, ignore_errors=True)
+    return {
+        'scale': scale,
+        'seed': seed,
+        'rows': rows,
+        'capped': capped,
+        'phases': phases,
+        'total_seconds': round(sum(phase['seconds'] for phase in phases.values()), 3),
+        'peak_rss_mb': round(max(phase['peak_rss_mb'] for phase in phases.values()), 1),
+    }
+
+# =========== Résultats ===========
+
+def git_commit():
+    """Commit courant du dépôt (None hors dépôt git)"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def read_results(path):
+    """Relit les résultats JSONL (liste vide si le fichier n'existe pas)"""
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def append_results(path, records):
+    """Ajoute des résultats au fichier JSONL"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+def print_record(record):
+    """Affiche les mesures d'une échelle"""
+    rows = record['rows']
+    print(f"\n=== ÉCHELLE x{record['scale']} ({rows['objets']:,} objets, {rows['sources']:,} sources, "
+          f"{rows['xref']:,} XREF{', plafonné' if record['capped'] else ''}) ===")
+    for name in PHASES:
+        phase = record['phases'][name]
+        print(f"  {name:<10} {phase['seconds']:>9.2f} s   pic {phase['peak_rss_mb']:>8,.0f} Mo")
+    print(f"  {'total':<10} {record['total_seconds']:>9.2f} s   pic {record['peak_rss_mb']:>8,.0f} Mo")
+
+def compare_results(records, history, reference):
+    """Compare les mesures courantes à la dernière mesure d'une référence (label ou commit)
+
+    Retourne False si une phase a ralenti au-delà de REGRESSION_THRESHOLD.
+    """
+    ok = True
+    for record in records:
+        previous = [old for old in history
+                    if old['scale'] == record['scale'] and old['seed'] == record['seed']
+                    and (old.get('label') == reference or (old.get('commit') or '').startswith(reference))]
+        if not previous:
+            print(f"⚠️ Aucune mesure x{record['scale']} pour la référence {reference}")
+            continue
+        previous = previous[-1]
+        print(f"\n=== x{record['scale']}: {reference} ({previous['timestamp']}) -> actuel ===")
+        for name in PHASES + ['total']:
+            before = previous['total_seconds'] if name == 'total' else previous['phases'][name]['seconds']
+            after = record['total_seconds'] if name == 'total' else record['phases'][name]['seconds']
+            ratio = after / before if before else float('inf')
+            regression = ratio > REGRESSION_THRESHOLD and after - before > 0.05
+            ok &= not regression
+            print(f"  {'⚠️' if regression else '✓'} {name:<10} {before:>9.2f} s -> {after:>9.2f} s (x{ratio:.2f})")
+    return ok
+
+def main(argv=None):
+    """Fonction principale"""
+    parser = argparse.ArgumentParser(description="Benchmark de montée en charge du pipeline ARCAD")
+    parser.add_argument("--scales", type=int, nargs='+', default=DEFAULT_SCALES,
+                        help=f"Facteurs d'échelle (défaut: {' '.join(map(str, DEFAULT_SCALES))})")
+    parser.add_argument("--seed", type=int, default=42,
+                        help="Graine de génération des classeurs (défaut: 42)")
+    parser.add_argument("--bench-dir", default=BENCH_DIR,
+                        help=f"Répertoire des classeurs générés et des résultats (défaut: {BENCH_DIR})")
+    parser.add_argument("--label",
+                        help="Libellé de la série de mesures (ex: version), réutilisable avec --compare")
+    parser.add_argument("--compare", metavar="REFERENCE",
+                        help="Compare aux mesures précédentes d'un libellé ou d'un commit")
+    parser.add_argument("--keep-output", action="store_true",
+                        help="Conserve les CSV produits dans le répertoire de benchmark")
+    args = parser.parse_args(argv)
+
+    results_path = os.path.join(args.bench_dir, BENCH_RESULTS_FILE)
+    history = read_results(results_path)
+    context = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+    }
+
+    records = []
+    for scale in args.scales:
+        # Un processus par échelle: la mémoire d'une échelle n'influence pas la suivante
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            record = executor.submit(benchmark_scale, args.bench_dir, scale, args.seed,
+                                     args.keep_output).result()
+        records.append({**context, **record})
+        print_record(records[-1])
+
+    append_results(results_path, records)
+    print(f"\n✓ Résultats ajoutés à {results_path}")
+
+    if args.compare:
+        return 0 if compare_results(records, history, args.compare) else 1
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
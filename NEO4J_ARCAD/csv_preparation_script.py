@@ -7,11 +7,14 @@ Date: 2025
 """
 
 import pandas as pd
+import numpy as np
 import requests
+import argparse
 import io
 import os
 from pathlib import Path
 from datetime import datetime
+from pandas.api.types import infer_dtype, is_string_dtype
 
 # Configuration GitHub
 GITHUB_BASE_URL = "https://raw.githubusercontent.com/LCOUTELLEC/IBMiNeo4jData/main/NEO4J_ARCAD/"
@@ -24,6 +27,12 @@ EXCEL_FILES = {
     "xref": "IBMi_RefArcaddesXREF.xlsx"
 }
 
+# Mode streaming: nombre de lignes Excel lues et traitées par bloc
+STREAMING_CHUNK_SIZE = 50000
+
+# Format d'écriture des colonnes datetime (LST_TDATETIME)
+CSV_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 def download_excel_from_github(filename):
     """Télécharge un fichier Excel depuis GitHub"""
     url = GITHUB_BASE_URL + filename
@@ -70,42 +79,238 @@ def convert_date_arcad(date_value):
         
     return ""
 
-def process_sources_excel(excel_data, output_dir):
-    """Traite le fichier Excel des sources"""
+def strip_text_columns(df):
+    """Applique clean_string à toutes les colonnes texte, de façon vectorisée
+    
+    Chaque colonne est factorisée: le nettoyage n'est calculé qu'une fois par
+    valeur distincte puis redistribué par indexation NumPy. Les colonnes qui
+    mêlent flottants, dates ou booléens à d'autres types (où 1 et 1.0 seraient
+    confondus par la factorisation) repassent par clean_string cellule par cellule.
+    """
+    for col in df.columns:
+        if not is_string_dtype(df[col].dtype):
+            continue
+        
+        values = df[col]
+        kind = infer_dtype(values, skipna=True)
+        if kind == 'mixed-integer' and set(map(type, values.dropna())) <= {str, int}:
+            # Entiers et chaînes ne se confondent jamais à la factorisation
+            kind = 'string'
+        
+        if kind in ('string', 'empty', 'integer', 'boolean'):
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            # Le code -1 (valeur manquante) pointe sur la chaîne vide finale
+            cleaned = np.array([str(u).strip() for u in uniques] + [""], dtype=object)
+            df[col] = cleaned[codes]
+        else:
+            df[col] = values.apply(clean_string)
+    
+    return df
+
+def normalize_arcad_dates(series):
+    """Applique convert_date_arcad à une colonne entière, de façon vectorisée
+    
+    Les dates d'un export ARCAD ont peu de valeurs distinctes: la conversion
+    n'est faite qu'une fois par valeur unique (AAAAMMJJ, AAMMJJ, Timestamp,
+    0/NaN -> ""), avec exactement la même sémantique que convert_date_arcad.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    converted = np.array([convert_date_arcad(u) for u in uniques] + [""], dtype=object)
+    return pd.Series(converted[codes], index=series.index)
+
+def combine_arcad_datetime(dates, times):
+    """Combine LST_TDATE (ISO) et LST_TTIME (HHMMSS flottant) en datetime
+    
+    84643.0 correspond à 08:46:43. Une heure absente vaut minuit; une date
+    invalide ou une heure hors bornes donne NaT.
+    """
+    # Analyse une seule fois chaque date distincte
+    codes, uniques = pd.factorize(dates, use_na_sentinel=True)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%Y-%m-%d', errors='coerce')
+    parsed = np.append(parsed.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+    
+    hhmmss = pd.to_numeric(pd.Series(times, index=dates.index), errors='coerce')
+    hhmmss = np.trunc(hhmmss.fillna(0).to_numpy(dtype='float64'))
+    hours = hhmmss // 10000
+    minutes = (hhmmss // 100) % 100
+    seconds = hhmmss % 100
+    valid = (hhmmss >= 0) & (hours < 24) & (minutes < 60) & (seconds < 60)
+    
+    offsets = np.where(valid, hours * 3600 + minutes * 60 + seconds, 0).astype('int64')
+    combined = parsed[codes] + offsets.astype('timedelta64[s]')
+    combined[~valid] = np.datetime64('NaT')
+    return pd.Series(combined, index=dates.index)
+
+def clean_dataframe(df):
+    """Nettoie les chaînes et convertit les dates ARCAD d'un DataFrame
+    
+    Ajoute la colonne LST_TDATETIME (date + heure ARCAD) à côté de LST_TTIME.
+    """
+    df = strip_text_columns(df)
+    
+    if 'LST_TDATE' in df.columns:
+        df['LST_TDATE'] = normalize_arcad_dates(df['LST_TDATE'])
+        
+        if 'LST_TTIME' in df.columns:
+            df.insert(
+                df.columns.get_loc('LST_TTIME') + 1, 'LST_TDATETIME',
+                combine_arcad_datetime(df['LST_TDATE'], df['LST_TTIME'])
+            )
+    
+    return df
+
+def filter_sources(df):
+    """Filtre les sources pertinentes (membres M de type programme ou table)"""
+    df_filtered = df[df['LST_CELTTY'] == 'M']
+    
+    # Types de sources à conserver
+    types_programmes = ['RPG', 'RPGLE', 'SQLRPG', 'SQLRPGLE', 'CLP', 'CLLE', 'CBL']
+    fichiers_sources_tables = ['QDDSSRC', 'QSQLSRC']
+    
+    return df_filtered[
+        (df_filtered['LST_CTYPE'].isin(types_programmes)) |
+        (df_filtered['LST_JSRCF'].isin(fichiers_sources_tables)) |
+        (df_filtered['LST_CTYPE'] == '*FILE')
+    ].copy()
+
+def filter_objets(df):
+    """Filtre les objets (O = objets)"""
+    return df[df['LST_CELTTY'] == 'O'].copy()
+
+def split_objets(df_filtered):
+    """Sépare les programmes (*PGM) et les tables (*FILE avec PF ou TABLE)"""
+    df_programmes = df_filtered[df_filtered['LST_CTYPE'] == '*PGM'].copy()
+    df_tables = df_filtered[
+        (df_filtered['LST_CTYPE'] == '*FILE') & 
+        (df_filtered['LST_CATR'].isin(['PF', 'TABLE']))
+    ].copy()
+    return df_programmes, df_tables
+
+def filter_xref(df):
+    """Filtre les références croisées *PGM -> *PGM et *PGM -> *FILE"""
+    return df[
+        ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*PGM')) |
+        ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*FILE'))
+    ].copy()
+
+def iter_excel_chunks(excel_data, chunk_size=STREAMING_CHUNK_SIZE):
+    """Lit la première feuille d'un Excel par blocs de chunk_size lignes
+    
+    Le classeur est parcouru en lecture seule (openpyxl read-only): seules
+    les lignes du bloc courant sont matérialisées en mémoire.
+    """
+    worksheet = excel_data.book.worksheets[0]
+    rows = worksheet.iter_rows(values_only=True)
+    
+    header = next(rows, None)
+    if header is None:
+        return
+    # Même nommage que pandas pour les colonnes sans en-tête
+    columns = [
+        str(name) if name is not None else f"Unnamed: {i}"
+        for i, name in enumerate(header)
+    ]
+    width = len(columns)
+    
+    chunk = []
+    for row in rows:
+        # Lignes entièrement vides ignorées (comme pd.read_excel)
+        if all(value is None for value in row):
+            continue
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield stabilize_numeric_types(pd.DataFrame(chunk, columns=columns))
+            chunk = []
+    
+    if chunk:
+        yield stabilize_numeric_types(pd.DataFrame(chunk, columns=columns))
+
+def stabilize_numeric_types(df):
+    """Convertit les colonnes flottantes entières en Int64
+    
+    Sans cela, une même colonne serait écrite "4" dans un bloc sans valeur
+    manquante et "4.0" dans un bloc qui en contient. Appliquée aussi à la
+    lecture complète (pd.read_excel), pour que les deux modes écrivent les
+    mêmes CSV.
+    """
+    for col in df.columns:
+        if df[col].dtype == 'float64':
+            values = df[col].dropna()
+            if (values % 1 == 0).all():
+                df[col] = df[col].astype('Int64')
+    return df
+
+def stream_excel_to_csv(excel_data, chunk_size, splitter, label):
+    """Traite un Excel en streaming: nettoyage, filtrage et écriture CSV par bloc
+    
+    splitter(chunk) renvoie un dict {fichier_csv: DataFrame} pour chaque bloc
+    nettoyé. Les CSV sont écrits au fil de l'eau; la fonction retourne le
+    nombre de lignes lues et, par fichier, la concaténation des lignes écrites.
+    Mémoire: un bloc brut à la fois plus les lignes filtrées retournées.
+    """
+    rows_read = 0
+    handles = {}
+    parts = {}
+    
+    try:
+        for chunk in iter_excel_chunks(excel_data, chunk_size):
+            rows_read += len(chunk)
+            print(f"  {label}: {rows_read:,} lignes lues...")
+            
+            chunk = clean_dataframe(chunk)
+            for output_file, part in splitter(chunk).items():
+                write_header = output_file not in handles
+                if write_header:
+                    handles[output_file] = open(output_file, 'w', encoding='utf-8', newline='')
+                part.to_csv(handles[output_file], index=False, header=write_header,
+                            date_format=CSV_DATETIME_FORMAT)
+                parts.setdefault(output_file, []).append(part)
+    finally:
+        for handle in handles.values():
+            handle.close()
+    
+    results = {
+        output_file: pd.concat(frames, ignore_index=True)
+        for output_file, frames in parts.items()
+    }
+    return rows_read, results
+
+def process_sources_excel(excel_data, output_dir, chunk_size=None):
+    """Traite le fichier Excel des sources
+    
+    Si chunk_size est fourni, la feuille est lue en streaming par blocs et le
+    CSV écrit au fil de l'eau.
+    """
     print("Traitement du fichier des sources...")
     
     try:
-        # Lire la première feuille
-        df = pd.read_excel(excel_data, sheet_name=0)
-        print(f"Sources lues: {len(df)} lignes")
-        
-        # Nettoyage des données
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(clean_string)
-        
-        # Conversion des dates
-        if 'LST_TDATE' in df.columns:
-            df['LST_TDATE'] = df['LST_TDATE'].apply(convert_date_arcad)
-        
-        # Filtrage des sources pertinentes
-        df_filtered = df[df['LST_CELTTY'] == 'M'].copy()
-        
-        # Types de sources à conserver
-        types_programmes = ['RPG', 'RPGLE', 'SQLRPG', 'SQLRPGLE', 'CLP', 'CLLE', 'CBL']
-        fichiers_sources_tables = ['QDDSSRC', 'QSQLSRC']
+        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesSources.csv')
         
-        df_filtered = df_filtered[
-            (df_filtered['LST_CTYPE'].isin(types_programmes)) |
-            (df_filtered['LST_JSRCF'].isin(fichiers_sources_tables)) |
-            (df_filtered['LST_CTYPE'] == '*FILE')
-        ]
+        if chunk_size:
+            rows_read, results = stream_excel_to_csv(
+                excel_data, chunk_size,
+                lambda chunk: {output_file: filter_sources(chunk)},
+                "Sources"
+            )
+            print(f"Sources lues: {rows_read} lignes")
+            df_filtered = results.get(output_file, pd.DataFrame())
+        else:
+            # Lire la première feuille
+            df = stabilize_numeric_types(pd.read_excel(excel_data, sheet_name=0))
+            print(f"Sources lues: {len(df)} lignes")
+            
+            # Nettoyage des données et conversion des dates
+            df = clean_dataframe(df)
+            
+            # Filtrage des sources pertinentes
+            df_filtered = filter_sources(df)
         
         print(f"Sources filtrées: {len(df_filtered)} lignes")
         
         # Sauvegarde
-        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesSources.csv')
-        df_filtered.to_csv(output_file, index=False, encoding='utf-8')
+        if not chunk_size:
+            df_filtered.to_csv(output_file, index=False, encoding='utf-8', date_format=CSV_DATETIME_FORMAT)
         print(f"✓ Sources sauvegardées: {output_file}")
         
         return df_filtered
@@ -114,48 +319,63 @@ def process_sources_excel(excel_data, output_dir):
         print(f"✗ Erreur lors du traitement des sources: {str(e)}")
         return None
 
-def process_objets_excel(excel_data, output_dir):
-    """Traite le fichier Excel des objets"""
+def process_objets_excel(excel_data, output_dir, chunk_size=None):
+    """Traite le fichier Excel des objets
+    
+    Si chunk_size est fourni, la feuille est lue en streaming par blocs et les
+    trois CSV (objets, programmes, tables) écrits au fil de l'eau.
+    """
     print("Traitement du fichier des objets...")
     
     try:
-        # Lire la première feuille
-        df = pd.read_excel(excel_data, sheet_name=0)
-        print(f"Objets lus: {len(df)} lignes")
-        
-        # Nettoyage des données
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(clean_string)
+        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesObjets.csv')
+        output_programmes = os.path.join(output_dir, 'IBMi_RefArcaddesObjets_Programmes.csv')
+        output_tables = os.path.join(output_dir, 'IBMi_RefArcaddesObjets_Tables.csv')
         
-        # Conversion des dates
-        if 'LST_TDATE' in df.columns:
-            df['LST_TDATE'] = df['LST_TDATE'].apply(convert_date_arcad)
+        if chunk_size:
+            def splitter(chunk):
+                chunk_filtered = filter_objets(chunk)
+                chunk_programmes, chunk_tables = split_objets(chunk_filtered)
+                return {
+                    output_file: chunk_filtered,
+                    output_programmes: chunk_programmes,
+                    output_tables: chunk_tables,
+                }
+            
+            rows_read, results = stream_excel_to_csv(excel_data, chunk_size, splitter, "Objets")
+            print(f"Objets lus: {rows_read} lignes")
+            df_filtered = results.get(output_file, pd.DataFrame())
+            df_programmes = results.get(output_programmes, pd.DataFrame())
+            df_tables = results.get(output_tables, pd.DataFrame())
+        else:
+            # Lire la première feuille
+            df = stabilize_numeric_types(pd.read_excel(excel_data, sheet_name=0))
+            print(f"Objets lus: {len(df)} lignes")
+            
+            # Nettoyage des données et conversion des dates
+            df = clean_dataframe(df)
+            
+            # Filtrage des objets (O = objets)
+            df_filtered = filter_objets(df)
+            df_programmes, df_tables = split_objets(df_filtered)
         
-        # Filtrage des objets (O = objets)
-        df_filtered = df[df['LST_CELTTY'] == 'O'].copy()
         print(f"Objets filtrés: {len(df_filtered)} lignes")
         
         # Sauvegarde du fichier complet
-        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesObjets.csv')
-        df_filtered.to_csv(output_file, index=False, encoding='utf-8')
+        if not chunk_size:
+            df_filtered.to_csv(output_file, index=False, encoding='utf-8', date_format=CSV_DATETIME_FORMAT)
         print(f"✓ Objets complets sauvegardés: {output_file}")
         
         # Création des fichiers spécialisés
         
         # Programmes (*PGM)
-        df_programmes = df_filtered[df_filtered['LST_CTYPE'] == '*PGM'].copy()
-        output_programmes = os.path.join(output_dir, 'IBMi_RefArcaddesObjets_Programmes.csv')
-        df_programmes.to_csv(output_programmes, index=False, encoding='utf-8')
+        if not chunk_size:
+            df_programmes.to_csv(output_programmes, index=False, encoding='utf-8', date_format=CSV_DATETIME_FORMAT)
         print(f"✓ Programmes sauvegardés: {len(df_programmes)} lignes -> {output_programmes}")
         
         # Tables (*FILE avec PF ou TABLE)
-        df_tables = df_filtered[
-            (df_filtered['LST_CTYPE'] == '*FILE') & 
-            (df_filtered['LST_CATR'].isin(['PF', 'TABLE']))
-        ].copy()
-        output_tables = os.path.join(output_dir, 'IBMi_RefArcaddesObjets_Tables.csv')
-        df_tables.to_csv(output_tables, index=False, encoding='utf-8')
+        if not chunk_size:
+            df_tables.to_csv(output_tables, index=False, encoding='utf-8', date_format=CSV_DATETIME_FORMAT)
         print(f"✓ Tables sauvegardées: {len(df_tables)} lignes -> {output_tables}")
         
         return df_filtered, df_programmes, df_tables
@@ -164,31 +384,41 @@ def process_objets_excel(excel_data, output_dir):
         print(f"✗ Erreur lors du traitement des objets: {str(e)}")
         return None, None, None
 
-def process_xref_excel(excel_data, output_dir):
-    """Traite le fichier Excel des références croisées"""
+def process_xref_excel(excel_data, output_dir, chunk_size=None):
+    """Traite le fichier Excel des références croisées
+    
+    Si chunk_size est fourni, la feuille est lue en streaming par blocs et le
+    CSV écrit au fil de l'eau.
+    """
     print("Traitement du fichier des références croisées...")
     
     try:
-        # Lire la première feuille
-        df = pd.read_excel(excel_data, sheet_name=0)
-        print(f"XREF lues: {len(df)} lignes")
-        
-        # Nettoyage des données
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(clean_string)
+        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesXREF.csv')
         
-        # Filtrage des références pertinentes
-        df_filtered = df[
-            ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*PGM')) |
-            ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*FILE'))
-        ].copy()
+        if chunk_size:
+            rows_read, results = stream_excel_to_csv(
+                excel_data, chunk_size,
+                lambda chunk: {output_file: filter_xref(chunk)},
+                "XREF"
+            )
+            print(f"XREF lues: {rows_read} lignes")
+            df_filtered = results.get(output_file, pd.DataFrame())
+        else:
+            # Lire la première feuille
+            df = stabilize_numeric_types(pd.read_excel(excel_data, sheet_name=0))
+            print(f"XREF lues: {len(df)} lignes")
+            
+            # Nettoyage des données
+            df = clean_dataframe(df)
+            
+            # Filtrage des références pertinentes
+            df_filtered = filter_xref(df)
         
         print(f"XREF filtrées: {len(df_filtered)} lignes")
         
         # Sauvegarde
-        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesXREF.csv')
-        df_filtered.to_csv(output_file, index=False, encoding='utf-8')
+        if not chunk_size:
+            df_filtered.to_csv(output_file, index=False, encoding='utf-8', date_format=CSV_DATETIME_FORMAT)
         print(f"✓ XREF sauvegardées: {output_file}")
         
         return df_filtered
@@ -337,8 +567,27 @@ def generate_statistics_report(df_sources, df_objets, df_xref, output_dir):
     except Exception as e:
         print(f"✗ Erreur lors de la génération du rapport: {str(e)}")
 
-def main():
+def parse_arguments(argv=None):
+    """Analyse les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Lecture des Excel ARCAD et génération des CSV pour Neo4j"
+    )
+    parser.add_argument(
+        "--streaming", action="store_true",
+        help="Lecture des Excel par blocs (un seul bloc brut en mémoire) avec écriture CSV incrémentale. "
+             "Pas à mémoire constante: les lignes filtrées restent en mémoire pour les phases suivantes"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=STREAMING_CHUNK_SIZE,
+        help=f"Nombre de lignes par bloc en mode streaming (défaut: {STREAMING_CHUNK_SIZE})"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Fonction principale"""
+    args = parse_arguments(argv)
+    chunk_size = args.chunk_size if args.streaming else None
+    
     print("=" * 60)
     print("TRAITEMENT DES FICHIERS EXCEL ARCAD DEPUIS GITHUB")
     print("Génération des CSV pour Neo4j")
@@ -348,6 +597,8 @@ def main():
     # Création du répertoire de sortie
     Path(OUTPUT_DIR).mkdir(exist_ok=True)
     print(f"Répertoire de sortie: {os.path.abspath(OUTPUT_DIR)}")
+    if chunk_size:
+        print(f"Mode streaming: blocs de {chunk_size:,} lignes")
     print()
     
     try:
@@ -357,7 +608,7 @@ def main():
             print("✗ Impossible de continuer sans le fichier des sources")
             return 1
             
-        df_sources = process_sources_excel(sources_excel, OUTPUT_DIR)
+        df_sources = process_sources_excel(sources_excel, OUTPUT_DIR, chunk_size)
         if df_sources is None:
             print("✗ Erreur lors du traitement des sources")
             return 1
@@ -369,7 +620,7 @@ def main():
             print("✗ Impossible de continuer sans le fichier des objets")
             return 1
             
-        df_objets, df_programmes, df_tables = process_objets_excel(objets_excel, OUTPUT_DIR)
+        df_objets, df_programmes, df_tables = process_objets_excel(objets_excel, OUTPUT_DIR, chunk_size)
         if df_objets is None:
             print("✗ Erreur lors du traitement des objets")
             return 1
@@ -381,7 +632,7 @@ def main():
             print("⚠️ Fichier XREF non accessible - relations limitées")
             df_xref = pd.DataFrame()  # DataFrame vide
         else:
-            df_xref = process_xref_excel(xref_excel, OUTPUT_DIR)
+            df_xref = process_xref_excel(xref_excel, OUTPUT_DIR, chunk_size)
             if df_xref is None:
                 df_xref = pd.DataFrame()
         print()
@@ -444,6 +695,9 @@ UTILISATION:
 3. Génère les CSV dans le dossier 'csv_neo4j'
 4. Produit un rapport de statistiques
 
+Option --streaming: lecture des Excel par blocs (--chunk-size lignes) avec
+écriture CSV incrémentale, pour les exports ARCAD volumineux.
+
 FICHIERS GÉNÉRÉS:
 ----------------
 - IBMi_RefArcaddesSources.csv : Sources filtrées
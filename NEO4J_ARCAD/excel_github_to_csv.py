@@ -7,11 +7,24 @@ Date: 2025
 """
 
 import pandas as pd
+import numpy as np
 import requests
+import argparse
+import contextlib
+import cProfile
+import gzip
+import hashlib
 import io
+import json
 import os
+import pstats
+import shutil
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
+from pandas.api.types import infer_dtype, is_string_dtype
 
 # Configuration GitHub
 GITHUB_BASE_URL = "https://raw.githubusercontent.com/LCOUTELLEC/IBMiNeo4jData/main/NEO4J_ARCAD/"
@@ -24,18 +37,322 @@ EXCEL_FILES = {
     "xref": "IBMi_RefArcaddesXREF.xlsx"
 }
 
-def download_excel_from_github(filename):
-    """Télécharge un fichier Excel depuis GitHub"""
-    url = GITHUB_BASE_URL + filename
-    print(f"Téléchargement de {filename} depuis GitHub...")
+# Mode streaming: nombre de lignes Excel lues et traitées par bloc
+STREAMING_CHUNK_SIZE = 50000
+
+# Chargement direct Neo4j (--load-neo4j): lignes par lot UNWIND et sessions parallèles
+NEO4J_BATCH_SIZE = 5000
+NEO4J_WORKERS = 4
+
+# Export neo4j-admin import (--bulk-import): fichiers de données par groupe
+BULK_IMPORT_SHARDS = 4
+
+# Format d'écriture des colonnes datetime (LST_TDATETIME)
+CSV_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Filtre des sources: types de membres programmes et fichiers sources des tables
+TYPES_PROGRAMMES = ['RPG', 'RPT', 'RPGLE', 'SQLRPG', 'SQLRPGLE', 'CLP', 'CLLE', 'CBL']
+FICHIERS_SOURCES_TABLES = ['QDDSSRC', 'QSQLSRC']
+
+# Rapport statistique: nombre d'applications, d'attributs et de nœuds (degrés
+# XREF) détaillés; le rapport texte est doublé d'un JSON
+REPORT_TOP_APPLICATIONS = 10
+REPORT_TOP_ATTRIBUTES = 15
+REPORT_TOP_DEGREES = 10
+REPORT_FILE = 'rapport_statistiques.txt'
+REPORT_JSON_FILE = 'rapport_statistiques.json'
+
+# Projection des colonnes (--project): colonnes de chaque classeur utiles au modèle
+# neo4j_data_model.md (et aux filtres, clés delta et métadonnées), dans l'ordre
+# d'écriture, avec leur type déclaré. Les autres colonnes ARCAD (sélections, audit,
+# colonne finale sans en-tête...) ne sont ni nettoyées, ni mises en cache, ni écrites.
+COLUMN_SCHEMA = {
+    'sources': {
+        'LST_CELTTY': 'category',         # filtre: M = membre source
+        'LST_JOBJ': 'object',             # name
+        'LST_JLIB': 'category',           # library
+        'LST_JSRCF': 'category',          # sourceFile
+        'LST_CTYPE': 'category',          # sourceType
+        'LST_CTXT': 'object',             # description
+        'LST_TDATE': 'object',            # lastModified (AAAA-MM-JJ)
+        'LST_TTIME': 'Int64',             # heure ARCAD HHMMSS
+        'LST_TDATETIME': 'datetime64[ns]',
+        'LST_CAPP': 'category',           # BELONGS_TO Application
+        'LST_JZSEL1': 'Int64',            # lineCount
+    },
+    'objets': {
+        'LST_CELTTY': 'category',         # filtre: O = objet
+        'LST_JOBJ': 'object',             # name
+        'LST_JLIB': 'category',           # library
+        'LST_CTYPE': 'category',          # type (TypeObjIBMi)
+        'LST_CATR': 'category',           # attribute (Attribut)
+        'LST_CCPLT': 'category',          # arcadType (TypeObjARCAD)
+        'LST_JSRCF': 'category',          # GENERATES sourceFile
+        'LST_CTXT': 'object',             # description
+        'LST_TDATE': 'object',            # lastModified (AAAA-MM-JJ)
+        'LST_TTIME': 'Int64',             # heure ARCAD HHMMSS
+        'LST_TDATETIME': 'datetime64[ns]',
+        'LST_CAPP': 'category',           # Application name
+        'LST_CENV': 'category',           # Application environment
+        'LST_CVER': 'category',           # Application version
+    },
+    'xref': {
+        'OXR_FROM_LIB': 'category',
+        'OXR_FROM_OBJ': 'object',
+        'OXR_FROM_TYPE': 'category',
+        'OXR_TO_LIB': 'category',         # non fiable (*LIBL...), conservée pour la résolution
+        'OXR_TO_OBJ': 'object',
+        'OXR_TO_TYPE': 'category',
+        'OXR_TO_LF_OBJ': 'object',        # USES logicalFile
+    },
+}
+
+# Colonnes calculées par clean_dataframe, absentes des classeurs
+DERIVED_COLUMNS = {'LST_TDATETIME'}
+
+# Colonnes ARCAD à faible cardinalité (quelques valeurs à quelques centaines):
+# encodées en category dès le nettoyage et conservées ainsi jusqu'à l'écriture
+CATEGORICAL_COLUMNS = [
+    'LST_CELTTY', 'LST_CTYPE', 'LST_CATR', 'LST_CCPLT', 'LST_CAPP', 'LST_CENV', 'LST_CVER',
+    'LST_JLIB', 'LST_JSRCF', 'LST_CSTS',
+    'OXR_CAPP', 'OXR_FROM_LIB', 'OXR_FROM_TYPE', 'OXR_TO_LIB', 'OXR_TO_TYPE', 'OXR_TO_LF_LIB',
+]
+
+# Partitions du CSV des objets: fichier -> (libellé, critères {colonne: valeurs admises}).
+# Chaque ligne est routée en une seule passe vers toutes les partitions dont elle
+# vérifie les critères: une sortie supplémentaire s'ajoute ici sans nouvelle passe,
+# par exemple 'IBMi_RefArcaddesObjets_Vues.csv': ('Vues', {'LST_CTYPE': ['*FILE'], 'LST_CATR': ['LF', 'VIEW']})
+OBJETS_CSV = 'IBMi_RefArcaddesObjets.csv'
+PROGRAMMES_CSV = 'IBMi_RefArcaddesObjets_Programmes.csv'
+TABLES_CSV = 'IBMi_RefArcaddesObjets_Tables.csv'
+OBJETS_SPLITS = {
+    PROGRAMMES_CSV: ('Programmes', {'LST_CTYPE': ['*PGM']}),
+    TABLES_CSV: ('Tables', {'LST_CTYPE': ['*FILE'], 'LST_CATR': ['PF', 'TABLE']}),
+}
+
+# Tampon d'écriture (octets) de chaque CSV partitionné et lignes converties en texte par bloc
+CSV_WRITE_BUFFER = 1 << 20
+CSV_FORMAT_ROWS = 100000
+
+# Compression des CSV générés (--compress): extension ajoutée au nom du fichier.
+# LOAD CSV de Neo4j lit directement le gzip; zstd ne sert qu'au chargeur Python.
+CSV_COMPRESSION_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+CSV_GZIP_LEVEL = 6
+CSV_ZSTD_LEVEL = 3
+CSV_MANIFEST_FILE = "manifest.json"
+CSV_FILE_SUFFIXES = ('.csv',) + tuple(f".csv{suffix}" for suffix in CSV_COMPRESSION_SUFFIXES.values())
+
+try:
+    import zstandard  # noqa: F401 - compression zstd des CSV (pandas et écriture directe)
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Colonnes XREF d'une relation CALLS/USES (bibliothèques ramenées à leur référence
+# par LIBRARY_ALIASES): clé de regroupement des XREF en une ligne pondérée par relation
+XREF_RELATION_COLUMNS = ['OXR_FROM_LIB', 'OXR_FROM_OBJ', 'OXR_FROM_TYPE', 'OXR_TO_LIB', 'OXR_TO_OBJ', 'OXR_TO_TYPE']
+XREF_LIBRARY_COLUMNS = ['OXR_FROM_LIB', 'OXR_TO_LIB']
+
+# Extraits IBMi délimités par '#' (racine du dépôt) portant NBRELATION par relation,
+# et clé de rattachement de NBRELATION aux XREF
+EXTRACTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+XREF_EXTRACT_FILES = ['IBMi_XREF_PGM.csv', 'IBMi_XREF_TABLES.csv']
+XREF_NBRELATION_KEY = ['OXR_FROM_LIB', 'OXR_FROM_OBJ', 'OXR_TO_LIB', 'OXR_TO_OBJ', 'OXR_TO_TYPE']
+XREF_EXTRACT_COLUMNS = {'SOURCELIB': 'OXR_FROM_LIB', 'SOURCEPGMNAME': 'OXR_FROM_OBJ', 'CIBLELIB': 'OXR_TO_LIB',
+                        'CIBLENAME': 'OXR_TO_OBJ', 'CIBLETYPE': 'OXR_TO_TYPE'}
+
+# Mode delta: clés de comparaison des lignes par CSV (None = toutes les colonnes)
+DELTA_DIR = "delta"
+DELTA_KEYS = {
+    'IBMi_RefArcaddesSources.csv': ['LST_JOBJ', 'LST_JLIB', 'LST_JSRCF'],
+    'IBMi_RefArcaddesObjets.csv': ['LST_JOBJ', 'LST_JLIB', 'LST_CTYPE'],
+    'IBMi_RefArcaddesObjets_Programmes.csv': ['LST_JOBJ', 'LST_JLIB'],
+    'IBMi_RefArcaddesObjets_Tables.csv': ['LST_JOBJ', 'LST_JLIB'],
+    'IBMi_RefArcaddesXREF.csv': XREF_RELATION_COLUMNS,
+}
+
+# Colonnes ajoutées à la clé delta quand le CSV les porte: bibliothèques
+# résolues des XREF (--resolve-libraries), pour que _deleted.csv désigne la
+# relation exacte (phases 1.4 / 1.5 de IBMi_Arcad_DeltaNeo4j.txt)
+DELTA_OPTIONAL_KEYS = {
+    'IBMi_RefArcaddesXREF.csv': ['OXR_FROM_RLIB', 'OXR_TO_RLIB', 'OXR_TO_RESOLUTION'],
+}
+
+# Relation du graphe désignée par une ligne (MATCH des phases 1.4 / 1.5), sur
+# XREF brutes puis résolues: des lignes qui ne diffèrent que par OXR_TO_LIB
+# partagent une relation, qui n'est supprimée que si aucune ne subsiste
+DELTA_RELATION_KEYS = {
+    'IBMi_RefArcaddesXREF.csv': (
+        ['OXR_FROM_LIB', 'OXR_FROM_OBJ', 'OXR_FROM_TYPE', 'OXR_TO_OBJ', 'OXR_TO_TYPE'],
+        ['OXR_FROM_RLIB', 'OXR_FROM_OBJ', 'OXR_FROM_TYPE', 'OXR_TO_RLIB', 'OXR_TO_OBJ', 'OXR_TO_TYPE'],
+    ),
+}
+
+# Cache local des Excel téléchargés (contenu adressé par empreinte SHA-256)
+CACHE_DIR = ".cache_arcad"
+HTTP_TIMEOUT = (10, 120)  # (connexion, lecture) en secondes
+
+# Cache Parquet des DataFrames nettoyés (avant filtrage), par empreinte de classeur.
+# Incrémenter la version dès que clean_dataframe produit un résultat différent.
+PARSED_CACHE_VERSION = 3
+
+try:
+    import pyarrow  # noqa: F401 - moteur Parquet de pandas
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Mesures d'exécution par phase (à côté de rapport_statistiques.txt)
+RUN_METRICS_FILE = "run_metrics.json"
+
+# Profils cProfile (--profile): nombre de fonctions du résumé texte par phase
+PROFILE_TOP_FUNCTIONS = 40
+
+try:
+    import resource  # pic mémoire et CPU des processus enfants (Unix)
+except ImportError:
+    resource = None
+
+# Session HTTP partagée entre les téléchargements (pool de connexions)
+HTTP_SESSION = None
+HTTP_SESSION_LOCK = threading.Lock()
+
+# Protège l'index du cache lors des téléchargements concurrents
+CACHE_INDEX_LOCK = threading.Lock()
+
+def get_http_session():
+    """Retourne la session HTTP partagée (keep-alive, pool et reprises)"""
+    global HTTP_SESSION
+    with HTTP_SESSION_LOCK:
+        if HTTP_SESSION is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=3)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            HTTP_SESSION = session
+    return HTTP_SESSION
+
+def load_cache_index(cache_dir):
+    """Charge l'index du cache: URL -> {sha256, etag, last_modified}"""
+    index_file = os.path.join(cache_dir, 'index.json')
+    if not os.path.exists(index_file):
+        return {}
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        print("⚠️ Index du cache illisible - il sera reconstruit")
+        return {}
+
+def save_cache_index(cache_dir, index):
+    """Enregistre l'index du cache (écriture atomique)"""
+    index_file = os.path.join(cache_dir, 'index.json')
+    tmp_file = index_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, index_file)
+
+def cache_blob_path(cache_dir, sha256):
+    """Chemin du contenu mis en cache pour une empreinte donnée"""
+    return os.path.join(cache_dir, 'blobs', f"{sha256}.xlsx")
+
+def store_cache_blob(cache_dir, content):
+    """Stocke un contenu dans le cache et retourne son empreinte SHA-256"""
+    sha256 = hashlib.sha256(content).hexdigest()
+    blob_file = cache_blob_path(cache_dir, sha256)
+    if not os.path.exists(blob_file):
+        Path(os.path.dirname(blob_file)).mkdir(parents=True, exist_ok=True)
+        tmp_file = blob_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_file, blob_file)
+    return sha256
+
+def read_cache_blob(cache_dir, sha256):
+    """Relit un contenu du cache (None s'il est absent)"""
+    blob_file = cache_blob_path(cache_dir, sha256)
+    if not os.path.exists(blob_file):
+        return None
+    with open(blob_file, 'rb') as f:
+        return f.read()
+
+def fetch_excel_bytes(filename, base_url=None, source_dir=None,
+                      cache_dir=CACHE_DIR, offline=False):
+    """Récupère le contenu d'un Excel ARCAD et son empreinte SHA-256
+    
+    - base_url: URL de base des Excel (GITHUB_BASE_URL par défaut)
+    - source_dir: lecture directe depuis un répertoire local, sans HTTP
+    - cache_dir: cache disque adressé par contenu, revalidé par requête
+      conditionnelle (ETag / Last-Modified); un classeur inchangé ne coûte
+      qu'une réponse 304. None désactive le cache.
+    - offline: sert le classeur depuis le cache sans aucun accès réseau
+    """
+    if source_dir:
+        with open(os.path.join(source_dir, filename), 'rb') as f:
+            content = f.read()
+        return content, hashlib.sha256(content).hexdigest(), 'local'
+    
+    url = (base_url or GITHUB_BASE_URL) + filename
+    index = load_cache_index(cache_dir) if cache_dir else {}
+    entry = index.get(url)
+    cached = read_cache_blob(cache_dir, entry['sha256']) if entry else None
+    
+    if offline:
+        if cached is None:
+            raise FileNotFoundError(f"{filename} absent du cache local ({cache_dir})")
+        return cached, entry['sha256'], 'cache'
+    
+    headers = {}
+    if cached is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+    
+    response = get_http_session().get(url, headers=headers, timeout=HTTP_TIMEOUT)
+    if response.status_code == 304 and cached is not None:
+        return cached, entry['sha256'], 'cache'
+    response.raise_for_status()
+    
+    content = response.content
+    if not cache_dir:
+        return content, hashlib.sha256(content).hexdigest(), 'http'
+    
+    sha256 = store_cache_blob(cache_dir, content)
+    with CACHE_INDEX_LOCK:
+        # Relecture sous verrou: d'autres téléchargements ont pu mettre l'index à jour
+        index = load_cache_index(cache_dir)
+        index[url] = {
+            'sha256': sha256,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'size': len(content),
+        }
+        save_cache_index(cache_dir, index)
+    return content, sha256, 'http'
+
+def download_excel_from_github(filename, base_url=None, source_dir=None,
+                               cache_dir=CACHE_DIR, offline=False):
+    """Télécharge un fichier Excel depuis GitHub (ou le cache / un répertoire local)"""
+    if source_dir:
+        print(f"Lecture de {filename} depuis {source_dir}...")
+    else:
+        print(f"Téléchargement de {filename} depuis GitHub...")
     
     try:
-        response = requests.get(url)
-        response.raise_for_status()
+        content, sha256, origin = fetch_excel_bytes(
+            filename, base_url=base_url, source_dir=source_dir,
+            cache_dir=cache_dir, offline=offline
+        )
         
         # Lire le contenu Excel directement depuis la mémoire
-        excel_data = pd.ExcelFile(io.BytesIO(response.content))
-        print(f"✓ {filename} téléchargé avec succès ({len(response.content)} bytes)")
+        excel_data = pd.ExcelFile(io.BytesIO(content))
+        if origin == 'cache':
+            print(f"✓ {filename} inchangé - servi depuis le cache ({len(content)} bytes, sha256 {sha256[:12]})")
+        elif origin == 'local':
+            print(f"✓ {filename} lu localement ({len(content)} bytes, sha256 {sha256[:12]})")
+        else:
+            print(f"✓ {filename} téléchargé avec succès ({len(content)} bytes)")
         return excel_data
         
     except Exception as e:
@@ -70,51 +387,768 @@ def convert_date_arcad(date_value):
         
     return ""
 
-def process_sources_excel(excel_data, output_dir):
-    """Traite le fichier Excel des sources"""
-    print("Traitement du fichier des sources...")
+def strip_text_columns(df):
+    """Applique clean_string à toutes les colonnes texte, de façon vectorisée
     
-    try:
-        # Lire la première feuille
-        df = pd.read_excel(excel_data, sheet_name=0)
-        print(f"Sources lues: {len(df)} lignes")
+    Chaque colonne est factorisée: le nettoyage n'est calculé qu'une fois par
+    valeur distincte puis redistribué par indexation NumPy. Les colonnes qui
+    mêlent flottants, dates ou booléens à d'autres types (où 1 et 1.0 seraient
+    confondus par la factorisation) repassent par clean_string cellule par cellule.
+    """
+    for col in df.columns:
+        if not is_string_dtype(df[col].dtype):
+            continue
+        
+        values = df[col]
+        kind = infer_dtype(values, skipna=True)
+        if kind == 'mixed-integer' and set(map(type, values.dropna())) <= {str, int}:
+            # Entiers et chaînes ne se confondent jamais à la factorisation
+            kind = 'string'
+        
+        if kind in ('string', 'empty', 'integer', 'boolean'):
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            # Le code -1 (valeur manquante) pointe sur la chaîne vide finale
+            cleaned = np.array([str(u).strip() for u in uniques] + [""], dtype=object)
+            df[col] = cleaned[codes]
+        else:
+            df[col] = values.apply(clean_string)
+    
+    return df
+
+def normalize_arcad_dates(series):
+    """Applique convert_date_arcad à une colonne entière, de façon vectorisée
+    
+    Les dates d'un export ARCAD ont peu de valeurs distinctes: la conversion
+    n'est faite qu'une fois par valeur unique (AAAAMMJJ, AAMMJJ, Timestamp,
+    0/NaN -> ""), avec exactement la même sémantique que convert_date_arcad.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    converted = np.array([convert_date_arcad(u) for u in uniques] + [""], dtype=object)
+    return pd.Series(converted[codes], index=series.index)
+
+def combine_arcad_datetime(dates, times):
+    """Combine LST_TDATE (ISO) et LST_TTIME (HHMMSS flottant) en datetime
+    
+    84643.0 correspond à 08:46:43. Une heure absente vaut minuit; une date
+    invalide ou une heure hors bornes donne NaT.
+    """
+    # Analyse une seule fois chaque date distincte
+    codes, uniques = pd.factorize(dates, use_na_sentinel=True)
+    parsed = pd.to_datetime(pd.Series(uniques, dtype=object), format='%Y-%m-%d', errors='coerce')
+    parsed = np.append(parsed.to_numpy(dtype='datetime64[ns]'), np.datetime64('NaT', 'ns'))
+    
+    hhmmss = pd.to_numeric(pd.Series(times, index=dates.index), errors='coerce')
+    hhmmss = np.trunc(hhmmss.fillna(0).to_numpy(dtype='float64'))
+    hours = hhmmss // 10000
+    minutes = (hhmmss // 100) % 100
+    seconds = hhmmss % 100
+    valid = (hhmmss >= 0) & (hours < 24) & (minutes < 60) & (seconds < 60)
+    
+    offsets = np.where(valid, hours * 3600 + minutes * 60 + seconds, 0).astype('int64')
+    combined = parsed[codes] + offsets.astype('timedelta64[s]')
+    combined[~valid] = np.datetime64('NaT')
+    return pd.Series(combined, index=dates.index)
+
+def encode_categoricals(df):
+    """Encode en category les colonnes texte de CATEGORICAL_COLUMNS
+    
+    Les catégories sont triées: filtres, regroupements et écritures CSV
+    donnent les mêmes résultats qu'avec les chaînes d'origine.
+    """
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns and df[col].dtype == object and infer_dtype(df[col]) in ('string', 'empty'):
+            df[col] = df[col].astype('category')
+    return df
+
+def concat_frames(frames, **kwargs):
+    """Concatène des blocs en conservant leurs colonnes category
+    
+    pd.concat repasse en object les catégories qui diffèrent d'un bloc à
+    l'autre: chaque bloc est d'abord aligné sur l'union triée des catégories.
+    """
+    frames = list(frames)
+    if len(frames) > 1:
+        for col in frames[0].columns:
+            if not all(isinstance(frame[col].dtype, pd.CategoricalDtype) for frame in frames if col in frame):
+                continue
+            categories = pd.Index(sorted(set().union(*(frame[col].cat.categories for frame in frames))))
+            frames = [frame.assign(**{col: frame[col].cat.set_categories(categories)}) for frame in frames]
+    return pd.concat(frames, **kwargs)
+
+def profile_columns(df, columns):
+    """Effectifs des valeurs de plusieurs colonnes, un seul passage par colonne
+
+    Retourne {colonne: DataFrame [value, count]} dans l'ordre d'apparition des
+    valeurs (manquantes exclues des effectifs comme dans value_counts, chaîne
+    vide '' comptée comme une valeur, colonnes absentes ignorées): valeurs
+    distinctes des métadonnées et répartitions du rapport se lisent sur le
+    même profil.
+    """
+    profiles = {}
+    for column in columns:
+        if df is None or column not in df.columns:
+            continue
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            codes, uniques = pd.factorize(series)
+        valid = codes[codes >= 0]
+        order = pd.unique(valid)
+        counts = np.bincount(valid, minlength=len(uniques))
+        profiles[column] = pd.DataFrame({'value': uniques.take(order), 'count': counts[order]})
+    return profiles
+
+def profile_counts(profile):
+    """Effectifs décroissants d'un profil (même ordre que value_counts)"""
+    return profile.set_index('value')['count'].sort_values(ascending=False)
+
+def clean_dataframe(df):
+    """Nettoie les chaînes et convertit les dates ARCAD d'un DataFrame
+    
+    Ajoute la colonne LST_TDATETIME (date + heure ARCAD) à côté de LST_TTIME
+    et encode en category les colonnes à faible cardinalité.
+    """
+    df = strip_text_columns(df)
+    
+    if 'LST_TDATE' in df.columns:
+        df['LST_TDATE'] = normalize_arcad_dates(df['LST_TDATE'])
         
-        # Afficher les colonnes pour diagnostic
+        if 'LST_TTIME' in df.columns:
+            df.insert(
+                df.columns.get_loc('LST_TTIME') + 1, 'LST_TDATETIME',
+                combine_arcad_datetime(df['LST_TDATE'], df['LST_TTIME'])
+            )
+    
+    return encode_categoricals(df)
+
+def schema_read_columns(schema):
+    """Colonnes à lire dans le classeur pour un schéma (None = toutes)"""
+    if schema is None:
+        return None
+    return {col for col in schema if col not in DERIVED_COLUMNS}
+
+def apply_column_schema(df, schema):
+    """Projette un DataFrame nettoyé sur les colonnes du schéma et applique leurs types
+    
+    Les colonnes du schéma absentes du classeur sont ignorées. Une valeur non
+    convertible dans le type déclaré devient manquante.
+    """
+    if schema is None:
+        return df
+    df = df[[col for col in schema if col in df.columns]]
+    for col in df.columns:
+        dtype = schema[col]
+        if df[col].dtype == dtype:
+            continue
+        if dtype == 'Int64':
+            values = pd.to_numeric(df[col].replace('', np.nan), errors='coerce')
+            df[col] = values.where(values % 1 == 0).astype('Int64')
+        elif dtype.startswith('datetime64'):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
+
+def filter_sources(df):
+    """Filtre les sources pertinentes (membres M de type programme ou table)"""
+    if 'LST_CELTTY' in df.columns:
+        df = df[df['LST_CELTTY'] == 'M']
+    
+    if 'LST_CTYPE' in df.columns:
+        df = df[
+            (df['LST_CTYPE'].isin(TYPES_PROGRAMMES)) |
+            (df['LST_JSRCF'].isin(FICHIERS_SOURCES_TABLES) if 'LST_JSRCF' in df.columns else False) |
+            (df['LST_CTYPE'] == '*FILE')
+        ]
+    
+    return df.copy()
+
+def filter_objets(df):
+    """Filtre les objets (O = objets)"""
+    if 'LST_CELTTY' in df.columns:
+        return df[df['LST_CELTTY'] == 'O'].copy()
+    return df.copy()
+
+def route_partitions(df, splits=OBJETS_SPLITS):
+    """Positions des lignes de df pour chaque partition de splits, en une passe
+    
+    Chaque colonne de critère est factorisée une seule fois; les critères sont
+    évalués sur les valeurs distinctes puis propagés aux lignes par leurs codes.
+    Retourne {fichier: positions triées}; les partitions dont une colonne de
+    critère manque sont absentes du résultat.
+    """
+    columns = {col for _, criteria in splits.values() for col in criteria if col in df.columns}
+    codes = {col: pd.factorize(df[col], use_na_sentinel=False) for col in columns}
+    
+    partitions = {}
+    for filename, (_, criteria) in splits.items():
+        if not all(col in codes for col in criteria):
+            continue
+        mask = np.ones(len(df), dtype=bool)
+        for col, values in criteria.items():
+            col_codes, uniques = codes[col]
+            mask &= pd.Index(uniques).isin(values)[col_codes]
+        partitions[filename] = np.flatnonzero(mask)
+    return partitions
+
+def split_objets(df_filtered):
+    """Sépare les programmes (*PGM) et les tables (*FILE avec PF ou TABLE)"""
+    partitions = route_partitions(df_filtered)
+    return tuple(
+        df_filtered.take(partitions[filename]) if filename in partitions else pd.DataFrame()
+        for filename in (PROGRAMMES_CSV, TABLES_CSV)
+    )
+
+def filter_xref(df):
+    """Filtre les références croisées *PGM -> *PGM et *PGM -> *FILE"""
+    if all(col in df.columns for col in ['OXR_FROM_TYPE', 'OXR_TO_TYPE']):
+        return df[
+            ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*PGM')) |
+            ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*FILE'))
+        ].copy()
+    return df.copy()
+
+def load_xref_nbrelation(extracts_dir):
+    """Charge NBRELATION par relation depuis les extraits IBMi_XREF_*
+    
+    Une relation est identifiée par XREF_NBRELATION_KEY (appelant et cible
+    par bibliothèque et nom, type de la cible), bibliothèques ramenées à leur
+    référence ARCAD par LIBRARY_ALIASES. Les extraits sont lus par blocs
+    (ibmi_extracts) et réduits au fil de l'eau: la mémoire ne dépend que du
+    nombre de relations. Retourne un DataFrame XREF_NBRELATION_KEY +
+    [NBRELATION] ou None si aucun extrait n'est présent.
+    """
+    from ibmi_extracts import EXTRACT_SPECS, LIBRARY_ALIASES, iter_extract_chunks
+    
+    frames = []
+    for spec in EXTRACT_SPECS.values():
+        path = os.path.join(extracts_dir, spec['file']) if extracts_dir else None
+        if spec['file'] not in XREF_EXTRACT_FILES or not path or not os.path.exists(path):
+            continue
+        try:
+            for chunk in iter_extract_chunks(path, spec, usecols=list(XREF_EXTRACT_COLUMNS) + ['NBRELATION']):
+                chunk = chunk.dropna(subset=['NBRELATION']).rename(columns=XREF_EXTRACT_COLUMNS)
+                for col in XREF_LIBRARY_COLUMNS:
+                    chunk[col] = chunk[col].replace(LIBRARY_ALIASES)
+                frames.append(chunk.groupby(XREF_NBRELATION_KEY, as_index=False, dropna=False)['NBRELATION'].max())
+        except (KeyError, ValueError):
+            print(f"⚠️ {spec['file']}: colonnes {', '.join(XREF_EXTRACT_COLUMNS)} ou NBRELATION "
+                  f"non trouvées - ignoré")
+    if not frames:
+        return None
+    nbrelation = pd.concat(frames, ignore_index=True)
+    nbrelation = nbrelation.groupby(XREF_NBRELATION_KEY, as_index=False, dropna=False)['NBRELATION'].max()
+    return nbrelation.astype({'NBRELATION': 'Int64'})
+
+def xref_relation_keys(df):
+    """Clés XREF_RELATION_COLUMNS des XREF, bibliothèques ramenées par LIBRARY_ALIASES"""
+    from ibmi_extracts import LIBRARY_ALIASES
+    
+    keys = pd.DataFrame({col: df[col].astype(object) for col in XREF_RELATION_COLUMNS})
+    for col in XREF_LIBRARY_COLUMNS:
+        keys[col] = keys[col].replace(LIBRARY_ALIASES)
+    return keys
+
+def xref_nbrelation(keys, nbrelation):
+    """NBRELATION de chaque relation (keys: xref_relation_keys)
+    
+    Correspondance exacte sur XREF_NBRELATION_KEY; une bibliothèque donnée
+    par liste de bibliothèques (*LIBL, *CURLIB...: inconnue avant résolution)
+    est écartée de la clé pour sa ligne, NBRELATION étant alors le maximum
+    des relations correspondant au reste de la clé.
+    """
+    from arcad_resolution import LIBRARY_LIST_MARKERS
+    
+    listed = {col: (keys[col].isna() | keys[col].isin(LIBRARY_LIST_MARKERS)).to_numpy()
+              for col in XREF_LIBRARY_COLUMNS}
+    values = pd.Series(pd.NA, index=keys.index, dtype='Int64')
+    for unknown in ([], ['OXR_FROM_LIB'], ['OXR_TO_LIB'], XREF_LIBRARY_COLUMNS):
+        rows = np.logical_and.reduce([listed[col] if col in unknown else ~listed[col]
+                                      for col in XREF_LIBRARY_COLUMNS])
+        if not rows.any():
+            continue
+        on = [col for col in XREF_NBRELATION_KEY if col not in unknown]
+        weights = nbrelation.groupby(on, as_index=False, dropna=False)['NBRELATION'].max() if unknown \
+            else nbrelation
+        values[rows] = keys.loc[rows, on].merge(weights, on=on, how='left')['NBRELATION'].to_numpy()
+    return values
+
+def aggregate_xref(df, nbrelation=None):
+    """Regroupe les XREF en une ligne par relation, pondérée
+    
+    Clé: XREF_RELATION_COLUMNS, bibliothèques ramenées par LIBRARY_ALIASES;
+    les autres colonnes gardent la dernière occurrence (sémantique MERGE + SET).
+    NB_OCCURRENCES compte les lignes regroupées; NBRELATION, si les extraits
+    IBMi sont fournis, reprend le nombre de relations déclaré pour la relation
+    (xref_nbrelation).
+    """
+    if not all(col in df.columns for col in XREF_RELATION_COLUMNS):
+        return df
+    
+    keys = xref_relation_keys(df)
+    occurrences = keys.groupby(XREF_RELATION_COLUMNS, sort=False, dropna=False)[XREF_RELATION_COLUMNS[0]] \
+        .transform('size')
+    last = ~keys.duplicated(keep='last').to_numpy()
+    df = df.assign(NB_OCCURRENCES=occurrences.astype('int64').to_numpy())[last].reset_index(drop=True)
+    
+    if nbrelation is not None:
+        df['NBRELATION'] = xref_nbrelation(keys[last].reset_index(drop=True), nbrelation).array
+    return df
+
+def iter_excel_chunks(excel_data, chunk_size=STREAMING_CHUNK_SIZE, usecols=None):
+    """Lit la première feuille d'un Excel par blocs de chunk_size lignes
+    
+    Le classeur est parcouru en lecture seule (openpyxl read-only): seules
+    les lignes du bloc courant sont matérialisées en mémoire. Avec usecols
+    (noms de colonnes), seules ces colonnes sont conservées dans les blocs.
+    """
+    worksheet = excel_data.book.worksheets[0]
+    rows = worksheet.iter_rows(values_only=True)
+    
+    header = next(rows, None)
+    if header is None:
+        return
+    # Même nommage que pandas pour les colonnes sans en-tête
+    columns = [
+        str(name) if name is not None else f"Unnamed: {i}"
+        for i, name in enumerate(header)
+    ]
+    width = len(columns)
+    positions = None
+    if usecols is not None:
+        positions = [i for i, name in enumerate(columns) if name in usecols]
+        columns = [columns[i] for i in positions]
+    
+    chunk = []
+    for row in rows:
+        # Lignes entièrement vides ignorées (comme pd.read_excel)
+        if all(value is None for value in row):
+            continue
+        row = tuple(row[:width]) + (None,) * (width - len(row))
+        if positions is not None:
+            row = tuple(row[i] for i in positions)
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield stabilize_numeric_types(pd.DataFrame(chunk, columns=columns))
+            chunk = []
+    
+    if chunk:
+        yield stabilize_numeric_types(pd.DataFrame(chunk, columns=columns))
+
+def stabilize_numeric_types(df):
+    """Convertit les colonnes flottantes entières en Int64
+    
+    Sans cela, une même colonne serait écrite "4" dans un bloc sans valeur
+    manquante et "4.0" dans un bloc qui en contient. Appliquée aussi à la
+    lecture complète (pd.read_excel), pour que les deux modes écrivent les
+    mêmes CSV.
+    """
+    for col in df.columns:
+        if df[col].dtype == 'float64':
+            values = df[col].dropna()
+            if (values % 1 == 0).all():
+                df[col] = df[col].astype('Int64')
+    return df
+
+def workbook_sha256(excel_data):
+    """Calcule l'empreinte SHA-256 du contenu brut d'un classeur"""
+    source = excel_data.io
+    if hasattr(source, 'getvalue'):
+        return hashlib.sha256(source.getvalue()).hexdigest()
+    with open(source, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def workbook_size(excel_data):
+    """Taille en octets du contenu brut d'un classeur"""
+    source = excel_data.io
+    if hasattr(source, 'getbuffer'):
+        return source.getbuffer().nbytes
+    return os.path.getsize(source)
+
+def parsed_cache_path(cache_dir, kind, excel_data, chunk_size=None, schema=None):
+    """Retourne le répertoire Parquet d'un classeur nettoyé, ou None sans cache
+    
+    La clé combine le type de classeur, l'empreinte du contenu, la version du
+    nettoyage et le mode de lecture (les types produits par pd.read_excel et
+    par la lecture en streaming diffèrent légèrement), ainsi que l'empreinte
+    du schéma de colonnes en mode --project.
+    """
+    if not cache_dir:
+        return None
+    if not PARQUET_AVAILABLE:
+        print("⚠️ pyarrow non installé - cache Parquet des données nettoyées désactivé")
+        return None
+    mode = f"stream{chunk_size}" if chunk_size else "full"
+    if schema:
+        mode += "-cols" + hashlib.sha256(json.dumps(schema).encode('utf-8')).hexdigest()[:8]
+    sha256 = workbook_sha256(excel_data)
+    return os.path.join(cache_dir, 'parsed',
+                        f"{kind}-{sha256[:16]}-v{PARSED_CACHE_VERSION}-{mode}")
+
+def read_parsed_cache(cache_path):
+    """Itère sur les blocs Parquet d'une entrée de cache complète"""
+    for part in sorted(os.listdir(cache_path)):
+        if part.endswith('.parquet'):
+            yield pd.read_parquet(os.path.join(cache_path, part))
+
+class ParsedCacheWriter:
+    """Écrit les blocs nettoyés d'un classeur dans une entrée de cache Parquet
+    
+    Les blocs sont écrits dans un répertoire temporaire renommé à la fin
+    (commit): une entrée visible est toujours complète. Une erreur d'écriture
+    désactive le cache pour ce classeur sans interrompre le traitement.
+    """
+    
+    def __init__(self, cache_path):
+        self.cache_path = cache_path
+        self.tmp_path = f"{cache_path}.tmp-{os.getpid()}" if cache_path else None
+        self.parts = 0
+        if self.tmp_path:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            os.makedirs(self.tmp_path)
+    
+    def write(self, df):
+        if not self.tmp_path:
+            return
+        try:
+            df.to_parquet(os.path.join(self.tmp_path, f"part-{self.parts:05d}.parquet"), index=False)
+            self.parts += 1
+        except Exception as e:
+            print(f"⚠️ Écriture du cache Parquet impossible: {str(e)}")
+            self.discard()
+    
+    def commit(self):
+        if not self.tmp_path:
+            return
+        try:
+            os.replace(self.tmp_path, self.cache_path)
+        except OSError:
+            # Entrée déjà produite par une exécution concurrente
+            pass
+        self.discard()
+    
+    def discard(self):
+        if self.tmp_path:
+            shutil.rmtree(self.tmp_path, ignore_errors=True)
+            self.tmp_path = None
+
+def iter_clean_chunks(excel_data, chunk_size, cache_path=None, schema=None):
+    """Itère sur les blocs nettoyés d'un classeur lu en streaming
+    
+    Les blocs sont relus depuis le cache Parquet s'il existe; sinon ils sont
+    lus dans l'Excel, nettoyés et enregistrés dans le cache au passage.
+    Avec schema (COLUMN_SCHEMA), seules ses colonnes sont lues et nettoyées.
+    """
+    if cache_path and os.path.isdir(cache_path):
+        print(f"✓ Données nettoyées relues depuis le cache: {cache_path}")
+        yield from read_parsed_cache(cache_path)
+        return
+    
+    writer = ParsedCacheWriter(cache_path)
+    try:
+        for chunk in iter_excel_chunks(excel_data, chunk_size, schema_read_columns(schema)):
+            chunk = apply_column_schema(clean_dataframe(chunk), schema)
+            writer.write(chunk)
+            yield chunk
+        writer.commit()
+    finally:
+        writer.discard()
+
+def load_clean_dataframe(excel_data, cache_path=None, schema=None):
+    """Lit et nettoie la première feuille d'un classeur, via le cache Parquet
+    
+    Retourne le DataFrame nettoyé, avant filtrage: les filtres s'appliquent
+    donc aussi aux données relues depuis le cache. Avec schema
+    (COLUMN_SCHEMA), seules ses colonnes sont lues (usecols) et nettoyées.
+    """
+    if cache_path and os.path.isdir(cache_path):
+        print(f"✓ Données nettoyées relues depuis le cache: {cache_path}")
+        df = concat_frames(read_parsed_cache(cache_path), ignore_index=True)
         print(f"Colonnes trouvées: {list(df.columns)}")
+        return df
+    
+    read_columns = schema_read_columns(schema)
+    df = stabilize_numeric_types(pd.read_excel(
+        excel_data, sheet_name=0, usecols=None if read_columns is None else lambda name: name in read_columns))
+    
+    # Afficher les colonnes pour diagnostic
+    print(f"Colonnes trouvées: {list(df.columns)}")
+    
+    # Nettoyage des données et conversion des dates
+    df = apply_column_schema(clean_dataframe(df), schema)
+    
+    writer = ParsedCacheWriter(cache_path)
+    writer.write(df)
+    writer.commit()
+    return df
+
+def resolve_csv_compression(compression):
+    """Valide l'algorithme demandé par --compress (zstd -> gzip si zstandard manque)"""
+    if compression == 'zstd' and not ZSTD_AVAILABLE:
+        print("⚠️ zstandard non installé - CSV compressés en gzip")
+        return 'gzip'
+    return compression
+
+def csv_output_path(output_dir, filename, compression=None):
+    """Chemin d'un CSV généré, suffixé selon la compression
+    
+    Les variantes du même fichier laissées par une exécution précédente dans
+    un autre format sont supprimées, pour que les lecteurs (find_csv_file)
+    ne relisent jamais une version périmée.
+    """
+    path = os.path.join(output_dir, filename) + CSV_COMPRESSION_SUFFIXES.get(compression, '')
+    for stale in csv_variants(os.path.join(output_dir, filename)):
+        if stale != path and os.path.exists(stale):
+            os.remove(stale)
+    return path
+
+def csv_variants(path):
+    """Chemins possibles d'un CSV: texte brut puis chaque format compressé"""
+    return [path] + [path + suffix for suffix in CSV_COMPRESSION_SUFFIXES.values()]
+
+def find_csv_file(directory, filename):
+    """Chemin du CSV généré, brut ou compressé (None si absent)"""
+    for path in csv_variants(os.path.join(directory, filename)):
+        if os.path.exists(path):
+            return path
+    return None
+
+def csv_compression_options(path):
+    """Options de compression pandas déterministes (mtime gzip nul) selon l'extension"""
+    if path.endswith(CSV_COMPRESSION_SUFFIXES['gzip']):
+        return {'method': 'gzip', 'compresslevel': CSV_GZIP_LEVEL, 'mtime': 0}
+    if path.endswith(CSV_COMPRESSION_SUFFIXES['zstd']):
+        return {'method': 'zstd', 'level': CSV_ZSTD_LEVEL}
+    return None
+
+def write_csv(df, path, **kwargs):
+    """Écrit un CSV généré (UTF-8), compressé selon l'extension de path"""
+    df.to_csv(path, index=False, encoding='utf-8', compression=csv_compression_options(path), **kwargs)
+
+def open_csv_output(path, buffer_size=CSV_WRITE_BUFFER):
+    """Ouvre un CSV généré en écriture texte, compressé selon l'extension de path"""
+    options = csv_compression_options(path)
+    if options is None:
+        return open(path, 'w', encoding='utf-8', newline='', buffering=buffer_size)
+    if options['method'] == 'gzip':
+        stream = gzip.GzipFile(path, 'wb', compresslevel=options['compresslevel'], mtime=0)
+    else:
+        stream = zstandard.ZstdCompressor(level=options['level']).stream_writer(open(path, 'wb'), closefd=True)
+    return io.TextIOWrapper(io.BufferedWriter(stream, buffer_size), encoding='utf-8', newline='')
+
+def open_csv_binary(path):
+    """Ouvre un CSV généré en lecture binaire décompressée"""
+    options = csv_compression_options(path)
+    if options is None:
+        return open(path, 'rb')
+    if options['method'] == 'gzip':
+        return gzip.open(path, 'rb')
+    return zstandard.open(path, 'rb')
+
+def write_csv_manifest(output_dir, compression):
+    """Écrit le manifeste des CSV générés: taille, taille décompressée et SHA-256
+    
+    Le SHA-256 porte sur le fichier tel que transféré (compressé ou non).
+    """
+    files = []
+    for filename in sorted(os.listdir(output_dir)):
+        if not filename.endswith(CSV_FILE_SUFFIXES):
+            continue
+        path = os.path.join(output_dir, filename)
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        uncompressed = 0
+        with open_csv_binary(path) as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                uncompressed += len(block)
+        files.append({
+            'file': filename,
+            'compression': next((name for name, suffix in CSV_COMPRESSION_SUFFIXES.items()
+                                 if filename.endswith(suffix)), None),
+            'bytes': os.path.getsize(path),
+            'uncompressed_bytes': uncompressed,
+            'sha256': digest.hexdigest(),
+        })
+    
+    manifest_file = os.path.join(output_dir, CSV_MANIFEST_FILE)
+    with open(manifest_file, 'w', encoding='utf-8') as f:
+        json.dump({'generated_at': datetime.now().isoformat(timespec='seconds'),
+                   'compression': compression, 'files': files}, f, indent=2)
+    
+    stored = sum(entry['bytes'] for entry in files)
+    raw = sum(entry['uncompressed_bytes'] for entry in files)
+    print(f"✓ Manifeste: {len(files)} CSV, {stored:,} bytes pour {raw:,} bytes bruts "
+          f"(x{raw / stored if stored else 0:.1f}) -> {manifest_file}")
+    return files
+
+class PartitionedCsvWriter:
+    """Écrit un DataFrame et ses partitions dans plusieurs CSV en une passe
+    
+    Les lignes sont converties une seule fois en texte CSV, par blocs de
+    format_rows lignes; chaque bloc est ensuite distribué aux fichiers des
+    partitions, écrits en parallèle (threads: les écritures libèrent le GIL)
+    à travers des fichiers tamponnés. S'utilise aussi bloc par bloc en
+    streaming: l'en-tête n'est écrit qu'une fois par fichier.
+    """
+    
+    def __init__(self, buffer_size=CSV_WRITE_BUFFER, format_rows=CSV_FORMAT_ROWS):
+        self.buffer_size = buffer_size
+        self.format_rows = format_rows
+        self.handles = {}
+        self.executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def write(self, df, partitions):
+        """Écrit df dans les fichiers de partitions {fichier: positions triées, None = toutes les lignes}"""
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=max(len(partitions), 1),
+                                               thread_name_prefix="csv-writer")
         
-        # Nettoyage des données
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(clean_string)
+        for start in range(0, max(len(df), 1), self.format_rows):
+            stop = start + self.format_rows
+            block = df.iloc[start:stop]
+            lines = block.to_csv(index=False, date_format=CSV_DATETIME_FORMAT, lineterminator='\n').split('\n')
+            header, rows = lines[0] + '\n', np.array(lines[1:-1], dtype=object)
+            if len(rows) != len(block):
+                # Champ contenant un saut de ligne: conversion séparée par partition
+                rows = None
+            
+            futures = []
+            for output_file, positions in partitions.items():
+                if positions is not None:
+                    positions = positions[np.searchsorted(positions, start):np.searchsorted(positions, stop)] - start
+                futures.append(self.executor.submit(self.write_partition, output_file, block,
+                                                    header, rows, positions))
+            for future in futures:
+                future.result()
+    
+    def write_partition(self, output_file, block, header, rows, positions):
+        """Ajoute à un fichier les lignes d'une partition du bloc (en-tête à la première écriture)"""
+        handle = self.handles.get(output_file)
+        if handle is None:
+            handle = open_csv_output(output_file, self.buffer_size)
+            self.handles[output_file] = handle
+            handle.write(header)
         
-        # Conversion des dates
-        if 'LST_TDATE' in df.columns:
-            df['LST_TDATE'] = df['LST_TDATE'].apply(convert_date_arcad)
+        if rows is None:
+            part = block if positions is None else block.take(positions)
+            part.to_csv(handle, index=False, header=False, date_format=CSV_DATETIME_FORMAT, lineterminator='\n')
+            return
+        if positions is not None:
+            rows = rows[positions]
+        if len(rows):
+            handle.write('\n'.join(rows))
+            handle.write('\n')
+    
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        for handle in self.handles.values():
+            handle.close()
+        self.handles = {}
+
+def stream_excel_to_csv(excel_data, chunk_size, splitter, label, cache_path=None, write_output=True, schema=None):
+    """Traite un Excel en streaming: nettoyage, filtrage et écriture CSV par bloc
+    
+    splitter(chunk) renvoie, pour chaque bloc nettoyé, le bloc filtré et ses
+    partitions {fichier_csv: positions, None = toutes les lignes}. Les CSV sont
+    écrits au fil de l'eau (PartitionedCsvWriter); la fonction retourne le
+    nombre de lignes lues et, par fichier, la concaténation des lignes écrites.
+    Les blocs nettoyés passent par le cache Parquet si cache_path est fourni.
+    Avec write_output=False, les blocs filtrés sont seulement collectés (écriture
+    différée à l'appelant, par exemple après un regroupement global).
+    Avec schema, seules les colonnes du schéma sont lues et écrites.
+    
+    Mémoire: un bloc brut à la fois, plus l'ensemble des lignes filtrées
+    (retournées aux phases suivantes: métadonnées, rapport, delta). Le pic
+    croît donc avec le volume filtré, pas avec celui du classeur.
+    """
+    rows_read = 0
+    parts = {}
+    
+    with PartitionedCsvWriter() as writer:
+        for chunk in iter_clean_chunks(excel_data, chunk_size, cache_path, schema):
+            if rows_read == 0:
+                # Afficher les colonnes pour diagnostic
+                print(f"Colonnes trouvées: {list(chunk.columns)}")
+            rows_read += len(chunk)
+            print(f"  {label}: {rows_read:,} lignes lues...")
+            
+            filtered, partitions = splitter(chunk)
+            for output_file, positions in partitions.items():
+                part = filtered if positions is None else filtered.take(positions)
+                parts.setdefault(output_file, []).append(part)
+            if write_output:
+                writer.write(filtered, partitions)
+    
+    results = {
+        output_file: concat_frames(frames, ignore_index=True)
+        for output_file, frames in parts.items()
+    }
+    return rows_read, results
+
+def process_sources_excel(excel_data, output_dir, chunk_size=None, cache_dir=None, metrics=None,
+                          compression=None, schema=None):
+    """Traite le fichier Excel des sources
+    
+    Si chunk_size est fourni, la feuille est lue en streaming par blocs et le
+    CSV écrit au fil de l'eau (mémoire: un bloc brut plus les lignes filtrées).
+
+    Avec cache_dir, les données nettoyées sont mises en cache au format
+    Parquet et relues sans analyse Excel tant que le classeur ne change pas.
+    Avec metrics (dict produit par measure_phase), les volumes lus et écrits
+    y sont renseignés. Avec compression ('gzip' ou 'zstd'), les CSV sont
+    écrits directement compressés (suffixe .gz ou .zst). Avec schema
+    (COLUMN_SCHEMA[...]), seules les colonnes du schéma sont lues et écrites.
+    """
+    print("Traitement du fichier des sources...")
+    metrics = {} if metrics is None else metrics
+    
+    try:
+        output_file = csv_output_path(output_dir, 'IBMi_RefArcaddesSources.csv', compression)
+        metrics['bytes_read'] = workbook_size(excel_data)
+        cache_path = parsed_cache_path(cache_dir, 'sources', excel_data, chunk_size, schema)
         
-        # Filtrage des sources pertinentes
-        if 'LST_CELTTY' in df.columns:
-            df_filtered = df[df['LST_CELTTY'] == 'M'].copy()
+        if chunk_size:
+            rows_read, results = stream_excel_to_csv(
+                excel_data, chunk_size,
+                lambda chunk: (filter_sources(chunk), {output_file: None}),
+                "Sources", cache_path, schema=schema
+            )
+            df_filtered = results.get(output_file, pd.DataFrame())
+            print(f"Sources lues: {rows_read} lignes")
+            metrics['rows_in'] = rows_read
+            columns = df_filtered.columns
         else:
-            print("⚠️ Colonne LST_CELTTY non trouvée - conservation de toutes les lignes")
-            df_filtered = df.copy()
-        
-        # Types de sources à conserver
-        types_programmes = ['RPG', 'RPT', 'RPGLE', 'SQLRPG', 'SQLRPGLE', 'CLP', 'CLLE', 'CBL']
-        fichiers_sources_tables = ['QDDSSRC', 'QSQLSRC']
+            # Lire et nettoyer la première feuille (ou la relire depuis le cache)
+            df = load_clean_dataframe(excel_data, cache_path, schema)
+            print(f"Sources lues: {len(df)} lignes")
+            metrics['rows_in'] = len(df)
+            
+            # Filtrage des sources pertinentes
+            df_filtered = filter_sources(df)
+            columns = df.columns
         
-        if 'LST_CTYPE' in df.columns:
-            df_filtered = df_filtered[
-                (df_filtered['LST_CTYPE'].isin(types_programmes)) |
-                (df_filtered['LST_JSRCF'].isin(fichiers_sources_tables) if 'LST_JSRCF' in df.columns else False) |
-                (df_filtered['LST_CTYPE'] == '*FILE')
-            ]
+        if 'LST_CELTTY' not in columns:
+            print("⚠️ Colonne LST_CELTTY non trouvée - conservation de toutes les lignes")
         
         print(f"Sources filtrées: {len(df_filtered)} lignes")
         
         # Sauvegarde
-        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesSources.csv')
-        df_filtered.to_csv(output_file, index=False, encoding='utf-8')
+        if not chunk_size:
+            write_csv(df_filtered, output_file, date_format=CSV_DATETIME_FORMAT)
         print(f"✓ Sources sauvegardées: {output_file}")
+        metrics['rows_out'] = len(df_filtered)
+        metrics['outputs'] = [output_file]
         
         return df_filtered
         
@@ -124,66 +1158,86 @@ def process_sources_excel(excel_data, output_dir):
         traceback.print_exc()
         return None
 
-def process_objets_excel(excel_data, output_dir):
-    """Traite le fichier Excel des objets"""
+def process_objets_excel(excel_data, output_dir, chunk_size=None, cache_dir=None, metrics=None,
+                         compression=None, schema=None, usage=None):
+    """Traite le fichier Excel des objets
+    
+    Le CSV complet et ses partitions (OBJETS_SPLITS: programmes, tables...)
+    sont écrits en une passe par PartitionedCsvWriter. Si chunk_size est
+    fourni, la feuille est lue en streaming par blocs et les CSV écrits au
+    fil de l'eau.
+
+    Avec cache_dir, les données nettoyées sont mises en cache au format
+    Parquet et relues sans analyse Excel tant que le classeur ne change pas.
+    Avec metrics (dict produit par measure_phase), les volumes lus et écrits
+    y sont renseignés. Avec compression ('gzip' ou 'zstd'), les CSV sont
+    écrits directement compressés (suffixe .gz ou .zst). Avec schema
+    (COLUMN_SCHEMA[...]), seules les colonnes du schéma sont lues et écrites.
+    Avec usage (ibmi_extracts.UsageIndex), les objets filtrés sont enrichis
+    des statistiques d'utilisation IBMi avant leur partition.
+    """
     print("Traitement du fichier des objets...")
+    metrics = {} if metrics is None else metrics
     
     try:
-        # Lire la première feuille
-        df = pd.read_excel(excel_data, sheet_name=0)
-        print(f"Objets lus: {len(df)} lignes")
-        
-        # Afficher les colonnes pour diagnostic
-        print(f"Colonnes trouvées: {list(df.columns)}")
-        
-        # Nettoyage des données
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(clean_string)
+        output_file = csv_output_path(output_dir, OBJETS_CSV, compression)
+        split_files = {filename: csv_output_path(output_dir, filename, compression) for filename in OBJETS_SPLITS}
+        cache_path = parsed_cache_path(cache_dir, 'objets', excel_data, chunk_size, schema)
+        metrics['bytes_read'] = workbook_size(excel_data)
         
-        # Conversion des dates
-        if 'LST_TDATE' in df.columns:
-            df['LST_TDATE'] = df['LST_TDATE'].apply(convert_date_arcad)
+        def splitter(df):
+            df_filtered = filter_objets(df)
+            if usage is not None:
+                df_filtered = usage.enrich(df_filtered)
+            partitions = {output_file: None}
+            for filename, positions in route_partitions(df_filtered).items():
+                partitions[split_files[filename]] = positions
+            return df_filtered, partitions
         
-        # Filtrage des objets (O = objets)
-        if 'LST_CELTTY' in df.columns:
-            df_filtered = df[df['LST_CELTTY'] == 'O'].copy()
+        if chunk_size:
+            rows_read, results = stream_excel_to_csv(excel_data, chunk_size, splitter, "Objets", cache_path,
+                                                     schema=schema)
+            print(f"Objets lus: {rows_read} lignes")
+            metrics['rows_in'] = rows_read
+            df_filtered = results.get(output_file, pd.DataFrame())
+            columns = df_filtered.columns
         else:
+            # Lire et nettoyer la première feuille (ou la relire depuis le cache)
+            df = load_clean_dataframe(excel_data, cache_path, schema)
+            print(f"Objets lus: {len(df)} lignes")
+            metrics['rows_in'] = len(df)
+            
+            # Filtrage des objets (O = objets) et routage en une passe vers les partitions
+            df_filtered, partitions = splitter(df)
+            with PartitionedCsvWriter() as writer:
+                writer.write(df_filtered, partitions)
+            results = {
+                path: df_filtered if positions is None else df_filtered.take(positions)
+                for path, positions in partitions.items()
+            }
+            columns = df.columns
+        
+        if 'LST_CELTTY' not in columns:
             print("⚠️ Colonne LST_CELTTY non trouvée - conservation de toutes les lignes")
-            df_filtered = df.copy()
             
         print(f"Objets filtrés: {len(df_filtered)} lignes")
-        
-        # Sauvegarde du fichier complet
-        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesObjets.csv')
-        df_filtered.to_csv(output_file, index=False, encoding='utf-8')
+        if usage is not None:
+            print(f"✓ Enrichissement: {usage.describe(df_filtered)}")
+        metrics['rows_out'] = len(df_filtered)
+        metrics['outputs'] = [output_file] + [path for path in split_files.values() if path in results]
         print(f"✓ Objets complets sauvegardés: {output_file}")
         
-        # Création des fichiers spécialisés
-        
-        # Programmes (*PGM)
-        if 'LST_CTYPE' in df.columns:
-            df_programmes = df_filtered[df_filtered['LST_CTYPE'] == '*PGM'].copy()
-            output_programmes = os.path.join(output_dir, 'IBMi_RefArcaddesObjets_Programmes.csv')
-            df_programmes.to_csv(output_programmes, index=False, encoding='utf-8')
-            print(f"✓ Programmes sauvegardés: {len(df_programmes)} lignes -> {output_programmes}")
-        else:
-            df_programmes = pd.DataFrame()
-            print("⚠️ Impossible de filtrer les programmes - colonne LST_CTYPE non trouvée")
-        
-        # Tables (*FILE avec PF ou TABLE)
-        if 'LST_CTYPE' in df.columns and 'LST_CATR' in df.columns:
-            df_tables = df_filtered[
-                (df_filtered['LST_CTYPE'] == '*FILE') & 
-                (df_filtered['LST_CATR'].isin(['PF', 'TABLE']))
-            ].copy()
-            output_tables = os.path.join(output_dir, 'IBMi_RefArcaddesObjets_Tables.csv')
-            df_tables.to_csv(output_tables, index=False, encoding='utf-8')
-            print(f"✓ Tables sauvegardées: {len(df_tables)} lignes -> {output_tables}")
-        else:
-            df_tables = pd.DataFrame()
-            print("⚠️ Impossible de filtrer les tables - colonnes LST_CTYPE ou LST_CATR non trouvées")
+        # Fichiers spécialisés (partitions)
+        for filename, (label, criteria) in OBJETS_SPLITS.items():
+            path = split_files[filename]
+            if path in results:
+                print(f"✓ Partition {label} sauvegardée: {len(results[path])} lignes -> {path}")
+            else:
+                print(f"⚠️ Impossible de filtrer les {label.lower()} - "
+                      f"colonnes {' ou '.join(criteria)} non trouvées")
         
+        df_programmes = results.get(split_files[PROGRAMMES_CSV], pd.DataFrame())
+        df_tables = results.get(split_files[TABLES_CSV], pd.DataFrame())
         return df_filtered, df_programmes, df_tables
         
     except Exception as e:
@@ -192,39 +1246,69 @@ def process_objets_excel(excel_data, output_dir):
         traceback.print_exc()
         return None, None, None
 
-def process_xref_excel(excel_data, output_dir):
-    """Traite le fichier Excel des références croisées"""
+def process_xref_excel(excel_data, output_dir, chunk_size=None, cache_dir=None,
+                       extracts_dir=EXTRACTS_DIR, metrics=None, compression=None, schema=None):
+    """Traite le fichier Excel des références croisées
+    
+    Si chunk_size est fourni, la feuille est lue en streaming par blocs. Les
+    références sont ensuite regroupées en une ligne par relation (poids
+    NB_OCCURRENCES, NBRELATION si les extraits de extracts_dir sont présents).
+
+    Avec cache_dir, les données nettoyées sont mises en cache au format
+    Parquet et relues sans analyse Excel tant que le classeur ne change pas.
+    Avec metrics (dict produit par measure_phase), les volumes lus et écrits
+    y sont renseignés. Avec compression ('gzip' ou 'zstd'), les CSV sont
+    écrits directement compressés (suffixe .gz ou .zst). Avec schema
+    (COLUMN_SCHEMA[...]), seules les colonnes du schéma sont lues et écrites.
+    """
     print("Traitement du fichier des références croisées...")
+    metrics = {} if metrics is None else metrics
     
     try:
-        # Lire la première feuille
-        df = pd.read_excel(excel_data, sheet_name=0)
-        print(f"XREF lues: {len(df)} lignes")
+        output_file = csv_output_path(output_dir, 'IBMi_RefArcaddesXREF.csv', compression)
+        cache_path = parsed_cache_path(cache_dir, 'xref', excel_data, chunk_size, schema)
+        metrics['bytes_read'] = workbook_size(excel_data)
         
-        # Afficher les colonnes pour diagnostic
-        print(f"Colonnes trouvées: {list(df.columns)}")
-        
-        # Nettoyage des données
-        for col in df.columns:
-            if df[col].dtype == 'object':
-                df[col] = df[col].apply(clean_string)
-        
-        # Filtrage des références pertinentes
-        if all(col in df.columns for col in ['OXR_FROM_TYPE', 'OXR_TO_TYPE']):
-            df_filtered = df[
-                ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*PGM')) |
-                ((df['OXR_FROM_TYPE'] == '*PGM') & (df['OXR_TO_TYPE'] == '*FILE'))
-            ].copy()
+        if chunk_size:
+            rows_read, results = stream_excel_to_csv(
+                excel_data, chunk_size,
+                lambda chunk: (filter_xref(chunk), {output_file: None}),
+                "XREF", cache_path, write_output=False, schema=schema
+            )
+            df_filtered = results.get(output_file, pd.DataFrame())
+            print(f"XREF lues: {rows_read} lignes")
+            metrics['rows_in'] = rows_read
+            columns = df_filtered.columns
         else:
+            # Lire et nettoyer la première feuille (ou la relire depuis le cache)
+            df = load_clean_dataframe(excel_data, cache_path, schema)
+            print(f"XREF lues: {len(df)} lignes")
+            metrics['rows_in'] = len(df)
+            
+            # Filtrage des références pertinentes
+            df_filtered = filter_xref(df)
+            columns = df.columns
+        
+        if not all(col in columns for col in ['OXR_FROM_TYPE', 'OXR_TO_TYPE']):
             print("⚠️ Colonnes OXR_FROM_TYPE ou OXR_TO_TYPE non trouvées - conservation de toutes les lignes")
-            df_filtered = df.copy()
         
         print(f"XREF filtrées: {len(df_filtered)} lignes")
         
+        # Regroupement des doublons en relations pondérées
+        nbrelation = load_xref_nbrelation(extracts_dir)
+        rows_before = len(df_filtered)
+        df_filtered = aggregate_xref(df_filtered, nbrelation)
+        duplicates = rows_before - len(df_filtered)
+        print(f"XREF regroupées: {len(df_filtered)} relations "
+              f"({duplicates} doublons, {duplicates / rows_before if rows_before else 0:.1%})")
+        if nbrelation is not None and 'NBRELATION' in df_filtered.columns:
+            print(f"NBRELATION des extraits IBMi: {df_filtered['NBRELATION'].notna().sum()} relations renseignées")
+        
         # Sauvegarde
-        output_file = os.path.join(output_dir, 'IBMi_RefArcaddesXREF.csv')
-        df_filtered.to_csv(output_file, index=False, encoding='utf-8')
+        write_csv(df_filtered, output_file, date_format=CSV_DATETIME_FORMAT)
         print(f"✓ XREF sauvegardées: {output_file}")
+        metrics['rows_out'] = len(df_filtered)
+        metrics['outputs'] = [output_file]
         
         return df_filtered
         
@@ -234,146 +1318,785 @@ def process_xref_excel(excel_data, output_dir):
         traceback.print_exc()
         return None
 
-def create_metadata_csvs(output_dir, df_objets):
-    """Crée les fichiers CSV de métadonnées"""
+def parse_workbook(kind, content, output_dir, chunk_size=None, cache_dir=None,
+                   extracts_dir=EXTRACTS_DIR, profile_dir=None, compression=None, project=False, usage=None):
+    """Traite un classeur ARCAD à partir de son contenu brut
+    
+    Fonction de niveau module pour pouvoir être exécutée dans un processus
+    de travail (ProcessPoolExecutor). Retourne (résultat de process_*_excel,
+    mesures de la phase, prises dans le processus de travail). Avec project,
+    le classeur est projeté sur COLUMN_SCHEMA[kind]; usage enrichit les objets.
+    """
+    if kind not in EXCEL_FILES:
+        raise ValueError(f"Type de classeur inconnu: {kind}")
+    
+    run_metrics = []
+    schema = COLUMN_SCHEMA[kind] if project else None
+    with measure_phase(run_metrics, kind, profile_dir) as record:
+        excel_data = pd.ExcelFile(io.BytesIO(content))
+        if kind == 'sources':
+            result = process_sources_excel(excel_data, output_dir, chunk_size, cache_dir, record, compression,
+                                           schema)
+        elif kind == 'objets':
+            result = process_objets_excel(excel_data, output_dir, chunk_size, cache_dir, record, compression,
+                                          schema, usage)
+        else:
+            result = process_xref_excel(excel_data, output_dir, chunk_size, cache_dir, extracts_dir, record,
+                                        compression, schema)
+    return result, run_metrics[0]
+
+def process_workbooks_concurrently(output_dir, fetch_options, chunk_size=None, workers=None,
+                                   extracts_dir=EXTRACTS_DIR, run_metrics=None, profile_dir=None,
+                                   compression=None, project=False, usage=None):
+    """Télécharge les classeurs en parallèle et traite chacun dès sa réception
+    
+    Les téléchargements (I/O) tournent dans un pool de threads, l'analyse
+    Excel (CPU) dans un pool de processus: la durée totale tend vers celle
+    du classeur le plus lent au lieu de la somme des trois.
+    Retourne un dict {type: résultat de process_*_excel} (None en cas d'échec).
+    Les mesures de chaque classeur sont ajoutées à run_metrics si fourni.
+    """
+    results = {kind: None for kind in EXCEL_FILES}
+    workers = workers or min(len(EXCEL_FILES), os.cpu_count() or 1)
+    
+    with ThreadPoolExecutor(max_workers=len(EXCEL_FILES)) as io_pool, \
+            ProcessPoolExecutor(max_workers=workers) as cpu_pool:
+        downloads = {
+            io_pool.submit(fetch_excel_bytes, filename, **fetch_options): (kind, filename)
+            for kind, filename in EXCEL_FILES.items()
+        }
+        
+        parsings = {}
+        for future in as_completed(downloads):
+            kind, filename = downloads[future]
+            try:
+                content, sha256, origin = future.result()
+            except Exception as e:
+                print(f"✗ Erreur lors du téléchargement de {filename}: {str(e)}")
+                continue
+            print(f"✓ {filename} reçu ({len(content)} bytes, {origin}) - traitement lancé")
+            parsings[cpu_pool.submit(parse_workbook, kind, content, output_dir, chunk_size,
+                                     fetch_options.get('cache_dir'), extracts_dir, profile_dir,
+                                     compression, project, usage)] = kind
+        
+        for future in as_completed(parsings):
+            kind = parsings[future]
+            try:
+                results[kind], record = future.result()
+                if run_metrics is not None:
+                    run_metrics.append(record)
+            except Exception as e:
+                print(f"✗ Erreur lors du traitement du classeur {kind}: {str(e)}")
+    
+    return results
+
+def read_snapshot_csv(path):
+    """Lit un CSV généré (brut ou compressé) en texte, pour comparer les lignes telles qu'écrites"""
+    return pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8')
+
+def snapshot_rows(df, keys, filename):
+    """Réduit un CSV à ses colonnes clés et à l'empreinte 64 bits de chaque ligne"""
+    rows = df[keys].copy()
+    # Entier nullable: un passage en float64 au merge tronquerait les empreintes
+    rows['_row_hash'] = pd.util.hash_pandas_object(df, index=False).astype('UInt64').array
+    duplicated = rows.duplicated(subset=keys, keep='last')
+    if duplicated.any():
+        print(f"⚠️ {filename}: {duplicated.sum()} clés en double - dernière occurrence conservée")
+        rows = rows[~duplicated]
+    return rows
+
+def delta_keys(filename, df):
+    """Colonnes clés du delta d'un CSV: DELTA_KEYS plus les DELTA_OPTIONAL_KEYS présentes"""
+    keys = DELTA_KEYS[filename] or list(df.columns)
+    return keys + [col for col in DELTA_OPTIONAL_KEYS.get(filename, []) if col in df.columns]
+
+def delta_relation_keys(filename, df):
+    """Colonnes de la relation du graphe d'une ligne (DELTA_RELATION_KEYS), None hors XREF"""
+    if filename not in DELTA_RELATION_KEYS:
+        return None
+    raw, resolved = DELTA_RELATION_KEYS[filename]
+    return resolved if all(col in df.columns for col in resolved) else raw
+
+def load_delta_snapshot(output_dir):
+    """Mémorise les CSV de l'exécution précédente avant leur réécriture
+    
+    Seules les colonnes clés et l'empreinte de chaque ligne sont conservées
+    en mémoire. Retourne un dict {fichier: DataFrame clés + _row_hash}.
+    """
+    snapshot = {}
+    for filename in DELTA_KEYS:
+        path = find_csv_file(output_dir, filename)
+        if path is None:
+            continue
+        df = read_snapshot_csv(path)
+        keys = delta_keys(filename, df)
+        if not all(col in df.columns for col in keys):
+            print(f"⚠️ {filename}: colonnes clés absentes du snapshot précédent - ignoré")
+            continue
+        snapshot[filename] = snapshot_rows(df, keys, filename)
+    print(f"Snapshot précédent: {len(snapshot)} fichiers mémorisés pour le delta")
+    return snapshot
+
+def export_delta_csvs(output_dir, snapshot):
+    """Compare les CSV générés au snapshot précédent et écrit les deltas
+    
+    Pour chaque fichier de DELTA_KEYS, écrit dans output_dir/delta/:
+    - <fichier>_added.csv: lignes dont la clé est nouvelle
+    - <fichier>_changed.csv: lignes dont la clé existait avec un contenu différent
+    - <fichier>_deleted.csv: clés disparues (colonnes clés uniquement, dont
+      les bibliothèques résolues des XREF si présentes: DELTA_OPTIONAL_KEYS)
+    Une clé XREF disparue dont la relation du graphe (DELTA_RELATION_KEYS)
+    reste portée par une autre ligne n'est pas supprimée: ces lignes passent
+    dans _changed.csv pour que le MERGE + SET rafraîchisse la relation.
+    Retourne un dict {fichier: (ajoutées, modifiées, supprimées)}.
+    """
+    print("Export du delta par rapport au snapshot précédent...")
+    delta_dir = os.path.join(output_dir, DELTA_DIR)
+    Path(delta_dir).mkdir(exist_ok=True)
+    summary = {}
+    
+    for filename in DELTA_KEYS:
+        path = find_csv_file(output_dir, filename)
+        if path is None:
+            continue
+        current = read_snapshot_csv(path)
+        keys = delta_keys(filename, current)
+        if not all(col in current.columns for col in keys):
+            print(f"⚠️ {filename}: colonnes clés {keys} non trouvées - delta ignoré")
+            continue
+        
+        previous = snapshot.get(filename)
+        if previous is not None and set(previous.columns) != set(keys) | {'_row_hash'}:
+            # Résolution des bibliothèques activée ou désactivée depuis l'exécution précédente
+            print(f"⚠️ {filename}: clés du snapshot précédent différentes - snapshot ignoré")
+            previous = None
+        if previous is None:
+            print(f"⚠️ {filename}: pas de snapshot précédent - toutes les lignes sont ajoutées")
+            previous = pd.DataFrame({col: pd.Series(dtype=object) for col in keys})
+            previous['_row_hash'] = pd.Series(dtype='UInt64')
+        
+        rows = snapshot_rows(current, keys, filename)
+        matched = current[keys].merge(previous, on=keys, how='left', indicator=True)
+        current_hashes = pd.util.hash_pandas_object(current, index=False).to_numpy()
+        added = (matched['_merge'] == 'left_only').to_numpy()
+        changed = ~added & (matched['_row_hash'].to_numpy(dtype='uint64', na_value=0) != current_hashes)
+        
+        deleted = previous.merge(rows[keys], on=keys, how='left', indicator=True)
+        deleted = deleted.loc[deleted['_merge'] == 'left_only', keys]
+        
+        relation = delta_relation_keys(filename, current)
+        if relation is not None and len(deleted):
+            remaining = current[relation].drop_duplicates()
+            kept = deleted[relation].merge(remaining, on=relation, how='left', indicator=True)['_merge']
+            kept = (kept == 'both').to_numpy()
+            if kept.any():
+                shared = deleted.loc[kept, relation].drop_duplicates()
+                refreshed = current[relation].merge(shared, on=relation, how='left', indicator=True)['_merge']
+                changed |= ~added & (refreshed == 'both').to_numpy()
+                deleted = deleted[~kept]
+                print(f"  {filename}: {kept.sum()} clés disparues gardées (relation portée par une autre ligne)")
+        
+        stem = os.path.splitext(filename)[0]
+        current[added].to_csv(os.path.join(delta_dir, f"{stem}_added.csv"), index=False, encoding='utf-8')
+        current[changed].to_csv(os.path.join(delta_dir, f"{stem}_changed.csv"), index=False, encoding='utf-8')
+        deleted.to_csv(os.path.join(delta_dir, f"{stem}_deleted.csv"), index=False, encoding='utf-8')
+        
+        summary[filename] = (int(added.sum()), int(changed.sum()), len(deleted))
+        print(f"✓ Delta {stem}: +{added.sum()} ajoutées, ~{changed.sum()} modifiées, -{len(deleted)} supprimées")
+    
+    print(f"✓ Fichiers delta sauvegardés: {delta_dir}")
+    return summary
+
+# Métadonnées dérivées des objets: fichier -> (colonne source, colonne clé, libellé, titre)
+METADATA_COLUMNS = {
+    'applications.csv': ('LST_CAPP', 'name', 'Application', 'Applications'),
+    'types_ibmi.csv': ('LST_CTYPE', 'type_name', 'Type IBMi', 'Types IBMi'),
+    'types_arcad.csv': ('LST_CCPLT', 'type_name', 'Type ARCAD', 'Types ARCAD'),
+    'attributs.csv': ('LST_CATR', 'attr_name', 'Attribut', 'Attributs'),
+}
+
+# Colonnes des objets profilées une fois pour les métadonnées et le rapport
+PROFILE_COLUMNS = [column for column, *_ in METADATA_COLUMNS.values()]
+
+def build_metadata_frames(df_objets, profiles=None):
+    """Construit les DataFrames de métadonnées (valeurs uniques des objets)
+    
+    Retourne un dict {fichier: DataFrame}; les colonnes absentes sont ignorées.
+    profiles: profils de profile_columns déjà calculés (sinon calculés ici).
+    """
+    if profiles is None:
+        profiles = profile_columns(df_objets, PROFILE_COLUMNS)
+    frames = {}
+    for filename, (column, key, label, _) in METADATA_COLUMNS.items():
+        if column not in profiles:
+            continue
+        values = profiles[column]['value']
+        values = [v for v in values if v and isinstance(v, str) and v.strip()]
+        frames[filename] = pd.DataFrame({
+            key: values,
+            'description': [f'{label} {v}' for v in values]
+        })
+    return frames
+
+def create_metadata_csvs(output_dir, df_objets, compression=None, profiles=None):
+    """Crée les fichiers CSV de métadonnées (compressés si compression est fourni)"""
     print("Création des fichiers de métadonnées...")
     
     try:
-        # Applications uniques
-        if 'LST_CAPP' in df_objets.columns:
-            applications = df_objets['LST_CAPP'].unique()
-            applications = [app for app in applications if app and app.strip()]
-            df_apps = pd.DataFrame({
-                'name': applications,
-                'description': [f'Application {app}' for app in applications]
-            })
-            
-            app_file = os.path.join(output_dir, 'applications.csv')
-            df_apps.to_csv(app_file, index=False, encoding='utf-8')
-            print(f"✓ Applications: {len(df_apps)} -> {app_file}")
-        else:
+        frames = build_metadata_frames(df_objets, profiles)
+        if 'applications.csv' not in frames:
             print("⚠️ Colonne LST_CAPP non trouvée - pas d'applications générées")
         
-        # Types IBMi uniques
-        if 'LST_CTYPE' in df_objets.columns:
-            types_ibmi = df_objets['LST_CTYPE'].unique()
-            types_ibmi = [t for t in types_ibmi if t and t.strip()]
-            df_types_ibmi = pd.DataFrame({
-                'type_name': types_ibmi,
-                'description': [f'Type IBMi {t}' for t in types_ibmi]
-            })
-            
-            types_ibmi_file = os.path.join(output_dir, 'types_ibmi.csv')
-            df_types_ibmi.to_csv(types_ibmi_file, index=False, encoding='utf-8')
-            print(f"✓ Types IBMi: {len(df_types_ibmi)} -> {types_ibmi_file}")
-        
-        # Types ARCAD uniques
-        if 'LST_CCPLT' in df_objets.columns:
-            types_arcad = df_objets['LST_CCPLT'].unique()
-            types_arcad = [t for t in types_arcad if t and t.strip()]
-            df_types_arcad = pd.DataFrame({
-                'type_name': types_arcad,
-                'description': [f'Type ARCAD {t}' for t in types_arcad]
-            })
-            
-            types_arcad_file = os.path.join(output_dir, 'types_arcad.csv')
-            df_types_arcad.to_csv(types_arcad_file, index=False, encoding='utf-8')
-            print(f"✓ Types ARCAD: {len(df_types_arcad)} -> {types_arcad_file}")
-        
-        # Attributs uniques
-        if 'LST_CATR' in df_objets.columns:
-            attributs = df_objets['LST_CATR'].unique()
-            attributs = [a for a in attributs if a and a.strip()]
-            df_attributs = pd.DataFrame({
-                'attr_name': attributs,
-                'description': [f'Attribut {a}' for a in attributs]
-            })
-            
-            attributs_file = os.path.join(output_dir, 'attributs.csv')
-            df_attributs.to_csv(attributs_file, index=False, encoding='utf-8')
-            print(f"✓ Attributs: {len(df_attributs)} -> {attributs_file}")
+        for filename, df_metadata in frames.items():
+            metadata_file = csv_output_path(output_dir, filename, compression)
+            write_csv(df_metadata, metadata_file)
+            title = METADATA_COLUMNS[filename][3]
+            print(f"✓ {title}: {len(df_metadata)} -> {metadata_file}")
         
     except Exception as e:
         print(f"✗ Erreur lors de la création des métadonnées: {str(e)}")
 
-def generate_statistics_report(df_sources, df_objets, df_xref, output_dir):
-    """Génère un rapport de statistiques"""
+def degree_histogram(degrees):
+    """Histogramme des degrés par puissances de 2: {'0': n, '1': n, '2-3': n, '4-7': n...}"""
+    bins = np.zeros(len(degrees), dtype=np.int64)
+    positive = degrees > 0
+    bins[positive] = np.floor(np.log2(degrees[positive])).astype(np.int64) + 1
+    counts = np.bincount(bins)
+    labels = ['0'] + [str(1 << (b - 1)) if b == 1 else f"{1 << (b - 1)}-{(1 << b) - 1}"
+                      for b in range(1, len(counts))]
+    return {label: int(count) for label, count in zip(labels, counts) if count}
+
+def top_degrees(names, degrees, top):
+    """Les top nœuds de plus fort degré (> 0), ex aequo par nom: [{name, degree}]"""
+    top = min(top, int((degrees > 0).sum()))
+    if top <= 0:
+        return []
+    threshold = np.partition(degrees, len(degrees) - top)[len(degrees) - top]
+    candidates = np.flatnonzero(degrees >= threshold)
+    order = np.lexsort((names[candidates], -degrees[candidates]))[:top]
+    return [{'name': str(names[i]), 'degree': int(degrees[i])} for i in candidates[order]]
+
+def xref_degree_statistics(df_xref, df_objets=None, top=REPORT_TOP_DEGREES):
+    """Forme du graphe des XREF: degrés CALLS / USES, histogrammes et nœuds isolés
+
+    Les nœuds sont identifiés par leur nom (cible des XREF cherchée par nom),
+    les degrés comptent les voisins distincts. Un passage de factorisation
+    et des bincount: coût linéaire en nombre de relations. Les nœuds isolés
+    sont les programmes (*PGM) et tables (*FILE PF / TABLE) des objets sans
+    aucune relation CALLS ni USES.
+    """
+    def text(df, column):
+        return df[column].astype(object).to_numpy() if column in df.columns else np.full(len(df), None)
+
+    from_type, to_type = text(df_xref, 'OXR_FROM_TYPE'), text(df_xref, 'OXR_TO_TYPE')
+    from_obj, to_obj = text(df_xref, 'OXR_FROM_OBJ'), text(df_xref, 'OXR_TO_OBJ')
+    calls = (from_type == '*PGM') & (to_type == '*PGM')
+    uses = (from_type == '*PGM') & (to_type == '*FILE')
+
+    programme_names, table_names = np.array([], dtype=object), np.array([], dtype=object)
+    if df_objets is not None and all(col in df_objets.columns for col in ['LST_CTYPE', 'LST_JOBJ']):
+        types = df_objets['LST_CTYPE'].astype(object).to_numpy()
+        names = df_objets['LST_JOBJ'].astype(object).to_numpy()
+        attributes = text(df_objets, 'LST_CATR')
+        programme_names = names[types == '*PGM']
+        table_names = names[(types == '*FILE') & np.isin(attributes, ['PF', 'TABLE'])]
+
+    # Programmes: appelants, appelés et objets *PGM dans un seul espace de codes
+    callers, callees, users = from_obj[calls], to_obj[calls], from_obj[uses]
+    codes, programmes = pd.factorize(np.concatenate([callers, callees, users, programme_names]))
+    bounds = np.cumsum([len(callers), len(callees), len(users)])
+    caller_codes, callee_codes, user_codes = codes[:bounds[0]], codes[bounds[0]:bounds[1]], codes[bounds[1]:bounds[2]]
+    table_codes, tables = pd.factorize(np.concatenate([to_obj[uses], table_names]))
+    used_codes = table_codes[:uses.sum()]
+
+    def distinct_edges(sources, targets, targets_count):
+        valid = (sources >= 0) & (targets >= 0)
+        pairs = pd.unique(sources[valid].astype(np.int64) * max(targets_count, 1) + targets[valid])
+        return pairs // max(targets_count, 1), pairs % max(targets_count, 1)
+
+    call_from, call_to = distinct_edges(caller_codes, callee_codes, len(programmes))
+    use_from, use_to = distinct_edges(user_codes, used_codes, len(tables))
+    fan_out = np.bincount(call_from, minlength=len(programmes))
+    fan_in = np.bincount(call_to, minlength=len(programmes))
+    tables_used = np.bincount(use_from, minlength=len(programmes))
+    table_users = np.bincount(use_to, minlength=len(tables))
+
+    programme_nodes = np.unique(codes[bounds[2]:][codes[bounds[2]:] >= 0])
+    table_nodes = np.unique(table_codes[uses.sum():][table_codes[uses.sum():] >= 0])
+    isolated_programmes = programme_nodes[(fan_out + fan_in + tables_used)[programme_nodes] == 0]
+    isolated_tables = table_nodes[table_users[table_nodes] == 0]
+    programmes = np.asarray(programmes, dtype=object)
+    tables = np.asarray(tables, dtype=object)
+
+    return {
+        'calls': {
+            'relations': int(len(call_from)),
+            'top_fan_out': top_degrees(programmes, fan_out, top),
+            'top_fan_in': top_degrees(programmes, fan_in, top),
+            'fan_out_histogram': degree_histogram(fan_out[programme_nodes]) if len(programme_nodes)
+            else degree_histogram(fan_out),
+            'fan_in_histogram': degree_histogram(fan_in[programme_nodes]) if len(programme_nodes)
+            else degree_histogram(fan_in),
+        },
+        'uses': {
+            'relations': int(len(use_from)),
+            'top_tables': top_degrees(tables, table_users, top),
+            'table_users_histogram': degree_histogram(table_users[table_nodes]) if len(table_nodes)
+            else degree_histogram(table_users),
+        },
+        'isolated': {
+            'programmes': int(len(isolated_programmes)),
+            'tables': int(len(isolated_tables)),
+            'programmes_sample': sorted(str(name) for name in programmes[isolated_programmes])[:top],
+            'tables_sample': sorted(str(name) for name in tables[isolated_tables])[:top],
+        },
+    }
+
+def collect_statistics(df_sources, df_objets, df_xref, profiles=None, top_degrees=REPORT_TOP_DEGREES):
+    """Calcule toutes les statistiques du rapport en un passage par colonne
+
+    Retourne un dict sérialisable en JSON: totaux, répartitions (profils des
+    objets et des sources), dédoublonnage et types des XREF, degrés du graphe.
+    """
+    stats = {
+        'generated_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'totals': {
+            'sources': len(df_sources) if df_sources is not None else 0,
+            'objets': len(df_objets) if df_objets is not None else 0,
+            'xref': len(df_xref) if df_xref is not None else 0,
+        },
+    }
+    if df_objets is not None and len(df_objets) > 0:
+        if profiles is None:
+            profiles = profile_columns(df_objets, PROFILE_COLUMNS)
+        for key, column in [('applications', 'LST_CAPP'), ('object_types', 'LST_CTYPE'),
+                            ('attributes', 'LST_CATR'), ('arcad_types', 'LST_CCPLT')]:
+            if column in profiles:
+                stats[key] = {str(value): int(count) for value, count in profile_counts(profiles[column]).items()}
+    if df_sources is not None and len(df_sources) > 0:
+        source_profiles = profile_columns(df_sources, ['LST_CTYPE'])
+        if 'LST_CTYPE' in source_profiles:
+            stats['source_types'] = {str(value): int(count)
+                                     for value, count in profile_counts(source_profiles['LST_CTYPE']).items()}
+    if df_xref is not None and 'NB_OCCURRENCES' in df_xref.columns:
+        occurrences = int(df_xref['NB_OCCURRENCES'].sum())
+        stats['xref_dedup'] = {
+            'rows': occurrences,
+            'relations': len(df_xref),
+            'rate': 1 - len(df_xref) / occurrences if occurrences else 0,
+            'weighted': int((df_xref['NB_OCCURRENCES'] > 1).sum()),
+        }
+        if 'NBRELATION' in df_xref.columns:
+            stats['xref_dedup']['with_nbrelation'] = int(df_xref['NBRELATION'].notna().sum())
+    if df_xref is not None and len(df_xref) > 0 and \
+            all(col in df_xref.columns for col in ['OXR_FROM_TYPE', 'OXR_TO_TYPE']):
+        ref_types = df_xref.groupby(['OXR_FROM_TYPE', 'OXR_TO_TYPE'], observed=True).size()
+        stats['xref_types'] = {f"{from_type} -> {to_type}": int(count)
+                               for (from_type, to_type), count in ref_types.items()}
+        if 'OXR_FROM_OBJ' in df_xref.columns and 'OXR_TO_OBJ' in df_xref.columns:
+            stats['graph'] = xref_degree_statistics(df_xref, df_objets, top_degrees)
+    return stats
+
+def format_statistics(stats, top_applications=REPORT_TOP_APPLICATIONS, top_attributes=REPORT_TOP_ATTRIBUTES):
+    """Met en forme le rapport texte à partir de collect_statistics"""
+    lines = []
+    
+    # En-tête
+    lines.append(f"RAPPORT DE STATISTIQUES - PATRIMOINE IBMi ARCAD")
+    lines.append(f"Généré le: {stats['generated_at']}")
+    lines.append("=" * 60)
+    lines.append("")
+    
+    # Statistiques générales
+    lines.append("=== STATISTIQUES GÉNÉRALES ===")
+    lines.append(f"Sources totales: {stats['totals']['sources']:,}")
+    lines.append(f"Objets totaux: {stats['totals']['objets']:,}")
+    lines.append(f"Références croisées: {stats['totals']['xref']:,}")
+    lines.append("")
+    
+    for key, title, limit, unit in [('applications', "RÉPARTITION PAR APPLICATION", top_applications, " objets"),
+                                    ('object_types', "TYPES D'OBJETS", None, ""),
+                                    ('attributes', "ATTRIBUTS D'OBJETS", top_attributes, ""),
+                                    ('source_types', "TYPES DE SOURCES", None, "")]:
+        if key not in stats:
+            continue
+        lines.append(f"=== {title} ===")
+        for value, count in list(stats[key].items())[:limit]:
+            lines.append(f"{value}: {count:,}{unit}")
+        lines.append("")
+    
+    # Dédoublonnage des références croisées
+    if 'xref_dedup' in stats:
+        dedup = stats['xref_dedup']
+        lines.append("=== DÉDOUBLONNAGE DES XREF ===")
+        lines.append(f"Lignes XREF filtrées: {dedup['rows']:,}")
+        lines.append(f"Relations uniques: {dedup['relations']:,}")
+        lines.append(f"Taux de dédoublonnage: {dedup['rate']:.1%}")
+        lines.append(f"Relations portées par plusieurs lignes: {dedup['weighted']:,}")
+        if 'with_nbrelation' in dedup:
+            lines.append(f"Relations avec NBRELATION (extraits IBMi): {dedup['with_nbrelation']:,}")
+        lines.append("")
+    
+    # Références croisées
+    if 'xref_types' in stats:
+        lines.append("=== TYPES DE RÉFÉRENCES CROISÉES ===")
+        for ref_type, count in stats['xref_types'].items():
+            lines.append(f"{ref_type}: {count:,}")
+        lines.append("")
+    
+    # Forme du graphe
+    if 'graph' in stats:
+        graph = stats['graph']
+        lines.append("=== GRAPHE DES XREF (noms d'objets, voisins distincts) ===")
+        lines.append(f"Relations CALLS: {graph['calls']['relations']:,}")
+        lines.append(f"Relations USES: {graph['uses']['relations']:,}")
+        lines.append(f"Programmes isolés (ni CALLS ni USES): {graph['isolated']['programmes']:,}")
+        lines.append(f"Tables isolées (aucun USES): {graph['isolated']['tables']:,}")
+        lines.append("")
+        for title, entries, unit in [("PROGRAMMES APPELANT LE PLUS (FAN-OUT)", graph['calls']['top_fan_out'],
+                                      "programmes appelés"),
+                                     ("PROGRAMMES LES PLUS APPELÉS (FAN-IN)", graph['calls']['top_fan_in'],
+                                      "appelants"),
+                                     ("TABLES LES PLUS UTILISÉES", graph['uses']['top_tables'], "programmes")]:
+            lines.append(f"=== {title} ===")
+            for entry in entries:
+                lines.append(f"{entry['name']}: {entry['degree']:,} {unit}")
+            lines.append("")
+        for title, histogram in [("FAN-OUT", graph['calls']['fan_out_histogram']),
+                                 ("FAN-IN", graph['calls']['fan_in_histogram']),
+                                 ("UTILISATEURS PAR TABLE", graph['uses']['table_users_histogram'])]:
+            lines.append(f"=== HISTOGRAMME {title} (degré: nœuds) ===")
+            for label, count in histogram.items():
+                lines.append(f"{label}: {count:,}")
+            lines.append("")
+    return lines
+
+def generate_statistics_report(df_sources, df_objets, df_xref, output_dir,
+                               top_applications=REPORT_TOP_APPLICATIONS, top_attributes=REPORT_TOP_ATTRIBUTES,
+                               top_degrees=REPORT_TOP_DEGREES, profiles=None):
+    """Génère un rapport de statistiques (texte et JSON)
+    
+    profiles: profils des objets déjà calculés pour les métadonnées
+    (profile_columns), réutilisés au lieu d'un nouveau passage.
+    """
     print("Génération du rapport de statistiques...")
     
     try:
-        stats = []
-        
-        # En-tête
-        stats.append(f"RAPPORT DE STATISTIQUES - PATRIMOINE IBMi ARCAD")
-        stats.append(f"Généré le: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        stats.append("=" * 60)
-        stats.append("")
-        
-        # Statistiques générales
-        stats.append("=== STATISTIQUES GÉNÉRALES ===")
-        stats.append(f"Sources totales: {len(df_sources) if df_sources is not None else 0:,}")
-        stats.append(f"Objets totaux: {len(df_objets) if df_objets is not None else 0:,}")
-        stats.append(f"Références croisées: {len(df_xref) if df_xref is not None else 0:,}")
-        stats.append("")
-        
-        if df_objets is not None and len(df_objets) > 0:
-            # Applications
-            if 'LST_CAPP' in df_objets.columns:
-                apps = df_objets['LST_CAPP'].value_counts()
-                stats.append("=== RÉPARTITION PAR APPLICATION ===")
-                for app, count in apps.head(10).items():
-                    stats.append(f"{app}: {count:,} objets")
-                stats.append("")
-            
-            # Types d'objets
-            if 'LST_CTYPE' in df_objets.columns:
-                types_obj = df_objets['LST_CTYPE'].value_counts()
-                stats.append("=== TYPES D'OBJETS ===")
-                for type_obj, count in types_obj.items():
-                    stats.append(f"{type_obj}: {count:,}")
-                stats.append("")
-            
-            # Attributs d'objets
-            if 'LST_CATR' in df_objets.columns:
-                attributs = df_objets['LST_CATR'].value_counts()
-                stats.append("=== ATTRIBUTS D'OBJETS ===")
-                for attr, count in attributs.head(15).items():
-                    stats.append(f"{attr}: {count:,}")
-                stats.append("")
-        
-        # Types de sources
-        if df_sources is not None and len(df_sources) > 0 and 'LST_CTYPE' in df_sources.columns:
-            types_src = df_sources['LST_CTYPE'].value_counts()
-            stats.append("=== TYPES DE SOURCES ===")
-            for type_src, count in types_src.items():
-                stats.append(f"{type_src}: {count:,}")
-            stats.append("")
-        
-        # Références croisées
-        if df_xref is not None and len(df_xref) > 0:
-            if all(col in df_xref.columns for col in ['OXR_FROM_TYPE', 'OXR_TO_TYPE']):
-                ref_types = df_xref.groupby(['OXR_FROM_TYPE', 'OXR_TO_TYPE']).size()
-                stats.append("=== TYPES DE RÉFÉRENCES CROISÉES ===")
-                for (from_type, to_type), count in ref_types.items():
-                    stats.append(f"{from_type} -> {to_type}: {count:,}")
-                stats.append("")
+        stats = collect_statistics(df_sources, df_objets, df_xref, profiles, top_degrees)
+        lines = format_statistics(stats, top_applications, top_attributes)
         
         # Sauvegarde du rapport
-        report_file = os.path.join(output_dir, 'rapport_statistiques.txt')
+        report_file = os.path.join(output_dir, REPORT_FILE)
         with open(report_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(stats))
+            f.write('\n'.join(lines))
+        json_file = os.path.join(output_dir, REPORT_JSON_FILE)
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2, ensure_ascii=False)
         
-        print(f"✓ Rapport sauvegardé: {report_file}")
+        print(f"✓ Rapport sauvegardé: {report_file} (+ {os.path.basename(json_file)})")
         
         # Affichage du résumé
         print("\n=== APERÇU DU RAPPORT ===")
-        print("\n".join(stats[:30]))
+        print("\n".join(lines[:30]))
         
     except Exception as e:
         print(f"✗ Erreur lors de la génération du rapport: {str(e)}")
 
-def main():
+def reset_peak_rss():
+    """Remet à zéro le pic RSS du processus (Linux); False si indisponible"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Pic RSS du processus en Mo (VmHWM sous Linux, ru_maxrss sinon, None si inconnu)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def children_cpu_seconds():
+    """Temps CPU cumulé des processus enfants terminés (0 si indisponible)"""
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+def output_bytes(paths):
+    """Taille cumulée de fichiers ou de répertoires (récursivement); absents ignorés"""
+    total = 0
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+        elif os.path.exists(path):
+            total += os.path.getsize(path)
+    return total
+
+def dump_profile(profiler, profile_dir, name):
+    """Écrit le profil d'une phase (.prof pour pstats/snakeviz, .txt résumé)"""
+    Path(profile_dir).mkdir(parents=True, exist_ok=True)
+    profile_file = os.path.join(profile_dir, f"{name}.prof")
+    profiler.dump_stats(profile_file)
+    with open(os.path.join(profile_dir, f"{name}.txt"), 'w', encoding='utf-8') as f:
+        pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return profile_file
+
+@contextlib.contextmanager
+def measure_phase(run_metrics, name, profile_dir=None):
+    """Mesure une phase et ajoute son enregistrement à run_metrics
+    
+    Produit le dict de la phase, que le code mesuré complète: rows_in,
+    rows_out, bytes_read et outputs (fichiers ou répertoires écrits, dont la
+    taille donne bytes_written). Avec profile_dir, la phase est profilée
+    par cProfile et son profil écrit dans profile_dir/<phase>.prof.
+    """
+    record = {'phase': name}
+    profiler = cProfile.Profile() if profile_dir else None
+    reset_peak_rss()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time() + children_cpu_seconds()
+    if profiler:
+        profiler.enable()
+    try:
+        yield record
+    finally:
+        if profiler:
+            profiler.disable()
+        wall = time.perf_counter() - wall_start
+        rows_in = record.get('rows_in')
+        peak = peak_rss_mb()
+        record.update({
+            'wall_seconds': round(wall, 3),
+            'cpu_seconds': round(time.process_time() + children_cpu_seconds() - cpu_start, 3),
+            'rows_in': rows_in,
+            'rows_out': record.get('rows_out'),
+            'rows_per_second': round(rows_in / wall, 1) if rows_in and wall > 0 else None,
+            'bytes_read': record.get('bytes_read'),
+            'bytes_written': output_bytes(record.get('outputs', [])),
+            'peak_rss_mb': round(peak, 1) if peak is not None else None,
+        })
+        record['outputs'] = [os.path.basename(path) for path in record.get('outputs', [])]
+        if profiler:
+            record['profile'] = dump_profile(profiler, profile_dir, name)
+        run_metrics.append(record)
+
+def write_run_metrics(output_dir, run_metrics, started_at, options):
+    """Écrit run_metrics.json: une entrée par phase, dans l'ordre d'exécution"""
+    metrics_file = os.path.join(output_dir, RUN_METRICS_FILE)
+    peaks = [record['peak_rss_mb'] for record in run_metrics if record.get('peak_rss_mb') is not None]
+    content = {
+        'started_at': started_at.isoformat(timespec='seconds'),
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'total_seconds': round((datetime.now() - started_at).total_seconds(), 3),
+        'peak_rss_mb': max(peaks) if peaks else None,
+        'options': options,
+        'phases': run_metrics,
+    }
+    with open(metrics_file, 'w', encoding='utf-8') as f:
+        json.dump(content, f, indent=2, ensure_ascii=False)
+    print(f"✓ Mesures d'exécution sauvegardées: {metrics_file}")
+    return metrics_file
+
+def download_workbook(run_metrics, kind, fetch_options, profile_dir=None):
+    """Télécharge un classeur ARCAD dans une phase mesurée download_<type>"""
+    with measure_phase(run_metrics, f"download_{kind}", profile_dir) as record:
+        excel_data = download_excel_from_github(EXCEL_FILES[kind], **fetch_options)
+        if excel_data is not None:
+            record['bytes_read'] = workbook_size(excel_data)
+    return excel_data
+
+def parse_arguments(argv=None):
+    """Analyse les options de la ligne de commande"""
+    parser = argparse.ArgumentParser(
+        description="Lecture des Excel ARCAD et génération des CSV pour Neo4j"
+    )
+    parser.add_argument(
+        "--streaming", action="store_true",
+        help="Lecture des Excel par blocs (un seul bloc brut en mémoire) avec écriture CSV incrémentale. "
+             "Pas à mémoire constante: les lignes filtrées restent en mémoire pour les phases suivantes "
+             "et les XREF ne sont écrites qu'après leur regroupement global"
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=STREAMING_CHUNK_SIZE,
+        help=f"Nombre de lignes par bloc en mode streaming (défaut: {STREAMING_CHUNK_SIZE})"
+    )
+    parser.add_argument(
+        "--base-url", default=GITHUB_BASE_URL,
+        help="URL de base des Excel ARCAD (défaut: dépôt GitHub)"
+    )
+    parser.add_argument(
+        "--source-dir",
+        help="Lire les Excel depuis ce répertoire local au lieu de GitHub (aucun accès HTTP)"
+    )
+    parser.add_argument(
+        "--cache-dir", default=CACHE_DIR,
+        help=f"Répertoire du cache local (Excel téléchargés et données nettoyées, défaut: {CACHE_DIR})"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Désactive le cache local: téléchargement et analyse Excel complets à chaque exécution"
+    )
+    parser.add_argument(
+        "--offline", action="store_true",
+        help="Utilise uniquement le cache local, sans accès réseau"
+    )
+    parser.add_argument(
+        "--extracts-dir", default=EXTRACTS_DIR,
+        help="Répertoire des extraits IBMi_XREF_PGM.csv / IBMi_XREF_TABLES.csv (NBRELATION) "
+             "(défaut: racine du dépôt)"
+    )
+    parser.add_argument(
+        "--extracts", action="store_true",
+        help="Prépare aussi les extraits IBMi_*.csv de --extracts-dir (délimités par '#') "
+             "en CSV UTF-8 IBMi_Extrait_*.csv, lus et écrits par blocs"
+    )
+    parser.add_argument(
+        "--enrich", action="store_true",
+        help="Enrichit programmes et tables des statistiques d'utilisation de IBMi_PROGRAMMES.csv / "
+             "IBMi_TABLES.csv (taille, lectures, dernière utilisation, tables à fort I/O, programmes morts)"
+    )
+    parser.add_argument(
+        "--extracts-encoding",
+        help="Page de code des extraits IBMi (défaut: latin-1, voir ibmi_extracts.py)"
+    )
+    parser.add_argument(
+        "--delta", action="store_true",
+        help="Compare les CSV au snapshot précédent de csv_neo4j et écrit les lignes "
+             "ajoutées/modifiées/supprimées dans csv_neo4j/delta/"
+    )
+    parser.add_argument(
+        "--bulk-import", action="store_true",
+        help="Génère aussi les fichiers neo4j-admin database import dans csv_neo4j/bulk_import/"
+    )
+    parser.add_argument(
+        "--bulk-shards", type=int, default=BULK_IMPORT_SHARDS,
+        help=f"Nombre maximal de fichiers de données par groupe bulk-import (défaut: {BULK_IMPORT_SHARDS})"
+    )
+    parser.add_argument(
+        "--xref-shards", type=int, metavar="WORKERS",
+        help="Partitionne les CALLS/USES en shards sans nœud commun, chargeables par WORKERS sessions "
+             "parallèles, avec leur planification (csv_neo4j/xref_shards/schedule.json)"
+    )
+    parser.add_argument(
+        "--load-neo4j", action="store_true",
+        help="Charge directement les DataFrames dans Neo4j par lots UNWIND "
+             "(connexion: NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=NEO4J_BATCH_SIZE,
+        help=f"Lignes par lot UNWIND en mode --load-neo4j (défaut: {NEO4J_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--neo4j-workers", type=int, default=NEO4J_WORKERS,
+        help=f"Sessions parallèles (et taille du pool de connexions) en mode --load-neo4j "
+             f"(défaut: {NEO4J_WORKERS})"
+    )
+    parser.add_argument(
+        "--reachability", action="store_true",
+        help="Précalcule l'index des programmes atteignant chaque programme/table "
+             "(CALLS* puis USES) dans csv_neo4j/reachability.npz"
+    )
+    parser.add_argument(
+        "--graph-analysis", action="store_true",
+        help="Cycles d'appels, programmes non atteignables depuis les points d'entrée et tables inutilisées "
+             "(IBMi_Programmes_Analyse.csv, IBMi_Tables_Analyse.csv, IBMi_Cycles.csv)"
+    )
+    parser.add_argument(
+        "--entry-point", action="append", default=[],
+        help="Point d'entrée de --graph-analysis: NOM ou BIBLIOTHEQUE/NOM, jokers * ? acceptés "
+             "(répétable; défaut: programmes sans appelant)"
+    )
+    parser.add_argument(
+        "--entry-points-file",
+        help="Fichier de points d'entrée de --graph-analysis (un motif par ligne, '#' pour commenter)"
+    )
+    parser.add_argument(
+        "--project", action="store_true",
+        help="Ne lit, ne nettoie et n'écrit que les colonnes utiles au modèle Neo4j "
+             "(COLUMN_SCHEMA, types déclarés)"
+    )
+    parser.add_argument(
+        "--compress", choices=sorted(CSV_COMPRESSION_SUFFIXES),
+        help="Écrit les CSV compressés (.gz lu directement par LOAD CSV, .zst pour le chargeur Python) "
+             f"et leur manifeste {CSV_MANIFEST_FILE} (tailles et SHA-256)"
+    )
+    parser.add_argument(
+        "--profile", metavar="DIR",
+        help="Profile chaque phase avec cProfile et écrit DIR/<phase>.prof (et un résumé .txt)"
+    )
+    parser.add_argument(
+        "--report-top-applications", type=int, default=REPORT_TOP_APPLICATIONS,
+        help=f"Nombre d'applications détaillées dans le rapport (défaut: {REPORT_TOP_APPLICATIONS})"
+    )
+    parser.add_argument(
+        "--report-top-attributes", type=int, default=REPORT_TOP_ATTRIBUTES,
+        help=f"Nombre d'attributs détaillés dans le rapport (défaut: {REPORT_TOP_ATTRIBUTES})"
+    )
+    parser.add_argument(
+        "--report-top-degrees", type=int, default=REPORT_TOP_DEGREES,
+        help=f"Nombre de programmes et tables de plus fort degré XREF dans le rapport (défaut: {REPORT_TOP_DEGREES})"
+    )
+    parser.add_argument(
+        "--resolve-libraries", action="store_true",
+        help="Résout les bibliothèques des XREF (*LIBL, alias) en clés (bibliothèque, nom) d'objets connus "
+             "(arcad_resolution.py); les extrémités ambiguës ou introuvables sont listées à part"
+    )
+    parser.add_argument(
+        "--library-map", metavar="JSON",
+        help="Alias et liste de bibliothèques de --resolve-libraries "
+             "({\"aliases\": {...}, \"library_list\": [...]})"
+    )
+    parser.add_argument(
+        "--validate-references", action="store_true",
+        help="Écarte les XREF CALLS/USES sans objet préparé à une extrémité "
+             "(IBMi_RefArcaddesXREF_rejects.csv, avec motif) et signale les sources sans objet généré"
+    )
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Exécute le pipeline comme un graphe d'étapes mémorisées (arcad_pipeline.py): "
+             "seules les étapes dont les entrées ou la configuration ont changé sont relancées"
+    )
+    parser.add_argument(
+        "--parallel", action="store_true",
+        help="Télécharge les trois Excel en parallèle et traite chacun dès réception"
+    )
+    parser.add_argument(
+        "--workers", type=int,
+        help=f"Nombre de processus d'analyse Excel en mode --parallel (défaut: un par classeur, "
+             f"min({len(EXCEL_FILES)}, nombre de CPU))"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Fonction principale"""
+    args = parse_arguments(argv)
+    started_at = datetime.now()
+    run_metrics = []
+    chunk_size = args.chunk_size if args.streaming else None
+    compression = resolve_csv_compression(args.compress)
+    schemas = {kind: COLUMN_SCHEMA[kind] if args.project else None for kind in EXCEL_FILES}
+    report_options = {
+        'top_applications': args.report_top_applications,
+        'top_attributes': args.report_top_attributes,
+        'top_degrees': args.report_top_degrees,
+    }
+    fetch_options = {
+        'base_url': args.base_url,
+        'source_dir': args.source_dir,
+        'cache_dir': None if args.no_cache else args.cache_dir,
+        'offline': args.offline,
+    }
+    
     print("=" * 60)
     print("TRAITEMENT DES FICHIERS EXCEL ARCAD DEPUIS GITHUB")
     print("Génération des CSV pour Neo4j")
@@ -383,49 +2106,238 @@ def main():
     # Création du répertoire de sortie
     Path(OUTPUT_DIR).mkdir(exist_ok=True)
     print(f"Répertoire de sortie: {os.path.abspath(OUTPUT_DIR)}")
+    if chunk_size:
+        print(f"Mode streaming: blocs de {chunk_size:,} lignes")
+    if args.incremental:
+        print(f"Mode incrémental: étapes mémorisées dans {fetch_options['cache_dir'] or '(aucun cache)'}")
+    elif args.parallel:
+        print("Mode parallèle: téléchargements et traitements concurrents")
+    if compression:
+        print(f"CSV compressés: {compression} ({CSV_COMPRESSION_SUFFIXES[compression]})")
+    if args.project:
+        print("Projection des colonnes: " + ", ".join(f"{kind} {len(schema)}"
+                                                      for kind, schema in COLUMN_SCHEMA.items()))
     print()
     
+    # Index des statistiques d'utilisation IBMi (--enrich), construit une fois
+    usage = None
+    if args.enrich and not args.incremental:
+        from ibmi_extracts import EXTRACTS_ENCODING, load_usage_index
+        with measure_phase(run_metrics, 'usage_index', args.profile) as record:
+            usage = load_usage_index(args.extracts_dir, args.extracts_encoding or EXTRACTS_ENCODING)
+            record['rows_out'] = len(usage.index) if usage is not None else 0
+        print()
+    
+    # Snapshot des CSV de l'exécution précédente, avant leur réécriture
+    snapshot = load_delta_snapshot(OUTPUT_DIR) if args.delta else None
+    if args.delta:
+        print()
+    
     try:
-        # Phase 1: Téléchargement et traitement des sources
-        sources_excel = download_excel_from_github(EXCEL_FILES["sources"])
-        if sources_excel is None:
-            print("⚠️ Fichier des sources non accessible - continuons avec les autres fichiers")
-            df_sources = None
+        if args.incremental:
+            # Phases 1 à 5: graphe d'étapes, seules les étapes périmées sont exécutées
+            from arcad_pipeline import run_incremental
+            load_frames = (args.bulk_import or args.load_neo4j or args.reachability or bool(args.xref_shards)
+                           or args.graph_analysis)
+            ok, frames = run_incremental(OUTPUT_DIR, fetch_options, run_metrics, chunk_size, compression,
+                                         args.project, args.extracts_dir, report_options, args.workers,
+                                         args.profile, load_frames, args.extracts, args.extracts_encoding,
+                                         args.enrich, args.resolve_libraries, args.library_map,
+                                         args.validate_references)
+            if not ok:
+                return 1
+            print()
+        elif args.parallel:
+            # Phases 1 à 3: téléchargements et traitements en parallèle
+            with measure_phase(run_metrics, 'workbooks', args.profile) as record:
+                results = process_workbooks_concurrently(OUTPUT_DIR, fetch_options, chunk_size, args.workers,
+                                                         args.extracts_dir, run_metrics, args.profile,
+                                                         compression, args.project, usage)
+                workbook_records = [r for r in run_metrics if r['phase'] in EXCEL_FILES]
+                record['bytes_read'] = sum(r['bytes_read'] or 0 for r in workbook_records)
+                record['rows_in'] = sum(r['rows_in'] or 0 for r in workbook_records)
+            
+            df_sources = results['sources']
+            if df_sources is None:
+                print("⚠️ Fichier des sources non accessible - continuons avec les autres fichiers")
+            
+            df_objets, df_programmes, df_tables = results['objets'] or (None, None, None)
+            if df_objets is None:
+                print("✗ Impossible de continuer sans le fichier des objets")
+                return 1
+            
+            df_xref = results['xref']
+            if df_xref is None:
+                print("⚠️ Fichier XREF non accessible - relations limitées")
+            print()
         else:
-            df_sources = process_sources_excel(sources_excel, OUTPUT_DIR)
-        print()
-        
-        # Phase 2: Téléchargement et traitement des objets
-        objets_excel = download_excel_from_github(EXCEL_FILES["objets"])
-        if objets_excel is None:
-            print("✗ Impossible de continuer sans le fichier des objets")
-            return 1
+            # Phase 1: Téléchargement et traitement des sources
+            sources_excel = download_workbook(run_metrics, 'sources', fetch_options, args.profile)
+            if sources_excel is None:
+                print("⚠️ Fichier des sources non accessible - continuons avec les autres fichiers")
+                df_sources = None
+            else:
+                with measure_phase(run_metrics, 'sources', args.profile) as record:
+                    df_sources = process_sources_excel(sources_excel, OUTPUT_DIR, chunk_size,
+                                                       fetch_options['cache_dir'], record, compression,
+                                                       schemas['sources'])
+            print()
             
-        df_objets, df_programmes, df_tables = process_objets_excel(objets_excel, OUTPUT_DIR)
-        if df_objets is None:
-            print("✗ Erreur lors du traitement des objets")
-            return 1
-        print()
+            # Phase 2: Téléchargement et traitement des objets
+            objets_excel = download_workbook(run_metrics, 'objets', fetch_options, args.profile)
+            if objets_excel is None:
+                print("✗ Impossible de continuer sans le fichier des objets")
+                return 1
+            
+            with measure_phase(run_metrics, 'objets', args.profile) as record:
+                df_objets, df_programmes, df_tables = process_objets_excel(objets_excel, OUTPUT_DIR, chunk_size,
+                                                                           fetch_options['cache_dir'], record,
+                                                                           compression, schemas['objets'], usage)
+            if df_objets is None:
+                print("✗ Erreur lors du traitement des objets")
+                return 1
+            print()
+            
+            # Phase 3: Téléchargement et traitement des XREF
+            xref_excel = download_workbook(run_metrics, 'xref', fetch_options, args.profile)
+            if xref_excel is None:
+                print("⚠️ Fichier XREF non accessible - relations limitées")
+                df_xref = None
+            else:
+                with measure_phase(run_metrics, 'xref', args.profile) as record:
+                    df_xref = process_xref_excel(xref_excel, OUTPUT_DIR, chunk_size, fetch_options['cache_dir'],
+                                                 args.extracts_dir, record, compression, schemas['xref'])
+            print()
         
-        # Phase 3: Téléchargement et traitement des XREF
-        xref_excel = download_excel_from_github(EXCEL_FILES["xref"])
-        if xref_excel is None:
-            print("⚠️ Fichier XREF non accessible - relations limitées")
-            df_xref = None
-        else:
-            df_xref = process_xref_excel(xref_excel, OUTPUT_DIR)
-        print()
+        # Résolution des bibliothèques XREF (*LIBL, alias), avant le delta
+        if args.resolve_libraries and not args.incremental and df_xref is not None:
+            from arcad_resolution import resolve_xref
+            with measure_phase(run_metrics, 'resolve_libraries', args.profile) as record:
+                df_xref = resolve_xref(df_xref, df_programmes, df_tables, OUTPUT_DIR, compression,
+                                       args.library_map, record)
+            print()
+        
+        # Intégrité référentielle: XREF sans objet préparé écartées avant le delta et le chargement
+        if args.validate_references and not args.incremental and df_xref is not None:
+            from arcad_integrity import validate_references
+            with measure_phase(run_metrics, 'validate_references', args.profile) as record:
+                df_xref = validate_references(df_xref, df_sources, df_programmes, df_tables, OUTPUT_DIR,
+                                              compression, record)
+            print()
         
-        # Phase 4: Création des métadonnées
-        if df_objets is not None:
-            create_metadata_csvs(OUTPUT_DIR, df_objets)
+        # Delta par rapport à l'exécution précédente
+        if snapshot is not None:
+            with measure_phase(run_metrics, 'delta', args.profile) as record:
+                summary = export_delta_csvs(OUTPUT_DIR, snapshot)
+                record['rows_out'] = sum(sum(counts) for counts in summary.values())
+                record['outputs'] = [os.path.join(OUTPUT_DIR, DELTA_DIR)]
+            print()
+        
+        # Phase 4: Création des métadonnées (profils des objets partagés avec le rapport)
+        profiles = None
+        if not args.incremental and df_objets is not None:
+            with measure_phase(run_metrics, 'metadata', args.profile) as record:
+                record['rows_in'] = len(df_objets)
+                profiles = profile_columns(df_objets, PROFILE_COLUMNS)
+                create_metadata_csvs(OUTPUT_DIR, df_objets, compression, profiles)
+                record['outputs'] = [find_csv_file(OUTPUT_DIR, filename) for filename in METADATA_COLUMNS
+                                     if find_csv_file(OUTPUT_DIR, filename)]
         print()
         
         # Phase 5: Génération du rapport
-        if df_sources is not None or df_objets is not None or df_xref is not None:
-            generate_statistics_report(df_sources, df_objets, df_xref, OUTPUT_DIR)
+        if not args.incremental and (df_sources is not None or df_objets is not None or df_xref is not None):
+            with measure_phase(run_metrics, 'report', args.profile) as record:
+                record['rows_in'] = sum(len(df) for df in (df_sources, df_objets, df_xref) if df is not None)
+                generate_statistics_report(df_sources, df_objets, df_xref, OUTPUT_DIR, profiles=profiles,
+                                           **report_options)
+                record['outputs'] = [os.path.join(OUTPUT_DIR, REPORT_FILE), os.path.join(OUTPUT_DIR, REPORT_JSON_FILE)]
         print()
         
+        # Extraits IBMi délimités par '#' (optionnel)
+        if args.extracts and not args.incremental:
+            from ibmi_extracts import EXTRACTS_ENCODING, export_extracts
+            with measure_phase(run_metrics, 'extracts', args.profile) as record:
+                export_extracts(args.extracts_dir, OUTPUT_DIR, encoding=args.extracts_encoding or EXTRACTS_ENCODING,
+                                compression=compression, metrics=record)
+            print()
+        
+        if not args.incremental:
+            frames = {
+                'sources': df_sources,
+                'objets': df_objets,
+                'programmes': df_programmes,
+                'tables': df_tables,
+                'xref': df_xref,
+            }
+        
+        # Phase 6: Fichiers neo4j-admin database import (optionnel)
+        if args.bulk_import:
+            from neo4j_bulk_import import BULK_IMPORT_DIR, export_bulk_import
+            with measure_phase(run_metrics, 'bulk_import', args.profile) as record:
+                try:
+                    export_bulk_import(frames, OUTPUT_DIR, args.bulk_shards)
+                    record['outputs'] = [os.path.join(OUTPUT_DIR, BULK_IMPORT_DIR)]
+                except Exception as e:
+                    print(f"✗ Erreur lors de l'export bulk-import: {str(e)}")
+            print()
+        
+        # Shards XREF pour un chargement parallèle sans interblocage (optionnel)
+        if args.xref_shards:
+            from arcad_sharding import export_xref_shards
+            with measure_phase(run_metrics, 'xref_shards', args.profile) as record:
+                try:
+                    export_xref_shards(frames['xref'], OUTPUT_DIR, args.xref_shards, compression, record)
+                except Exception as e:
+                    print(f"✗ Erreur lors de la partition des XREF: {str(e)}")
+            print()
+        
+        # Analyses du graphe d'appels: cycles, code mort, tables inutilisées (optionnel)
+        if args.graph_analysis:
+            from arcad_analysis import export_graph_analysis, load_entry_points
+            with measure_phase(run_metrics, 'graph_analysis', args.profile) as record:
+                try:
+                    entry_points = args.entry_point + (load_entry_points(args.entry_points_file)
+                                                       if args.entry_points_file else [])
+                    export_graph_analysis(frames, OUTPUT_DIR, entry_points, compression, record)
+                except Exception as e:
+                    print(f"✗ Erreur lors de l'analyse du graphe d'appels: {str(e)}")
+            print()
+        
+        # Phase 7: Chargement direct dans Neo4j (optionnel)
+        if args.load_neo4j:
+            from neo4j_loader import load_to_neo4j
+            with measure_phase(run_metrics, 'neo4j', args.profile) as record:
+                try:
+                    record['steps'] = load_to_neo4j(frames, batch_size=args.batch_size,
+                                                  workers=args.neo4j_workers)
+                    record['rows_in'] = sum(step['rows'] for step in record['steps'])
+                except Exception as e:
+                    print(f"✗ Erreur lors du chargement Neo4j: {str(e)}")
+            print()
+        
+        # Phase 8: Index d'atteignabilité CALLS*/USES (optionnel)
+        if args.reachability:
+            from arcad_reachability import REACHABILITY_FILE, build_reachability_index
+            with measure_phase(run_metrics, 'reachability', args.profile) as record:
+                try:
+                    build_reachability_index(frames, OUTPUT_DIR)
+                    record['outputs'] = [os.path.join(OUTPUT_DIR, REACHABILITY_FILE)]
+                except Exception as e:
+                    print(f"✗ Erreur lors du calcul de l'index d'atteignabilité: {str(e)}")
+            print()
+        
+        # Manifeste des CSV compressés (tailles et empreintes pour le transfert),
+        # après toutes les phases qui écrivent des CSV
+        manifest_file = os.path.join(OUTPUT_DIR, CSV_MANIFEST_FILE)
+        if compression:
+            with measure_phase(run_metrics, 'manifest', args.profile) as record:
+                record['rows_in'] = len(write_csv_manifest(OUTPUT_DIR, compression))
+                record['outputs'] = [manifest_file]
+            print()
+        elif os.path.exists(manifest_file):
+            # Manifeste d'une exécution compressée précédente: il décrirait des fichiers supprimés
+            os.remove(manifest_file)
+        
         # Résumé final
         print("=" * 60)
         print("TRAITEMENT TERMINÉ")
@@ -435,7 +2347,7 @@ def main():
         print("Fichiers CSV générés:")
         
         if os.path.exists(OUTPUT_DIR):
-            csv_files = [f for f in os.listdir(OUTPUT_DIR) if f.endswith('.csv')]
+            csv_files = [f for f in os.listdir(OUTPUT_DIR) if f.endswith(CSV_FILE_SUFFIXES)]
             for file in sorted(csv_files):
                 file_path = os.path.join(OUTPUT_DIR, file)
                 file_size = os.path.getsize(file_path)
@@ -457,6 +2369,13 @@ def main():
         import traceback
         traceback.print_exc()
         return 1
+    
+    finally:
+        # Mesures écrites même en cas d'arrêt anticipé, pour diagnostiquer l'échec
+        try:
+            write_run_metrics(OUTPUT_DIR, run_metrics, started_at, vars(args))
+        except Exception as e:
+            print(f"✗ Erreur lors de l'écriture des mesures d'exécution: {str(e)}")
 
 if __name__ == "__main__":
     import sys
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Extraits IBMi - Patrimoine IBMi ARCAD
+Lecture en streaming des extraits catalogue délimités par '#'
+(IBMi_PROGRAMMES, IBMi_TABLES, IBMi_XREF_PGM, IBMi_XREF_TABLES): transcodage
+explicite de la page de code, réparation de l'en-tête et des noms d'objets,
+puis écriture CSV UTF-8 par blocs (mémoire constante)
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import csv
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import (CSV_COMPRESSION_SUFFIXES, EXTRACTS_DIR, OUTPUT_DIR, PartitionedCsvWriter,
+                                 csv_output_path, resolve_csv_compression, strip_text_columns)
+
+# Page de code des extraits: transfert IBMi (CCSID 297, français) -> Windows.
+# Les caractères '#' et '@' des noms d'objets y deviennent '£' et 'à'.
+EXTRACTS_ENCODING = 'latin-1'
+EXTRACT_SEPARATOR = '#'
+EXTRACT_NAME_TRANSLATION = str.maketrans({'£': '#', 'à': '@'})
+
+# Lignes par bloc: la mémoire ne dépend pas de la taille de l'extrait
+EXTRACT_CHUNK_SIZE = 200000
+
+# Extraits: fichier brut, CSV préparé, colonnes de noms IBMi (réparées par
+# EXTRACT_NAME_TRANSLATION), colonnes entières et colonnes dates (AAAA-MM-JJ).
+# Les autres colonnes restent du texte (libellés accentués conservés).
+EXTRACT_SPECS = {
+    'programmes': {
+        'file': 'IBMi_PROGRAMMES.csv',
+        'csv': 'IBMi_Extrait_Programmes.csv',
+        'names': ['OBJLIB', 'OBJNAME', 'SOURCE_MEMBER'],
+        'integers': ['OBJSIZE', 'DAYS_USED_COUNT'],
+        'dates': ['CHANGE_DATE', 'SOURCE_DATE', 'LAST_USED_DATE'],
+    },
+    'tables': {
+        'file': 'IBMi_TABLES.csv',
+        'csv': 'IBMi_Extrait_Tables.csv',
+        'names': ['SYSTEM_TABLE_SCHEMA', 'SYSTEM_TABLE_NAME', 'TABLE_NAME'],
+        'integers': ['COLUMN_COUNT', 'ROW_LENGTH', 'NUMBER_ROWS', 'DATA_SIZE', 'DAYS_USED_COUNT',
+                     'NUMBER_DISTINCT_INDEXES', 'PHYSICAL_READS', 'LOGICAL_READS', 'INSERT_OPERATIONS',
+                     'UPDATE_OPERATIONS', 'OPEN_OPERATIONS', 'CLOSE_OPERATIONS'],
+        'dates': ['LAST_ALTERED_DATE', 'LAST_CHANGE_DATE', 'LAST_USED_DATE'],
+    },
+    'xref_pgm': {
+        'file': 'IBMi_XREF_PGM.csv',
+        'csv': 'IBMi_Extrait_XREF_PGM.csv',
+        'names': ['SOURCELIB', 'SOURCEPGMNAME', 'CIBLELIB', 'CIBLENAME'],
+        'integers': ['NBRELATION'],
+        'dates': [],
+    },
+    'xref_tables': {
+        'file': 'IBMi_XREF_TABLES.csv',
+        'csv': 'IBMi_Extrait_XREF_Tables.csv',
+        'names': ['SOURCELIB', 'SOURCEPGMNAME', 'CIBLELIB', 'CIBLENAME', 'PFCIBLELIB', 'PFCIBLENOM'],
+        'integers': ['NBRELATION'],
+        'dates': [],
+    },
+}
+
+# Enrichissement des objets ARCAD (--enrich): clé (type, bibliothèque, nom) de
+# chaque extrait et colonnes reprises, préfixées USAGE_PREFIX dans les CSV objets
+USAGE_EXTRACTS = {
+    'programmes': ('*PGM', 'OBJLIB', 'OBJNAME', ['OBJSIZE', 'LAST_USED_DATE', 'DAYS_USED_COUNT']),
+    'tables': ('*FILE', 'SYSTEM_TABLE_SCHEMA', 'SYSTEM_TABLE_NAME',
+               ['NUMBER_ROWS', 'DATA_SIZE', 'LOGICAL_READS', 'PHYSICAL_READS', 'LAST_USED_DATE',
+                'DAYS_USED_COUNT']),
+}
+USAGE_PREFIX = 'IBMI_'
+
+# Bibliothèques des extraits (système) -> bibliothèques de référence ARCAD
+LIBRARY_ALIASES = {'SPRLIB': 'SPRLIBREF', 'SPFLIB': 'SPFLIBREF'}
+
+# Table "chaude": opérations d'I/O (lectures logiques et physiques, insertions,
+# mises à jour) au moins égales à ce quantile des tables ayant de l'activité
+IO_OPERATION_COLUMNS = ['LOGICAL_READS', 'PHYSICAL_READS', 'INSERT_OPERATIONS', 'UPDATE_OPERATIONS']
+IO_HOT_QUANTILE = 0.9
+
+# Programme "mort": aucune utilisation depuis ce nombre de jours avant la date
+# de l'extrait (date la plus récente de ses colonnes dates)
+DEAD_PROGRAM_DAYS = 365
+
+def repair_header(line):
+    """Noms de colonnes d'une ligne d'en-tête (guillemets, BOM et espaces retirés)"""
+    line = line.lstrip('﻿').strip().replace('"', '')
+    return [name.strip().upper() for name in line.split(EXTRACT_SEPARATOR)]
+
+def read_extract_header(path, encoding=EXTRACTS_ENCODING):
+    """Lit et répare l'en-tête d'un extrait"""
+    with open(path, encoding=encoding, errors='replace', newline='') as f:
+        return repair_header(f.readline())
+
+def translate_names(series):
+    """Répare les noms IBMi ('£' -> '#', 'à' -> '@'), une fois par valeur distincte"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    repaired = np.array([str(u).translate(EXTRACT_NAME_TRANSLATION) for u in uniques] + [""], dtype=object)
+    return pd.Series(repaired[codes], index=series.index)
+
+def to_integers(series):
+    """Convertit une colonne texte en Int64, une fois par valeur distincte (vides -> NA)"""
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    values = pd.array(pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce'), dtype='Int64')
+    result = values.take(codes, allow_fill=True)
+    return pd.Series(result, index=series.index)
+
+def clean_extract_chunk(df, spec):
+    """Nettoie un bloc d'extrait: espaces, noms IBMi, entiers (Int64) et dates"""
+    df = strip_text_columns(df)
+    for col in spec['names']:
+        if col in df.columns:
+            df[col] = translate_names(df[col])
+    for col in spec['integers']:
+        if col in df.columns:
+            df[col] = to_integers(df[col])
+    for col in spec['dates']:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], format='%Y-%m-%d', errors='coerce')
+    return df
+
+def extract_path(kind, extracts_dir=EXTRACTS_DIR):
+    """Chemin de l'extrait brut d'un type (None s'il est absent)"""
+    path = os.path.join(extracts_dir, EXTRACT_SPECS[kind]['file']) if extracts_dir else None
+    return path if path and os.path.exists(path) else None
+
+def iter_extract_chunks(path, spec, chunk_size=EXTRACT_CHUNK_SIZE, encoding=EXTRACTS_ENCODING, usecols=None):
+    """Itère sur les blocs nettoyés d'un extrait
+
+    Les champs ne sont jamais entre guillemets (QUOTE_NONE): seuls les
+    séparateurs délimitent les colonnes. Les octets invalides pour la page
+    de code sont remplacés plutôt que d'interrompre la lecture. Avec usecols,
+    seules ces colonnes (noms réparés) sont lues.
+    """
+    header = read_extract_header(path, encoding)
+    if usecols is not None:
+        missing = [col for col in usecols if col not in header]
+        if missing:
+            raise KeyError(f"{os.path.basename(path)}: colonnes {', '.join(missing)} non trouvées")
+    reader = pd.read_csv(path, sep=EXTRACT_SEPARATOR, header=None, skiprows=1, names=header,
+                         usecols=usecols, dtype=str, keep_default_na=False, quoting=csv.QUOTE_NONE,
+                         encoding=encoding, encoding_errors='replace', chunksize=chunk_size)
+    with reader:
+        for chunk in reader:
+            yield clean_extract_chunk(chunk, spec)
+
+def load_extract(kind, extracts_dir=EXTRACTS_DIR, encoding=EXTRACTS_ENCODING, usecols=None):
+    """Lit un extrait complet et nettoyé (None s'il est absent)"""
+    path = extract_path(kind, extracts_dir)
+    if path is None:
+        return None
+    chunks = list(iter_extract_chunks(path, EXTRACT_SPECS[kind], encoding=encoding, usecols=usecols))
+    return pd.concat(chunks, ignore_index=True) if chunks else None
+
+def export_extract(kind, extracts_dir, output_dir, chunk_size=EXTRACT_CHUNK_SIZE, encoding=EXTRACTS_ENCODING,
+                   compression=None):
+    """Écrit le CSV préparé d'un extrait, bloc par bloc; retourne (fichier, lignes) ou None s'il est absent"""
+    path = extract_path(kind, extracts_dir)
+    spec = EXTRACT_SPECS[kind]
+    if path is None:
+        print(f"⚠️ Extrait {spec['file']} absent de {extracts_dir} - ignoré")
+        return None
+
+    output_file = csv_output_path(output_dir, spec['csv'], compression)
+    rows = 0
+    with PartitionedCsvWriter() as writer:
+        for chunk in iter_extract_chunks(path, spec, chunk_size, encoding):
+            writer.write(chunk, {output_file: None})
+            rows += len(chunk)
+            print(f"  {spec['file']}: {rows:,} lignes lues...")
+    print(f"✓ Extrait {spec['file']}: {rows:,} lignes -> {output_file}")
+    return output_file, rows
+
+def export_extracts(extracts_dir, output_dir, chunk_size=EXTRACT_CHUNK_SIZE, encoding=EXTRACTS_ENCODING,
+                    compression=None, metrics=None):
+    """Prépare tous les extraits présents; retourne la liste des CSV écrits
+
+    Avec metrics (dict produit par measure_phase), les volumes lus et écrits
+    y sont renseignés.
+    """
+    print("Préparation des extraits IBMi...")
+    metrics = {} if metrics is None else metrics
+    outputs = []
+    rows_in = 0
+    bytes_read = 0
+    for kind in EXTRACT_SPECS:
+        try:
+            result = export_extract(kind, extracts_dir, output_dir, chunk_size, encoding, compression)
+        except Exception as e:
+            print(f"✗ Erreur lors de la préparation de l'extrait {EXTRACT_SPECS[kind]['file']}: {str(e)}")
+            continue
+        if result is None:
+            continue
+        outputs.append(result[0])
+        rows_in += result[1]
+        bytes_read += os.path.getsize(extract_path(kind, extracts_dir))
+    metrics.update({'rows_in': rows_in, 'rows_out': rows_in, 'bytes_read': bytes_read, 'outputs': outputs})
+    return outputs
+
+class UsageIndex:
+    """Index de hachage (type, bibliothèque, nom) des statistiques d'utilisation IBMi
+
+    Construit une fois à partir de IBMi_PROGRAMMES et IBMi_TABLES (bibliothèques
+    ramenées à leur référence ARCAD par LIBRARY_ALIASES), il enrichit un
+    DataFrame d'objets en une seule recherche vectorisée par bloc: métriques
+    USAGE_PREFIX*, drapeaux IBMI_IO_HOT (tables) et IBMI_DEAD (programmes).
+    Les objets absents des extraits gardent des valeurs manquantes.
+    """
+
+    def __init__(self, index, metrics):
+        self.index = index
+        self.metrics = metrics
+
+    @classmethod
+    def from_extracts(cls, extracts_dir=EXTRACTS_DIR, encoding=EXTRACTS_ENCODING, aliases=None):
+        """Lit les extraits présents; None si aucun ne l'est"""
+        aliases = LIBRARY_ALIASES if aliases is None else aliases
+        frames = []
+        for kind, (object_type, library_col, name_col, columns) in USAGE_EXTRACTS.items():
+            extract = load_extract(kind, extracts_dir, encoding)
+            if extract is None:
+                print(f"⚠️ Extrait {EXTRACT_SPECS[kind]['file']} absent - objets {object_type} non enrichis")
+                continue
+            usage = pd.DataFrame({col: extract[col] for col in columns})
+            if kind == 'tables':
+                usage['IO_OPERATIONS'] = extract[IO_OPERATION_COLUMNS].sum(axis=1)
+                active = usage['IO_OPERATIONS'][usage['IO_OPERATIONS'] > 0]
+                threshold = active.quantile(IO_HOT_QUANTILE) if len(active) else None
+                usage['IO_HOT'] = (usage['IO_OPERATIONS'] >= threshold) if threshold is not None else False
+            else:
+                dates = extract[[col for col in EXTRACT_SPECS[kind]['dates'] if col in extract.columns]]
+                reference = dates.max().max()
+                cutoff = reference - pd.Timedelta(days=DEAD_PROGRAM_DAYS) if pd.notna(reference) else None
+                last_used = usage['LAST_USED_DATE']
+                usage['DEAD'] = last_used.isna() if cutoff is None else (last_used.isna() | (last_used < cutoff))
+            usage.insert(0, 'TYPE', object_type)
+            usage.insert(1, 'LIBRARY', extract[library_col].replace(aliases))
+            usage.insert(2, 'NAME', extract[name_col])
+            frames.append(usage)
+        if not frames:
+            return None
+
+        usage = pd.concat(frames, ignore_index=True)
+        usage = usage.drop_duplicates(subset=['TYPE', 'LIBRARY', 'NAME'], keep='last').reset_index(drop=True)
+        for col in ('IO_HOT', 'DEAD'):
+            if col in usage.columns:
+                usage[col] = usage[col].astype('boolean')
+        index = pd.MultiIndex.from_frame(usage[['TYPE', 'LIBRARY', 'NAME']])
+        metrics = usage.drop(columns=['TYPE', 'LIBRARY', 'NAME']).add_prefix(USAGE_PREFIX)
+        return cls(index, metrics)
+
+    def enrich(self, df):
+        """Ajoute à df (objets LST_CTYPE/LST_JLIB/LST_JOBJ) les colonnes d'utilisation"""
+        if not all(col in df.columns for col in ['LST_CTYPE', 'LST_JLIB', 'LST_JOBJ']):
+            return df
+        keys = pd.MultiIndex.from_arrays([df['LST_CTYPE'].astype(object), df['LST_JLIB'].astype(object),
+                                          df['LST_JOBJ'].astype(object)])
+        positions = self.index.get_indexer(keys)
+        columns = {col: values.array.take(positions, allow_fill=True) for col, values in self.metrics.items()}
+        return df.assign(**columns)
+
+    @staticmethod
+    def describe(df):
+        """Résumé de l'enrichissement d'un DataFrame d'objets"""
+        matched = int(df[f"{USAGE_PREFIX}DAYS_USED_COUNT"].notna().sum()) \
+            if f"{USAGE_PREFIX}DAYS_USED_COUNT" in df.columns else 0
+        dead = int(df[f"{USAGE_PREFIX}DEAD"].sum()) if f"{USAGE_PREFIX}DEAD" in df.columns else 0
+        hot = int(df[f"{USAGE_PREFIX}IO_HOT"].sum()) if f"{USAGE_PREFIX}IO_HOT" in df.columns else 0
+        return (f"{matched} objets appariés aux extraits IBMi, {dead} programmes morts, "
+                f"{hot} tables à fort I/O")
+
+def load_usage_index(extracts_dir=EXTRACTS_DIR, encoding=EXTRACTS_ENCODING):
+    """Construit l'index d'utilisation (None si aucun extrait, ⚠️ en cas d'erreur)"""
+    try:
+        usage = UsageIndex.from_extracts(extracts_dir, encoding)
+    except Exception as e:
+        print(f"✗ Erreur lors de la lecture des statistiques d'utilisation IBMi: {str(e)}")
+        return None
+    if usage is not None:
+        print(f"✓ Index d'utilisation IBMi: {len(usage.index):,} objets")
+    return usage
+
+def main(argv=None):
+    """Fonction principale: prépare les extraits IBMi en CSV UTF-8"""
+    parser = argparse.ArgumentParser(description="Préparation des extraits IBMi délimités par '#'")
+    parser.add_argument("--extracts-dir", default=EXTRACTS_DIR,
+                        help="Répertoire des extraits IBMi_*.csv (défaut: racine du dépôt)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--encoding", default=EXTRACTS_ENCODING,
+                        help=f"Page de code des extraits (défaut: {EXTRACTS_ENCODING})")
+    parser.add_argument("--chunk-size", type=int, default=EXTRACT_CHUNK_SIZE,
+                        help=f"Lignes par bloc (défaut: {EXTRACT_CHUNK_SIZE})")
+    parser.add_argument("--compress", choices=sorted(CSV_COMPRESSION_SUFFIXES), help="CSV compressés")
+    args = parser.parse_args(argv)
+
+    Path(args.output_dir).mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    outputs = export_extracts(args.extracts_dir, args.output_dir, args.chunk_size, args.encoding,
+                              resolve_csv_compression(args.compress))
+    print(f"✓ {len(outputs)} extraits préparés en {time.perf_counter() - start:.2f} s")
+    return 0 if outputs else 1
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
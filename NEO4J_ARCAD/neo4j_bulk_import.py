@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Export bulk-import Neo4j - Patrimoine IBMi ARCAD
+Génère les fichiers nœuds/relations au format de neo4j-admin database import
+(en-têtes :ID / :LABEL / :START_ID / :END_ID / :TYPE, propriétés typées),
+découpés en shards, pour une reconstruction complète hors ligne
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import os
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from excel_github_to_csv import BULK_IMPORT_SHARDS, OUTPUT_DIR, build_metadata_frames
+from neo4j_loader import (METADATA_LABELS, USAGE_PROPERTIES, metadata_rows, object_rows,
+                          read_prepared_csvs, source_rows, xref_resolved, xref_rows)
+
+# Répertoire de sortie (sous csv_neo4j); un groupe n'est découpé en plusieurs
+# fichiers de données qu'au-delà de BULK_IMPORT_MIN_SHARD_ROWS lignes par fichier
+BULK_IMPORT_DIR = "bulk_import"
+BULK_IMPORT_MIN_SHARD_ROWS = 1000
+
+# Script de lancement généré à côté des fichiers
+IMPORT_SCRIPT = "import.sh"
+
+# Note des relations XREF (identique au script Cypher), XREF brutes ou résolues
+XREF_NOTE = 'Target library ignored - OXR_TO_LIB unreliable'
+XREF_RESOLVED_NOTE = 'Target library resolved (*LIBL/aliases)'
+
+def rows_frame(rows, columns):
+    """Convertit des lignes UNWIND (liste de dict) en DataFrame aux colonnes fixes"""
+    return pd.DataFrame(rows, columns=columns)
+
+def object_ids(df):
+    """Identifiants Programme / Table: BIBLIOTHEQUE/OBJET"""
+    return df['library'] + '/' + df['name']
+
+def source_ids(df):
+    """Identifiants Source: BIBLIOTHEQUE/FICHIER(MEMBRE)"""
+    return df['library'] + '/' + df['sourceFile'] + '(' + df['name'] + ')'
+
+def add_usage_columns(nodes, usage):
+    """Ajoute aux nœuds Programme / Table les propriétés d'utilisation IBMi (--enrich)"""
+    usage = pd.DataFrame(usage.tolist(), index=nodes.index)
+    for prop, kind in USAGE_PROPERTIES.values():
+        if prop in usage.columns:
+            values = usage[prop].astype('Int64') if kind == 'long' else usage[prop]
+            nodes.insert(len(nodes.columns) - 1, f'{prop}:{kind}', values)
+
+def build_bulk_nodes(frames, loaded_at):
+    """Construit les DataFrames de nœuds au format bulk-import
+
+    Chaque libellé a son propre espace d'identifiants (:ID(Libellé)).
+    Retourne (dict {libellé: DataFrame}, dict {libellé: DataFrame de travail})
+    où les DataFrames de travail gardent id + propriétés pour les relations.
+    """
+    nodes = {}
+    working = {}
+
+    df_objets = frames.get('objets')
+    metadata = build_metadata_frames(df_objets) if df_objets is not None else {}
+    for filename, label in METADATA_LABELS.items():
+        df = rows_frame(metadata_rows(metadata[filename]) if filename in metadata else [],
+                        ['name', 'description'])
+        working[label] = df.assign(id=df['name'])
+        nodes[label] = pd.DataFrame({
+            f':ID({label})': df['name'],
+            'name': df['name'],
+            'description': df['description'],
+            'loadedAt:datetime': loaded_at,
+            ':LABEL': label,
+        })
+
+    sources = rows_frame(source_rows(frames.get('sources')),
+                         ['name', 'library', 'sourceFile', 'sourceType', 'description',
+                          'lastModified', 'lineCount', 'application'])
+    working['Source'] = sources.assign(id=source_ids(sources))
+    nodes['Source'] = pd.DataFrame({
+        ':ID(Source)': working['Source']['id'],
+        'name': sources['name'],
+        'library': sources['library'],
+        'sourceFile': sources['sourceFile'],
+        'sourceType': sources['sourceType'],
+        'description': sources['description'],
+        'lastModified:date': sources['lastModified'],
+        'lineCount:long': sources['lineCount'],
+        'loadedAt:datetime': loaded_at,
+        ':LABEL': 'Source',
+    })
+
+    object_columns = ['name', 'library', 'type', 'attribute', 'arcadType', 'description',
+                      'lastModified', 'application', 'usage']
+    for label, rows in [('Programme', object_rows(frames.get('programmes'), '*PGM')),
+                        ('Table', object_rows(frames.get('tables'), '*FILE', ['PF', 'TABLE']))]:
+        df = rows_frame(rows, object_columns)
+        working[label] = df.assign(id=object_ids(df))
+        nodes[label] = pd.DataFrame({
+            f':ID({label})': working[label]['id'],
+            'name': df['name'],
+            'library': df['library'],
+            'type': df['type'],
+            'attribute': df['attribute'],
+            'arcadType': df['arcadType'],
+            'description': df['description'],
+            'lastModified:date': df['lastModified'],
+            'loadedAt:datetime': loaded_at,
+            ':LABEL': label,
+        })
+        add_usage_columns(nodes[label], df['usage'])
+
+    return nodes, working
+
+def relationship_frame(start_label, end_label, rel_type, start_ids, end_ids, properties=None):
+    """DataFrame de relations bulk-import, dédoublonné sur (début, fin)"""
+    df = pd.DataFrame({
+        f':START_ID({start_label})': start_ids.to_numpy(),
+        f':END_ID({end_label})': end_ids.to_numpy(),
+    })
+    for column, values in (properties or {}).items():
+        df[column] = values.array if isinstance(values, pd.Series) else values
+    df[':TYPE'] = rel_type
+    # MERGE côté Cypher: une relation par couple de nœuds, dernière ligne gagnante
+    return df.drop_duplicates(subset=list(df.columns[:2]), keep='last')
+
+def link_by_value(start, end, start_column, end_column):
+    """Apparie deux DataFrames de travail sur une valeur (jointure interne)"""
+    return start[['id', start_column]].merge(
+        end[['id', end_column]], left_on=start_column, right_on=end_column,
+        suffixes=('_start', '_end')
+    )
+
+def build_bulk_relationships(frames, working, created_at):
+    """Construit les DataFrames de relations (BELONGS_TO, GENERATES, typage, CALLS, USES)
+
+    Mêmes règles d'appariement que IBMi_Arcad_LoadNeo4j.txt, résolues en
+    pandas: GENERATES par nom + type de source = attribut, CALLS/USES par
+    bibliothèque + nom d'appelant et par nom seul pour la cible.
+    """
+    relationships = {}
+
+    # BELONGS_TO (Programme / Table / Source -> Application)
+    for label in ['Programme', 'Table', 'Source']:
+        pairs = link_by_value(working[label], working['Application'], 'application', 'name')
+        relationships[f'BELONGS_TO-{label}'] = relationship_frame(
+            label, 'Application', 'BELONGS_TO', pairs['id_start'], pairs['id_end'])
+
+    # GENERATES (Source -> Programme / Table)
+    sources = working['Source']
+    for label in ['Programme', 'Table']:
+        pairs = sources[['id', 'name', 'sourceType']].merge(
+            working[label][['id', 'name', 'attribute']],
+            left_on=['name', 'sourceType'], right_on=['name', 'attribute'],
+            suffixes=('_start', '_end')
+        )
+        relationships[f'GENERATES-{label}'] = relationship_frame(
+            'Source', label, 'GENERATES', pairs['id_start'], pairs['id_end'],
+            {'createdAt:datetime': created_at})
+
+    # Typage (Programme / Table -> TypeObjIBMi / TypeObjARCAD / Attribut)
+    for rel_type, end_label, column in [('TYPED_AS_IBM', 'TypeObjIBMi', 'type'),
+                                        ('TYPED_AS_ARCAD', 'TypeObjARCAD', 'arcadType'),
+                                        ('HAS_ATTRIBUTE', 'Attribut', 'attribute')]:
+        for label in ['Programme', 'Table']:
+            start = working[label][working[label][column] != '']
+            pairs = link_by_value(start, working[end_label], column, 'name')
+            relationships[f'{rel_type}-{label}'] = relationship_frame(
+                label, end_label, rel_type, pairs['id_start'], pairs['id_end'])
+
+    # CALLS / USES: appelant par (bibliothèque, nom), cible par nom seul
+    # ou, sur des XREF résolues, par (bibliothèque, nom)
+    df_xref = frames.get('xref')
+    resolved = xref_resolved(df_xref)
+    target_keys = ['toObj', 'toLib'] if resolved else ['toObj']
+    programmes = working['Programme']
+    for rel_type, end_label, to_type in [('CALLS', 'Programme', '*PGM'), ('USES', 'Table', '*FILE')]:
+        xref = rows_frame(xref_rows(df_xref, to_type),
+                          ['fromObj', 'fromLib', 'toObj', 'toLib', 'logicalFile', 'nbRelation', 'occurrences'])
+        xref = xref.merge(programmes[['id', 'name', 'library']],
+                          left_on=['fromObj', 'fromLib'], right_on=['name', 'library'])
+        xref = xref[['id', 'fromLib', 'toObj', 'toLib', 'logicalFile', 'nbRelation', 'occurrences']].merge(
+            working[end_label][['id', 'name', 'library']], left_on=target_keys,
+            right_on=['name', 'library'][:len(target_keys)], suffixes=('_start', '_end')
+        )
+        properties = {'occurrences:int': xref['occurrences'],
+                      'nbRelation:int': xref['nbRelation'].astype('Int64'),
+                      'sourceLibrary': xref['fromLib'],
+                      'createdAt:datetime': created_at,
+                      'note': XREF_RESOLVED_NOTE if resolved else XREF_NOTE}
+        if rel_type == 'CALLS':
+            properties = {'callType': 'CALL', **properties}
+        else:
+            properties = {'usageType': 'USE', 'logicalFile': xref['logicalFile'], **properties}
+        relationships[rel_type] = relationship_frame(
+            'Programme', end_label, rel_type, xref['id_start'], xref['id_end'], properties)
+
+    return relationships
+
+def write_sharded(bulk_dir, name, df, shards):
+    """Écrit un fichier d'en-tête et jusqu'à shards fichiers de données
+    (au moins BULK_IMPORT_MIN_SHARD_ROWS lignes par fichier)
+
+    Retourne la liste des fichiers (en-tête en premier), vide si df est vide:
+    neo4j-admin exige au moins un fichier de données par groupe.
+    """
+    if df.empty:
+        return []
+    header_file = f"{name}-header.csv"
+    df.head(0).to_csv(os.path.join(bulk_dir, header_file), index=False, encoding='utf-8')
+    files = [header_file]
+    shards = max(1, min(shards, len(df) // BULK_IMPORT_MIN_SHARD_ROWS))
+    for shard, positions in enumerate(np.array_split(np.arange(len(df)), shards)):
+        part_file = f"{name}-part{shard:03d}.csv"
+        df.iloc[positions].to_csv(os.path.join(bulk_dir, part_file), index=False,
+                                  header=False, encoding='utf-8')
+        files.append(part_file)
+    return files
+
+def write_import_script(bulk_dir, node_files, relationship_files):
+    """Écrit import.sh: commande neo4j-admin avec tous les groupes de fichiers"""
+    lines = [
+        "#!/bin/sh",
+        "# Import complet hors ligne du patrimoine IBMi ARCAD (base arrêtée, écrasée)",
+        "# Usage: sh import.sh [base]   (depuis ce répertoire)",
+        "# Recréer ensuite contraintes et index (PHASE 2 de IBMi_Arcad_LoadNeo4j.txt)",
+        'cd "$(dirname "$0")" || exit 1',
+        'neo4j-admin database import full "${1:-neo4j}" --overwrite-destination \\',
+        "    --skip-duplicate-nodes=false --bad-tolerance=0 \\",
+    ]
+    groups = [f"    --nodes={','.join(files)}" for files in node_files.values()]
+    groups += [f"    --relationships={','.join(files)}" for files in relationship_files.values()]
+    lines += [group + " \\" for group in groups[:-1]] + groups[-1:]
+
+    script_file = os.path.join(bulk_dir, IMPORT_SCRIPT)
+    with open(script_file, 'w', encoding='utf-8', newline='\n') as f:
+        f.write('\n'.join(lines) + '\n')
+    return script_file
+
+def export_bulk_import(frames, output_dir, shards=BULK_IMPORT_SHARDS):
+    """Génère les fichiers neo4j-admin import dans output_dir/bulk_import/
+
+    frames: dict sources, objets, programmes, tables, xref (DataFrames
+    préparés, None si indisponible). Retourne le chemin du script d'import.
+    """
+    print("Export au format neo4j-admin database import...")
+    bulk_dir = os.path.join(output_dir, BULK_IMPORT_DIR)
+    Path(bulk_dir).mkdir(parents=True, exist_ok=True)
+    for existing in os.listdir(bulk_dir):
+        if existing.endswith('.csv'):
+            os.remove(os.path.join(bulk_dir, existing))
+
+    timestamp = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    nodes, working = build_bulk_nodes(frames, timestamp)
+    relationships = build_bulk_relationships(frames, working, timestamp)
+
+    node_files = {}
+    for label, df in nodes.items():
+        files = write_sharded(bulk_dir, label, df, shards)
+        if files:
+            node_files[label] = files
+            print(f"✓ Nœuds {label}: {len(df)} -> {len(files) - 1} shards")
+
+    relationship_files = {}
+    for name, df in relationships.items():
+        files = write_sharded(bulk_dir, name, df, shards)
+        if files:
+            relationship_files[name] = files
+            print(f"✓ Relations {name}: {len(df)} -> {len(files) - 1} shards")
+
+    if not node_files:
+        print("⚠️ Aucun nœud à exporter - script d'import non généré")
+        return None
+
+    script_file = write_import_script(bulk_dir, node_files, relationship_files)
+    print(f"✓ Fichiers bulk-import sauvegardés: {bulk_dir}")
+    print(f"  Commande: sh {script_file} [base]")
+    return script_file
+
+def main(argv=None):
+    """Fonction principale: convertit les CSV de csv_neo4j au format bulk-import"""
+    parser = argparse.ArgumentParser(description="Export des CSV ARCAD au format neo4j-admin import")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--shards", type=int, default=BULK_IMPORT_SHARDS,
+                        help=f"Fichiers de données par groupe (défaut: {BULK_IMPORT_SHARDS})")
+    args = parser.parse_args(argv)
+
+    frames = read_prepared_csvs(args.csv_dir)
+    if frames['objets'] is None and frames['programmes'] is None:
+        print("✗ Aucun CSV d'objets trouvé - lancez d'abord excel_github_to_csv.py")
+        return 1
+
+    return 0 if export_bulk_import(frames, args.csv_dir, args.shards) else 1
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())
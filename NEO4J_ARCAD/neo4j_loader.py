@@ -0,0 +1,564 @@
+#!/usr/bin/env python3
+"""
+Chargeur Neo4j direct - Patrimoine IBMi ARCAD
+Pousse les DataFrames préparés dans Neo4j par lots UNWIND paramétrés (Bolt),
+sans LOAD CSV depuis GitHub ni analyse ligne à ligne côté Cypher
+Auteur: Assistant IA
+Date: 2025
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from arcad_sharding import shard_edges
+from excel_github_to_csv import NEO4J_BATCH_SIZE, NEO4J_WORKERS, OUTPUT_DIR, build_metadata_frames, find_csv_file
+
+# Connexion (surchargeable par NEO4J_URI / NEO4J_USER / NEO4J_PASSWORD)
+NEO4J_URI = "bolt+s://neo4j.coutellec.fr:7687"
+NEO4J_USER = "neo4j"
+
+# Taille des lots UNWIND et nombre de sessions parallèles des phases de nœuds
+BATCH_SIZE = NEO4J_BATCH_SIZE
+NODE_WORKERS = NEO4J_WORKERS
+
+# Types de sources chargés (même filtre que la phase 4 du script Cypher)
+SOURCE_TYPES = ['RPG', 'RPGLE', 'SQLRPG', 'SQLRPGLE', 'CLP', 'CLLE', 'CBL', '*FILE']
+
+# CSV préparés relus par le mode ligne de commande
+PREPARED_CSVS = {
+    'sources': 'IBMi_RefArcaddesSources.csv',
+    'objets': 'IBMi_RefArcaddesObjets.csv',
+    'programmes': 'IBMi_RefArcaddesObjets_Programmes.csv',
+    'tables': 'IBMi_RefArcaddesObjets_Tables.csv',
+    'xref': 'IBMi_RefArcaddesXREF.csv',
+}
+
+# Statistiques d'utilisation IBMi des objets (--enrich): colonne CSV -> (propriété, type)
+USAGE_PROPERTIES = {
+    'IBMI_OBJSIZE': ('objectSize', 'long'),
+    'IBMI_NUMBER_ROWS': ('rowCount', 'long'),
+    'IBMI_DATA_SIZE': ('dataSize', 'long'),
+    'IBMI_LOGICAL_READS': ('logicalReads', 'long'),
+    'IBMI_PHYSICAL_READS': ('physicalReads', 'long'),
+    'IBMI_IO_OPERATIONS': ('ioOperations', 'long'),
+    'IBMI_LAST_USED_DATE': ('lastUsed', 'date'),
+    'IBMI_DAYS_USED_COUNT': ('daysUsed', 'long'),
+    'IBMI_IO_HOT': ('ioHot', 'boolean'),
+    'IBMI_DEAD': ('dead', 'boolean'),
+}
+
+# =========== Requêtes Cypher (équivalents UNWIND des phases de IBMi_Arcad_LoadNeo4j.txt) ===========
+
+CONSTRAINT_STATEMENTS = [
+    "CREATE CONSTRAINT constraint_programme_unique IF NOT EXISTS "
+    "FOR (n:Programme) REQUIRE (n.name, n.library) IS UNIQUE",
+    "CREATE CONSTRAINT constraint_table_unique IF NOT EXISTS "
+    "FOR (n:Table) REQUIRE (n.name, n.library) IS UNIQUE",
+    "CREATE CONSTRAINT constraint_source_unique IF NOT EXISTS "
+    "FOR (n:Source) REQUIRE (n.name, n.library, n.sourceFile) IS UNIQUE",
+    "CREATE CONSTRAINT constraint_application_unique IF NOT EXISTS "
+    "FOR (n:Application) REQUIRE n.name IS UNIQUE",
+    "CREATE CONSTRAINT constraint_type_ibmi_unique IF NOT EXISTS "
+    "FOR (n:TypeObjIBMi) REQUIRE n.name IS UNIQUE",
+    "CREATE CONSTRAINT constraint_type_arcad_unique IF NOT EXISTS "
+    "FOR (n:TypeObjARCAD) REQUIRE n.name IS UNIQUE",
+    "CREATE CONSTRAINT constraint_attribut_unique IF NOT EXISTS "
+    "FOR (n:Attribut) REQUIRE n.name IS UNIQUE",
+    "CREATE INDEX index_programme_name_lib IF NOT EXISTS FOR (n:Programme) ON (n.name, n.library)",
+    "CREATE INDEX index_table_name_lib IF NOT EXISTS FOR (n:Table) ON (n.name, n.library)",
+    "CREATE INDEX index_source_name_lib IF NOT EXISTS FOR (n:Source) ON (n.name, n.library)",
+    "CREATE INDEX index_programme_attribute IF NOT EXISTS FOR (n:Programme) ON (n.attribute)",
+    "CREATE INDEX index_table_attribute IF NOT EXISTS FOR (n:Table) ON (n.attribute)",
+]
+
+# Métadonnées: fichier -> libellé du nœud
+METADATA_LABELS = {
+    'applications.csv': 'Application',
+    'types_ibmi.csv': 'TypeObjIBMi',
+    'types_arcad.csv': 'TypeObjARCAD',
+    'attributs.csv': 'Attribut',
+}
+
+METADATA_QUERY = """
+UNWIND $rows AS row
+MERGE (n:{label} {{name: row.name}})
+SET n.description = row.description,
+    n.loadedAt = datetime()
+"""
+
+SOURCES_QUERY = """
+UNWIND $rows AS row
+MERGE (src:Source {name: row.name, library: row.library, sourceFile: row.sourceFile})
+SET src.sourceType = row.sourceType,
+    src.description = row.description,
+    src.lastModified = row.lastModified,
+    src.lineCount = row.lineCount,
+    src.loadedAt = datetime()
+"""
+
+OBJECTS_QUERY = """
+UNWIND $rows AS row
+MERGE (n:{label} {{name: row.name, library: row.library}})
+SET n += row.usage,
+    n.type = row.type,
+    n.attribute = row.attribute,
+    n.arcadType = row.arcadType,
+    n.description = row.description,
+    n.lastModified = row.lastModified,
+    n.loadedAt = datetime()
+"""
+
+BELONGS_TO_QUERY = """
+UNWIND $rows AS row
+MATCH (n:{label} {{name: row.name, library: row.library}})
+MATCH (app:Application {{name: row.application}})
+MERGE (n)-[:BELONGS_TO]->(app)
+"""
+
+# Phases 8 et 9: relations calculées sur le graphe, exécutées telles quelles
+DERIVED_STATEMENTS = [
+    """MATCH (src:Source), (pgm:Programme)
+WHERE src.name = pgm.name AND src.sourceType = pgm.attribute
+MERGE (src)-[r:GENERATES]->(pgm)
+SET r.createdAt = datetime()""",
+    """MATCH (src:Source), (tbl:Table)
+WHERE src.name = tbl.name AND src.sourceType = tbl.attribute
+MERGE (src)-[r:GENERATES]->(tbl)
+SET r.createdAt = datetime()""",
+    """MATCH (pgm:Programme), (type:TypeObjIBMi)
+WHERE pgm.type = type.name
+MERGE (pgm)-[:TYPED_AS_IBM]->(type)""",
+    """MATCH (tbl:Table), (type:TypeObjIBMi)
+WHERE tbl.type = type.name
+MERGE (tbl)-[:TYPED_AS_IBM]->(type)""",
+    """MATCH (pgm:Programme), (type:TypeObjARCAD)
+WHERE pgm.arcadType = type.name AND pgm.arcadType IS NOT NULL AND pgm.arcadType <> ''
+MERGE (pgm)-[:TYPED_AS_ARCAD]->(type)""",
+    """MATCH (tbl:Table), (type:TypeObjARCAD)
+WHERE tbl.arcadType = type.name AND tbl.arcadType IS NOT NULL AND tbl.arcadType <> ''
+MERGE (tbl)-[:TYPED_AS_ARCAD]->(type)""",
+    """MATCH (pgm:Programme), (attr:Attribut)
+WHERE pgm.attribute = attr.name AND pgm.attribute IS NOT NULL AND pgm.attribute <> ''
+MERGE (pgm)-[:HAS_ATTRIBUTE]->(attr)""",
+    """MATCH (tbl:Table), (attr:Attribut)
+WHERE tbl.attribute = attr.name AND tbl.attribute IS NOT NULL AND tbl.attribute <> ''
+MERGE (tbl)-[:HAS_ATTRIBUTE]->(attr)""",
+]
+
+# ATTENTION: OXR_TO_LIB n'est pas fiable - matching uniquement sur nom d'objet
+CALLS_QUERY = """
+UNWIND $rows AS row
+MATCH (fromPgm:Programme {name: row.fromObj, library: row.fromLib})
+MATCH (toPgm:Programme {name: row.toObj})
+MERGE (fromPgm)-[r:CALLS]->(toPgm)
+SET r.callType = 'CALL',
+    r.occurrences = row.occurrences,
+    r.nbRelation = row.nbRelation,
+    r.createdAt = datetime(),
+    r.sourceLibrary = row.fromLib,
+    r.note = 'Target library ignored - OXR_TO_LIB unreliable'
+"""
+
+USES_QUERY = """
+UNWIND $rows AS row
+MATCH (pgm:Programme {name: row.fromObj, library: row.fromLib})
+MATCH (tbl:Table {name: row.toObj})
+MERGE (pgm)-[r:USES]->(tbl)
+SET r.usageType = 'USE',
+    r.logicalFile = row.logicalFile,
+    r.occurrences = row.occurrences,
+    r.nbRelation = row.nbRelation,
+    r.sourceLibrary = row.fromLib,
+    r.createdAt = datetime(),
+    r.note = 'Target library ignored - OXR_TO_LIB unreliable'
+"""
+
+# XREF résolues (arcad_resolution): appelant et cible par (nom, bibliothèque)
+CALLS_RESOLVED_QUERY = """
+UNWIND $rows AS row
+MATCH (fromPgm:Programme {name: row.fromObj, library: row.fromLib})
+MATCH (toPgm:Programme {name: row.toObj, library: row.toLib})
+MERGE (fromPgm)-[r:CALLS]->(toPgm)
+SET r.callType = 'CALL',
+    r.occurrences = row.occurrences,
+    r.nbRelation = row.nbRelation,
+    r.createdAt = datetime(),
+    r.sourceLibrary = row.fromLib,
+    r.note = 'Target library resolved (*LIBL/aliases)'
+"""
+
+USES_RESOLVED_QUERY = """
+UNWIND $rows AS row
+MATCH (pgm:Programme {name: row.fromObj, library: row.fromLib})
+MATCH (tbl:Table {name: row.toObj, library: row.toLib})
+MERGE (pgm)-[r:USES]->(tbl)
+SET r.usageType = 'USE',
+    r.logicalFile = row.logicalFile,
+    r.occurrences = row.occurrences,
+    r.nbRelation = row.nbRelation,
+    r.sourceLibrary = row.fromLib,
+    r.createdAt = datetime(),
+    r.note = 'Target library resolved (*LIBL/aliases)'
+"""
+
+# =========== Préparation des lignes (trim, filtres et dates côté Python) ===========
+
+def text_values(df, column):
+    """Retourne une colonne en texte nettoyé ('' si absente ou vide)"""
+    if column not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    values = df[column].astype(object).where(df[column].notna(), '')
+    return values.astype(str).str.strip()
+
+def date_values(df, column):
+    """Convertit une colonne AAAA-MM-JJ (ou AAAAMMJJ) en dates Python (None si invalide)"""
+    values = text_values(df, column).str.replace('-', '', regex=False).str[:8]
+    dates = pd.to_datetime(values, format='%Y%m%d', errors='coerce')
+    return [None if pd.isna(d) else d.date() for d in dates]
+
+def integer_values(df, column):
+    """Convertit une colonne numérique en entiers (0 si absente ou invalide)"""
+    numbers = pd.to_numeric(text_values(df, column), errors='coerce')
+    return numbers.fillna(0).astype('int64')
+
+def boolean_values(df, column):
+    """Convertit une colonne booléenne (True/False) en bool Python (None si vide)"""
+    values = text_values(df, column).str.lower()
+    return [True if v == 'true' else False if v == 'false' else None for v in values]
+
+def usage_values(df):
+    """Propriétés d'utilisation IBMi de chaque ligne (USAGE_PROPERTIES)
+
+    Une map par ligne, sans les valeurs manquantes (SET n += map), vide si
+    les objets n'ont pas été enrichis.
+    """
+    columns = {}
+    for column, (prop, kind) in USAGE_PROPERTIES.items():
+        if column not in df.columns:
+            continue
+        if kind == 'long':
+            numbers = pd.to_numeric(text_values(df, column), errors='coerce')
+            columns[prop] = [None if pd.isna(n) else int(n) for n in numbers]
+        elif kind == 'date':
+            columns[prop] = date_values(df, column)
+        else:
+            columns[prop] = boolean_values(df, column)
+    if not columns:
+        return [{} for _ in range(len(df))]
+    props = list(columns)
+    return [{prop: value for prop, value in zip(props, values) if value is not None}
+            for values in zip(*columns.values())]
+
+def to_rows(columns, keys, index):
+    """Assemble des colonnes en lignes de paramètres UNWIND, une par clé
+
+    En cas de doublon sur la clé, la dernière ligne l'emporte, comme avec les
+    MERGE + SET successifs de LOAD CSV.
+    """
+    frame = pd.DataFrame(columns, index=index)
+    frame = frame.drop_duplicates(subset=keys, keep='last')
+    return frame.to_dict('records')
+
+def source_rows(df):
+    """Lignes Source (phase 4): membres 'M' des types de SOURCE_TYPES"""
+    if df is None or df.empty:
+        return []
+    mask = ((text_values(df, 'LST_CELTTY') == 'M')
+            & text_values(df, 'LST_CTYPE').isin(SOURCE_TYPES)
+            & (text_values(df, 'LST_JOBJ') != '')
+            & (text_values(df, 'LST_JLIB') != ''))
+    df = df[mask]
+    return to_rows({
+        'name': text_values(df, 'LST_JOBJ'),
+        'library': text_values(df, 'LST_JLIB'),
+        'sourceFile': text_values(df, 'LST_JSRCF'),
+        'sourceType': text_values(df, 'LST_CTYPE'),
+        'description': text_values(df, 'LST_CTXT'),
+        'lastModified': date_values(df, 'LST_TDATE'),
+        'lineCount': integer_values(df, 'LST_JZSEL1'),
+        'application': text_values(df, 'LST_CAPP'),
+    }, ['name', 'library', 'sourceFile'], df.index)
+
+def object_rows(df, object_type, attributes=None):
+    """Lignes Programme / Table (phases 5 et 6): objets 'O' du type demandé"""
+    if df is None or df.empty:
+        return []
+    mask = ((text_values(df, 'LST_CELTTY') == 'O')
+            & (text_values(df, 'LST_CTYPE') == object_type)
+            & (text_values(df, 'LST_JOBJ') != '')
+            & (text_values(df, 'LST_JLIB') != ''))
+    if attributes:
+        mask &= text_values(df, 'LST_CATR').isin(attributes)
+    df = df[mask]
+    return to_rows({
+        'name': text_values(df, 'LST_JOBJ'),
+        'library': text_values(df, 'LST_JLIB'),
+        'type': text_values(df, 'LST_CTYPE'),
+        'attribute': text_values(df, 'LST_CATR'),
+        'arcadType': text_values(df, 'LST_CCPLT'),
+        'description': text_values(df, 'LST_CTXT'),
+        'lastModified': date_values(df, 'LST_TDATE'),
+        'application': text_values(df, 'LST_CAPP'),
+        'usage': usage_values(df),
+    }, ['name', 'library'], df.index)
+
+def xref_resolved(df):
+    """Vrai si les XREF portent les bibliothèques résolues (arcad_resolution)"""
+    return df is not None and 'OXR_TO_RLIB' in df.columns
+
+def xref_rows(df, to_type):
+    """Lignes CALLS (*PGM) ou USES (*FILE) de la phase 10, une par relation
+
+    occurrences additionne NB_OCCURRENCES (1 par ligne si la colonne est
+    absente) des lignes regroupées sur la même relation. Sur des XREF
+    résolues, fromLib et toLib sont les bibliothèques résolues et les lignes
+    non résolues sont écartées; sinon toLib vaut None (cible par nom seul).
+    """
+    if df is None or df.empty:
+        return []
+    resolved = xref_resolved(df)
+    from_lib = 'OXR_FROM_RLIB' if resolved else 'OXR_FROM_LIB'
+    mask = ((text_values(df, 'OXR_FROM_TYPE') == '*PGM')
+            & (text_values(df, 'OXR_TO_TYPE') == to_type)
+            & (text_values(df, 'OXR_FROM_OBJ') != '')
+            & (text_values(df, 'OXR_TO_OBJ') != '')
+            & (text_values(df, from_lib) != ''))
+    if resolved:
+        mask &= text_values(df, 'OXR_TO_RLIB') != ''
+    df = df[mask]
+    logical_files = text_values(df, 'OXR_TO_LF_OBJ')
+    weights = integer_values(df, 'NB_OCCURRENCES') if 'NB_OCCURRENCES' in df.columns \
+        else pd.Series(1, index=df.index, dtype='int64')
+    nbrelation = pd.to_numeric(text_values(df, 'NBRELATION'), errors='coerce')
+    columns = {
+        'fromObj': text_values(df, 'OXR_FROM_OBJ'),
+        'fromLib': text_values(df, from_lib),
+        'toObj': text_values(df, 'OXR_TO_OBJ'),
+        'toLib': text_values(df, 'OXR_TO_RLIB') if resolved else pd.Series(None, index=df.index, dtype=object),
+        'logicalFile': logical_files.where(logical_files != '', None),
+        'nbRelation': pd.Series([None if pd.isna(v) else int(v) for v in nbrelation],
+                                index=df.index, dtype=object),
+    }
+    keys = ['fromObj', 'fromLib', 'toObj', 'toLib']
+    columns['occurrences'] = weights.groupby([columns[key] for key in keys], dropna=False).transform('sum')
+    return to_rows(columns, keys, df.index)
+
+def metadata_rows(df_metadata):
+    """Lignes de métadonnées (phase 3): première colonne = nom"""
+    names = text_values(df_metadata, df_metadata.columns[0])
+    return to_rows({
+        'name': names,
+        'description': text_values(df_metadata, 'description'),
+    }, ['name'], df_metadata.index)
+
+# =========== Exécution ===========
+
+def run_query(tx, query, rows=None):
+    """Fonction de transaction: exécute une requête et consomme le résultat"""
+    tx.run(query, rows=rows).consume()
+
+def run_batches(driver, query, rows, batch_size=BATCH_SIZE, workers=1, database=None):
+    """Exécute query par lots UNWIND de batch_size lignes
+
+    Chaque lot est une transaction d'écriture (rejouée par le pilote en cas
+    d'erreur transitoire). Avec workers > 1, les lots sont répartis sur
+    plusieurs sessions concurrentes du pool de connexions.
+    """
+    batches = [rows[i:i + batch_size] for i in range(0, len(rows), batch_size)]
+
+    def write(batch):
+        with driver.session(database=database) as session:
+            session.execute_write(run_query, query, batch)
+
+    if workers > 1 and len(batches) > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(write, batches))
+    else:
+        for batch in batches:
+            write(batch)
+    return len(rows)
+
+def run_sharded_batches(driver, query, rows, same_label, batch_size=BATCH_SIZE, workers=1, database=None):
+    """Exécute les lots d'une relation XREF par vagues de shards (arcad_sharding)
+
+    Les shards d'une vague ne partagent aucune extrémité: workers sessions
+    les chargent en parallèle sans attendre les mêmes verrous de nœuds. Les
+    lots d'un shard restent séquentiels dans sa session. Les clés de nœuds
+    sont celles des MATCH de la requête: nom seul si la cible est cherchée par
+    nom, (bibliothèque, nom) sur des XREF résolues.
+    """
+    if workers <= 1 or len(rows) < 2:
+        return run_batches(driver, query, rows, batch_size, 1, database)
+    if rows[0]['toLib'] is not None:
+        from_keys = [f"{row['fromLib']}/{row['fromObj']}" for row in rows]
+        to_keys = [f"{row['toLib']}/{row['toObj']}" for row in rows]
+    else:
+        from_keys = [row['fromObj'] for row in rows]
+        to_keys = [row['toObj'] for row in rows]
+    shards, schedule = shard_edges(from_keys, to_keys, workers, same_label)
+    groups = {}
+    for row, shard in zip(rows, shards.tolist()):
+        groups.setdefault(shard, []).append(row)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for wave in schedule:
+            list(pool.map(lambda shard: run_batches(driver, query, groups[shard], batch_size, 1, database),
+                          wave))
+    return len(rows)
+
+def run_statements(driver, statements, database=None):
+    """Exécute des requêtes sans paramètres, une transaction chacune"""
+    for statement in statements:
+        with driver.session(database=database) as session:
+            session.execute_write(run_query, statement)
+    return len(statements)
+
+def timed_phase(metrics, phase, function, *args, **kwargs):
+    """Exécute une phase, affiche son débit et l'ajoute à metrics"""
+    start = time.perf_counter()
+    count = function(*args, **kwargs)
+    duration = time.perf_counter() - start
+    rate = count / duration if duration > 0 else 0.0
+    metrics.append({'phase': phase, 'rows': count, 'seconds': round(duration, 3),
+                    'rows_per_second': round(rate, 1)})
+    print(f"✓ {phase}: {count:,} lignes en {duration:.2f} s ({rate:,.0f} lignes/s)")
+
+def load_graph(driver, frames, batch_size=BATCH_SIZE, workers=NODE_WORKERS, database=None):
+    """Charge le patrimoine dans Neo4j à partir des DataFrames préparés
+
+    frames: dict avec les clés sources, objets, programmes, tables, xref
+    (DataFrames issus de excel_github_to_csv, None si indisponible).
+    driver: pilote neo4j (ou tout objet exposant session(database=...)
+    avec execute_write), ce qui permet les tests sans serveur.
+    Les phases de nœuds utilisent workers sessions parallèles; les
+    relations CALLS et USES sont chargées par vagues de shards sans nœud
+    commun (workers sessions, sans verrous croisés), les autres relations
+    restent séquentielles.
+    Retourne la liste des métriques par phase.
+    """
+    metrics = []
+
+    timed_phase(metrics, "Contraintes et index", run_statements, driver, CONSTRAINT_STATEMENTS, database)
+
+    # Phase 3: métadonnées
+    df_objets = frames.get('objets')
+    if df_objets is not None:
+        for filename, df_metadata in build_metadata_frames(df_objets).items():
+            label = METADATA_LABELS[filename]
+            timed_phase(metrics, f"Métadonnées {label}", run_batches, driver,
+                        METADATA_QUERY.format(label=label), metadata_rows(df_metadata),
+                        batch_size, 1, database)
+
+    # Phases 4 à 6: nœuds (lots parallèles, clés dédoublonnées)
+    sources = source_rows(frames.get('sources'))
+    programmes = object_rows(frames.get('programmes'), '*PGM')
+    tables = object_rows(frames.get('tables'), '*FILE', ['PF', 'TABLE'])
+
+    timed_phase(metrics, "Sources", run_batches, driver, SOURCES_QUERY,
+                sources, batch_size, workers, database)
+    timed_phase(metrics, "Programmes", run_batches, driver, OBJECTS_QUERY.format(label='Programme'),
+                programmes, batch_size, workers, database)
+    timed_phase(metrics, "Tables", run_batches, driver, OBJECTS_QUERY.format(label='Table'),
+                tables, batch_size, workers, database)
+
+    # Phase 7: BELONGS_TO
+    for label, rows in [('Programme', programmes), ('Table', tables), ('Source', sources)]:
+        linked = [row for row in rows if row['application']]
+        timed_phase(metrics, f"BELONGS_TO {label}", run_batches, driver,
+                    BELONGS_TO_QUERY.format(label=label), linked, batch_size, 1, database)
+
+    # Phases 8 et 9: GENERATES et typage
+    timed_phase(metrics, "Relations dérivées", run_statements, driver, DERIVED_STATEMENTS, database)
+
+    # Phase 10: références croisées
+    df_xref = frames.get('xref')
+    resolved = xref_resolved(df_xref)
+    timed_phase(metrics, "CALLS", run_sharded_batches, driver,
+                CALLS_RESOLVED_QUERY if resolved else CALLS_QUERY, xref_rows(df_xref, '*PGM'), True,
+                batch_size, workers, database)
+    timed_phase(metrics, "USES", run_sharded_batches, driver,
+                USES_RESOLVED_QUERY if resolved else USES_QUERY, xref_rows(df_xref, '*FILE'), False,
+                batch_size, workers, database)
+
+    return metrics
+
+def create_driver(uri=None, user=None, password=None, workers=NODE_WORKERS):
+    """Crée le pilote Neo4j (pool de connexions dimensionné pour workers sessions)"""
+    try:
+        from neo4j import GraphDatabase
+    except ImportError:
+        raise ImportError("Le pilote neo4j est requis pour le chargement direct: pip install neo4j")
+
+    uri = uri or os.environ.get('NEO4J_URI', NEO4J_URI)
+    user = user or os.environ.get('NEO4J_USER', NEO4J_USER)
+    password = password or os.environ.get('NEO4J_PASSWORD')
+    if not password:
+        raise ValueError("Mot de passe Neo4j manquant (variable NEO4J_PASSWORD)")
+    return GraphDatabase.driver(uri, auth=(user, password),
+                                max_connection_pool_size=max(workers * 2, 4))
+
+def load_to_neo4j(frames, uri=None, user=None, password=None, database=None,
+                  batch_size=BATCH_SIZE, workers=NODE_WORKERS):
+    """Ouvre une connexion, charge les DataFrames et referme le pilote"""
+    print("Chargement direct dans Neo4j (Bolt, lots UNWIND)...")
+    driver = create_driver(uri, user, password, workers)
+    try:
+        driver.verify_connectivity()
+        start = time.perf_counter()
+        metrics = load_graph(driver, frames, batch_size, workers, database)
+        print(f"✓ Chargement Neo4j terminé en {time.perf_counter() - start:.2f} s")
+        return metrics
+    finally:
+        driver.close()
+
+def read_prepared_csvs(csv_dir):
+    """Relit les CSV générés par excel_github_to_csv (texte brut, vides = '')
+
+    Les CSV compressés (--compress, .gz ou .zst) sont décompressés à la volée.
+    """
+    frames = {}
+    for kind, filename in PREPARED_CSVS.items():
+        path = find_csv_file(csv_dir, filename)
+        if path is not None:
+            frames[kind] = pd.read_csv(path, dtype=str, keep_default_na=False, encoding='utf-8')
+            print(f"✓ {os.path.basename(path)}: {len(frames[kind])} lignes")
+        else:
+            print(f"⚠️ {filename} non trouvé - phase ignorée")
+            frames[kind] = None
+    return frames
+
+def main(argv=None):
+    """Fonction principale: charge les CSV de csv_neo4j dans Neo4j"""
+    parser = argparse.ArgumentParser(description="Chargement direct des CSV ARCAD dans Neo4j")
+    parser.add_argument("--csv-dir", default=OUTPUT_DIR,
+                        help=f"Répertoire des CSV préparés (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--uri", help=f"URI Bolt (défaut: NEO4J_URI ou {NEO4J_URI})")
+    parser.add_argument("--user", help=f"Utilisateur (défaut: NEO4J_USER ou {NEO4J_USER})")
+    parser.add_argument("--database", help="Base cible (défaut: base par défaut du serveur)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Lignes par lot UNWIND (défaut: {BATCH_SIZE})")
+    parser.add_argument("--workers", type=int, default=NODE_WORKERS,
+                        help=f"Sessions parallèles des phases de nœuds et des shards CALLS/USES "
+                             f"(défaut: {NODE_WORKERS})")
+    args = parser.parse_args(argv)
+
+    frames = read_prepared_csvs(args.csv_dir)
+    if frames['objets'] is None and frames['programmes'] is None:
+        print("✗ Aucun CSV d'objets trouvé - lancez d'abord excel_github_to_csv.py")
+        return 1
+
+    try:
+        load_to_neo4j(frames, uri=args.uri, user=args.user, database=args.database,
+                      batch_size=args.batch_size, workers=args.workers)
+    except Exception as e:
+        print(f"✗ Erreur lors du chargement Neo4j: {str(e)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    import sys
+    sys.exit(main())